@@ -0,0 +1,311 @@
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+
+from checker import ENGINE_HTTP, ENGINE_PLAYWRIGHT, EXIT_OK, EXIT_USAGE, STATUS_SKIPPED, check_sites, emit
+from payload import BACKEND
+from spill import SpillStore
+from timing import latency_summary
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Benchmark sin red: un servidor local reproduce los payloads grabados (home.json y
+# test_results.json) y el motor se mide contra él con varias concurrencias y ambos motores.
+#
+#   python benchmark.py
+#   python benchmark.py --concurrency 1 4 16 --engines http --copies 5 --latency 50 --scale 4
+#   python benchmark.py --error-rate 0.05 --missing-rate 0.05
+#
+# Por defecto el motor corre sin reintentos ni circuit breaker (--retries 0 --breaker 0):
+# con errores inyectados, los reintentos agregan esperas y el breaker salta slugs sin pedirlos,
+# y las cifras dejarían de medir el motor. Cada reporte trae cuántos slugs se saltaron.
+# Cada combinación (motor, concurrencia) corre en un proceso nuevo, así el pico de memoria
+# (RSS) es solo del verificador y no del servidor ni de la corrida anterior.
+# La primera línea dice qué parser de JSON se usó (json_backend: "orjson" o "json").
+# Escribe un JSON por combinación: slugs/s, pico de RSS, tiempo de parseo, latencias y slugs saltados.
+
+DEFAULT_LEVELS = (1, 6, 16)
+DEFAULT_COPIES = 3  # veces que se repite cada slug grabado
+HOME_PAYLOAD = "home.json"
+RECORDED_RESULTS = "test_results.json"
+API_PREFIX = "/api"
+
+
+def load_payloads(home_path=HOME_PAYLOAD, results_path=RECORDED_RESULTS, scale=1.0):
+    #{slug: (status, cuerpo JSON en bytes)} y {nombre: slug}. Home sale de home.json
+    #y el resto de test_results.json; scale multiplica el número de módulos de cada payload.
+    with open(results_path, "r", encoding="utf-8") as f:
+        recorded = json.load(f)
+    with open(home_path, "r", encoding="utf-8") as f:
+        home = json.load(f)
+
+    payloads = {}
+    slugs = {}
+    for result in recorded:
+        slugs[result["name"]] = result["slug"]
+        if result["slug"] == "/":
+            payload = home
+        elif result["status"] != 200:
+            payloads[result["slug"]] = (result["status"], json.dumps({"code": result["status"]}).encode("utf-8"))
+            continue
+        else:
+            payload = {
+                "code": 200,
+                "type": result["type"],
+                "data": {"section": result["section"], "modules": result.get("modules_list", [])},
+            }
+        if scale != 1.0:
+            payload = scale_payload(payload, scale)
+        payloads[result["slug"]] = (200, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+    return payloads, slugs
+
+
+def scale_payload(payload, scale):
+    modules = payload.get("data", {}).get("modules", [])
+    count = max(0, round(len(modules) * scale))
+    scaled = dict(payload)
+    scaled["data"] = dict(payload["data"])
+    scaled["data"]["modules"] = [modules[i % len(modules)] for i in range(count)] if modules else []
+    return scaled
+
+
+class ReplayServer:
+    #Servidor HTTP local con los payloads grabados, en un hilo.
+    #latency (ms, con jitter de ±50%), error_rate (responde 500) y missing_rate (responde 404)
+    #se aplican a cada petición. La URL base sirve una página HTML mínima para Playwright.
+    def __init__(self, payloads, latency=0, error_rate=0.0, missing_rate=0.0, seed=None):
+        self.payloads = payloads
+        self.latency = latency
+        self.error_rate = error_rate
+        self.missing_rate = missing_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._gzipped = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="checkfront-replay", daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def site_config(self, slugs, copies=1):
+        #Configuración de sitio que apunta al servidor; con copies > 1 cada slug se repite con ?copy=n
+        config_slugs = {}
+        for name, slug in slugs.items():
+            for copy in range(copies):
+                config_slugs[name if copy == 0 else f"{name} {copy}"] = slug if copy == 0 else f"{slug}?copy={copy}"
+        return {
+            "name": "Replay",
+            "base_url": self.base_url + "/",
+            "api_base": self.base_url + API_PREFIX,
+            "slugs": config_slugs,
+        }
+
+    def _pick(self, slug):
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            delay = self.latency * (0.5 + self._random.random()) / 1000 if self.latency else 0
+        if roll < self.error_rate:
+            return delay, 500, b'{"code":500}'
+        if roll < self.error_rate + self.missing_rate:
+            return delay, 404, b'{"code":404}'
+        status, body = self.payloads.get(slug, (404, b'{"code":404}'))
+        return delay, status, body
+
+    def _compressed(self, slug, body):
+        cached = self._gzipped.get(slug)
+        if cached is None or cached[0] is not body:
+            cached = (body, gzip.compress(body, 5))
+            self._gzipped[slug] = cached
+        return cached[1]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Cabeceras y cuerpo salen en dos escrituras; sin esto Nagle agrega ~40 ms por respuesta
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if not path.startswith(API_PREFIX):
+                    self.reply(200, b"<html><body>replay</body></html>", "text/html")
+                    return
+                slug = path[len(API_PREFIX):] or "/"
+                delay, status, body = server._pick(slug)
+                if delay:
+                    time.sleep(delay)
+                gzipped = status == 200 and "gzip" in self.headers.get("Accept-Encoding", "")
+                if gzipped:
+                    body = server._compressed(slug, body)
+                self.reply(status, body, "application/json", gzipped)
+
+            def reply(self, status, body, content_type, gzipped=False):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                if gzipped:
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB, macOS en bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(site_config, engine, concurrency, timeout, retries=0, breaker_threshold=0):
+    #Corre en un proceso nuevo: una ejecución completa del motor contra el servidor local
+    parse_ms = []
+    totals = []
+    statuses = {}
+
+    def on_result(site, result, index):
+        timing = result.get("timing") or {}
+        if "parse_ms" in timing:
+            parse_ms.append(timing["parse_ms"])
+            totals.append(timing["total_ms"])
+        key = str(result["status"])
+        statuses[key] = statuses.get(key, 0) + 1
+
+    spill = SpillStore()
+    start = time.perf_counter()
+    try:
+        _, errors = asyncio.run(check_sites(
+            {"Replay": site_config},
+            on_result,
+            concurrency=concurrency,
+            engine=engine,
+            timeout=timeout,
+            spill=spill,
+            retries=retries,
+            breaker_threshold=breaker_threshold
+        ))
+    finally:
+        spill.close()
+    elapsed = time.perf_counter() - start
+
+    if errors:
+        return {"error": "; ".join(str(e) for e in errors.values())}
+    slugs = sum(statuses.values())
+    totals.sort()
+    report = {
+        "slugs": slugs,
+        "seconds": round(elapsed, 3),
+        "slugs_per_sec": round(slugs / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "parse_ms_total": round(sum(parse_ms), 1),
+        "parse_ms_mean": round(sum(parse_ms) / len(parse_ms), 2) if parse_ms else None,
+    }
+    report.update({f"{key}_ms": value for key, value in latency_summary(totals).items()})
+    report["skipped"] = statuses.get(STATUS_SKIPPED, 0)
+    report["statuses"] = statuses
+    return report
+
+
+def run_benchmark(site_config, engines=(ENGINE_HTTP, ENGINE_PLAYWRIGHT), levels=DEFAULT_LEVELS, timeout=30,
+                  on_report=None, retries=0, breaker_threshold=0):
+    #Mide cada (motor, concurrencia) en su propio proceso; regresa la lista de reportes
+    reports = []
+    context = get_context("spawn")
+    for engine in engines:
+        for concurrency in levels:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                try:
+                    report = executor.submit(
+                        measure, site_config, engine, concurrency, timeout, retries, breaker_threshold
+                    ).result()
+                except Exception as e:
+                    report = {"error": str(e)}
+            report = dict({"engine": engine, "concurrency": concurrency}, **report)
+            reports.append(report)
+            if on_report:
+                on_report(report)
+    return reports
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark del verificador contra un servidor local con payloads grabados")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(DEFAULT_LEVELS), help="Niveles de concurrencia")
+    parser.add_argument("--engines", nargs="+", choices=(ENGINE_HTTP, ENGINE_PLAYWRIGHT),
+                        default=[ENGINE_HTTP, ENGINE_PLAYWRIGHT])
+    parser.add_argument("--copies", type=int, default=DEFAULT_COPIES, help="Veces que se repite cada slug grabado")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplica el número de módulos de cada payload")
+    parser.add_argument("--latency", type=float, default=0, help="Latencia simulada del servidor en ms (±50%%)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 500")
+    parser.add_argument("--missing-rate", type=float, default=0.0, help="Fracción de respuestas 404")
+    parser.add_argument("--seed", type=int, default=1, help="Semilla de la inyección de errores")
+    parser.add_argument("--timeout", type=float, default=30, help="Segundos por petición")
+    parser.add_argument("--retries", type=int, default=0, help="Reintentos por slug (por defecto ninguno)")
+    parser.add_argument("--breaker", type=int, default=0,
+                        help="Fallas seguidas que abren el circuit breaker del host (0: sin breaker)")
+    parser.add_argument("--home", default=HOME_PAYLOAD, help="Payload completo de Home")
+    parser.add_argument("--results", default=RECORDED_RESULTS, help="Resultados grabados (test_results.json)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        payloads, slugs = load_payloads(args.home, args.results, args.scale)
+    except (OSError, ValueError) as e:
+        print(f"No se pudieron leer los payloads: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    server = ReplayServer(payloads, args.latency, args.error_rate, args.missing_rate, args.seed).start()
+    try:
+        emit({
+            "server": server.base_url,
+            "slugs": len(slugs) * max(1, args.copies),
+            "payload_mb": round(sum(len(body) for _, body in payloads.values()) / (1024 * 1024), 2),
+            "json_backend": BACKEND,
+        })
+        run_benchmark(
+            server.site_config(slugs, max(1, args.copies)),
+            args.engines,
+            [max(1, level) for level in args.concurrency],
+            args.timeout,
+            emit,
+            max(0, args.retries),
+            max(0, args.breaker)
+        )
+    finally:
+        server.stop()
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import sys
+from urllib.parse import urlsplit
+
+# Bloqueo de recursos del navegador por clase, con el ruteo de peticiones de Playwright.
+# Lo usan la carga de la URL base del motor Playwright (solo hacen falta sus cookies y su JS)
+# y el modo front (frontend.py). Las clases se eligen por sitio con "block" en sites_config.json:
+#   "block": ["ads", "analytics", "media"]    ([] no bloquea nada)
+# ads y analytics se reconocen por el host; media por el tipo de recurso del navegador.
+# Nota: con el ruteo activo el navegador no usa su caché HTTP para esas páginas.
+
+AD_HOSTS = (
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "amazon-adsystem.com", "adnxs.com", "criteo.com", "criteo.net", "taboola.com", "outbrain.com",
+    "pubmatic.com", "rubiconproject.com", "openx.net", "teads.tv", "smartadserver.com",
+    "casalemedia.com", "adsrvr.org", "3lift.com",
+)
+ANALYTICS_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "analytics.google.com", "scorecardresearch.com",
+    "comscore.com", "chartbeat.com", "chartbeat.net", "hotjar.com", "facebook.net", "segment.io",
+    "segment.com", "nr-data.net", "newrelic.com", "quantserve.com", "mixpanel.com",
+)
+MEDIA_TYPES = ("image", "media", "font")
+
+RESOURCE_CLASSES = ("ads", "analytics", "media")
+DEFAULT_BLOCK = RESOURCE_CLASSES
+BLOCKED_ERROR = "blockedbyclient"
+ROUTE_PATTERN = "**/*"
+
+
+def host_matches(host, hosts):
+    return any(host == h or host.endswith("." + h) for h in hosts)
+
+
+def classify(url, resource_type):
+    #Clase de un recurso ("ads", "analytics", "media") o None si no es de ninguna
+    host = (urlsplit(url).hostname or "").lower()
+    if host_matches(host, AD_HOSTS):
+        return "ads"
+    if host_matches(host, ANALYTICS_HOSTS):
+        return "analytics"
+    if resource_type in MEDIA_TYPES:
+        return "media"
+    return None
+
+
+def block_classes(site_config, default=DEFAULT_BLOCK):
+    #Clases a bloquear para un sitio; las desconocidas se avisan y se ignoran
+    classes = site_config.get("block", default)
+    unknown = [c for c in classes if c not in RESOURCE_CLASSES]
+    if unknown:
+        print(f"Clases de recursos desconocidas en {site_config.get('name', '')}: {', '.join(unknown)}",
+              file=sys.stderr)
+    return tuple(c for c in classes if c in RESOURCE_CLASSES)
+
+
+async def block_resources(target, classes):
+    #Instala el ruteo en un contexto o página de Playwright. Regresa {clase: peticiones bloqueadas},
+    #que se va llenando mientras el contexto/página sigue abierto.
+    blocked = {}
+    if not classes:
+        return blocked
+
+    async def handle(route, request):
+        resource_class = classify(request.url, request.resource_type)
+        if resource_class in classes:
+            blocked[resource_class] = blocked.get(resource_class, 0) + 1
+            await route.abort(BLOCKED_ERROR)
+        else:
+            await route.continue_()
+
+    await target.route(ROUTE_PATTERN, handle)
+    return blocked
+
+
+async def unblock_resources(target):
+    await target.unroute(ROUTE_PATTERN)
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import sys
+import time
+
+# Caché en disco de las respuestas de la API, por URL (api_base + slug).
+# Guarda los módulos (bytes JSON), los validadores (ETag / Last-Modified), un digest
+# del cuerpo y el resumen ya calculado del slug. Con eso el motor HTTP puede:
+#   - mandar peticiones condicionales y, si la API responde 304, no descargar nada;
+#   - si el cuerpo llega completo pero con el mismo digest, no volver a parsear el JSON.
+# El tamaño total se limita borrando las entradas usadas hace más tiempo.
+
+DEFAULT_CACHE_DIR = ".checkfront_cache"
+DEFAULT_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+SUMMARY_FIELDS = ("type", "section", "modules", "modules_ok", "module_index", "fingerprint", "module_hashes")
+
+
+def body_digest(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._entries = {}  # llave -> [bytes en disco, último uso]
+        self._total = 0
+        self._scan()
+
+    def _scan(self):
+        # Reconstruye el índice de tamaños a partir de los archivos existentes
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            key = entry.name[:-5]
+            stat = entry.stat()
+            size = stat.st_size
+            try:
+                size += os.path.getsize(self._modules_path(key))
+            except OSError:
+                pass
+            self._entries[key] = [size, stat.st_mtime]
+            self._total += size
+
+    def _key(self, url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _meta_path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _modules_path(self, key):
+        return os.path.join(self.directory, key + ".modules")
+
+    def _read_meta(self, url):
+        key = self._key(url)
+        if key not in self._entries:
+            return None
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            self._remove(key)
+            return None
+        return meta if meta.get("url") == url else None
+
+    def validators(self, url):
+        #Cabeceras para una petición condicional, o None si no hay entrada
+        meta = self._read_meta(url)
+        if not meta:
+            return None
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers or None
+
+    def lookup(self, url, response):
+        #Si la respuesta es un 304 o trae el mismo cuerpo que la entrada guardada,
+        #regresa el resultado guardado con los módulos como bytes (modules_raw),
+        #sin parsear nada; si no, None.
+        meta = self._read_meta(url)
+        if not meta:
+            return None
+        if response.status != 304 and (
+            response.status != meta["status"] or body_digest(response.body) != meta["digest"]
+        ):
+            return None
+
+        key = self._key(url)
+        try:
+            with open(self._modules_path(key), "rb") as f:
+                modules_raw = f.read()
+        except OSError:
+            self._remove(key)
+            return None
+        self._touch(key)
+        result = {"status": meta["status"]}
+        result.update(meta["summary"])
+        result["modules_raw"] = modules_raw
+        return result
+
+    def store(self, url, response, result, modules_raw):
+        #Guarda una respuesta 200 ya procesada: su resumen y sus módulos como bytes JSON
+        if response.status != 200:
+            return
+        key = self._key(url)
+        digest = body_digest(response.body)
+        meta = {
+            "url": url,
+            "status": response.status,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "digest": digest,
+            "stored": time.time(),
+            "summary": {field: result[field] for field in SUMMARY_FIELDS},
+        }
+        try:
+            self._write(self._modules_path(key), modules_raw)
+            self._write(self._meta_path(key), json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        except OSError as e:
+            print(f"No se pudo guardar en caché {url}: {e}", file=sys.stderr)
+            self._remove(key)
+            return
+
+        size = len(modules_raw) + os.path.getsize(self._meta_path(key))
+        previous = self._entries.get(key)
+        if previous:
+            self._total -= previous[0]
+        self._entries[key] = [size, time.time()]
+        self._total += size
+        self._evict()
+
+    def _write(self, path, data):
+        # Escritura atómica: nunca queda un archivo a medias
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _touch(self, key):
+        now = time.time()
+        self._entries[key][1] = now
+        try:
+            os.utime(self._meta_path(key), (now, now))
+        except OSError:
+            pass
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._total -= entry[0]
+        for path in (self._meta_path(key), self._modules_path(key)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        if self._total <= self.max_bytes:
+            return
+        for key, _ in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total <= self.max_bytes:
+                break
+            self._remove(key)
@@ -0,0 +1,681 @@
+import asyncio
+import contextlib
+import gzip
+import http.client
+import json
+import random
+import ssl
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from blocking import block_classes, block_resources, unblock_resources
+from fingerprint import fingerprint_modules
+from modules_index import build_module_index, check_expectations, slug_expectations
+from payload import loads, parse_payload
+from spill import load_modules, pack_modules
+from timing import finish_timing, ms, new_timing
+
+# Motor de verificación de los sitios, independiente de la interfaz gráfica.
+# Los endpoints de la API son JSON plano, así que el motor por defecto hace una
+# petición HTTP por slug sobre conexiones keep-alive reutilizadas. Playwright
+# solo se importa cuando algún sitio usa ese motor.
+
+DEFAULT_CONCURRENCY = 6
+DEFAULT_TIMEOUT = 15  # segundos por petición
+MAX_REDIRECTS = 5
+USER_AGENT = "CheckFront/1.0"
+GATE_TTL = 600  # segundos que se reutilizan las cookies obtenidas de la URL base
+
+# Fallas transitorias: se reintentan hasta DEFAULT_RETRIES veces con espera exponencial
+# (RETRY_BACKOFF, 2x, 4x..., con jitter). Si un host acumula BREAKER_THRESHOLD fallas seguidas,
+# el resto de sus slugs se marca como SKIPPED sin esperar el timeout de cada uno.
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 0.5  # segundos
+TRANSIENT_STATUSES = (429, 502, 503, 504)
+TRANSIENT_ERRORS = (OSError, asyncio.TimeoutError, http.client.HTTPException)
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30  # segundos antes de dejar pasar una petición de prueba
+STATUS_SKIPPED = "SKIPPED"
+
+# Motores disponibles. "playwright" se usa cuando el endpoint necesita cookies o JS del navegador.
+ENGINE_HTTP = "http"
+ENGINE_PLAYWRIGHT = "playwright"
+DEFAULT_ENGINE = ENGINE_HTTP
+
+CONFIG_PATH = "sites_config.json"
+
+# Códigos de salida de los modos de consola
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_USAGE = 2
+
+
+def load_config(path=CONFIG_PATH):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"Archivo {path} no encontrado", file=sys.stderr)
+        return None
+    except json.JSONDecodeError:
+        print("Error en formato JSON", file=sys.stderr)
+        return None
+
+
+def select_sites(config, names, all_=False):
+    #{sitio: configuración} pedidos en la línea de comandos (todos con all_), o None si
+    #falta alguno o no se pidió ninguno; el motivo va a stderr
+    if all_:
+        return dict(config)
+    unknown = [site for site in names if site not in config]
+    if unknown or not names:
+        print(f"Sitios no encontrados: {', '.join(unknown)}" if unknown
+              else "Indique uno o más sitios, o --all", file=sys.stderr)
+        return None
+    return {site: config[site] for site in names}
+
+
+def emit(record, out=None):
+    #Una línea en stdout para los modos de consola: texto ya serializado o un registro
+    #que se escribe como JSON. stdout se busca al escribir (puede haberse redirigido).
+    out = out or sys.stdout
+    out.write((record if isinstance(record, str) else json.dumps(record, ensure_ascii=False)) + "\n")
+    out.flush()
+
+
+def build_result(name, slug, status, api_data):
+    #Arma el diccionario de resultado a partir del JSON de la API.
+    #Es el mismo formato para todos los motores y para la exportación.
+    data = api_data.get("data", {})
+    return summary_result(name, slug, status, api_data.get("type"), data.get("section"), data.get("modules", []))
+
+
+def build_result_from_body(name, slug, status, body):
+    #Igual que build_result, pero desde los bytes de la respuesta: solo se leen los campos
+    #del resumen y los módulos quedan también como bytes (modules_raw) para el spill y la caché
+    api_type, section, modules, modules_raw = parse_payload(body)
+    result = summary_result(name, slug, status, api_type, section, modules)
+    result["modules_raw"] = modules_raw
+    return result
+
+
+def summary_result(name, slug, status, api_type, section, modules):
+    modules_count = len(modules)
+    fingerprint, module_hashes = fingerprint_modules(modules)
+    return {
+        "name": name,
+        "slug": slug,
+        "status": status,
+        "type": api_type,
+        "section": section,
+        "modules": modules_count,
+        "modules_ok": "Existen Modulos" if modules_count > 0 else "No",
+        "module_index": build_module_index(modules),
+        "fingerprint": fingerprint,
+        "module_hashes": module_hashes,
+        "modules_list": modules  # Guardamos la lista completa
+    }
+
+
+def finish_result(result, site_config):
+    #Revisa las expectativas del slug ("expectations" en sites_config.json) contra el índice
+    if "module_index" not in result:
+        # Entradas de caché anteriores al índice
+        result["module_index"] = build_module_index(load_modules(result))
+    if "fingerprint" not in result:
+        result["fingerprint"], result["module_hashes"] = fingerprint_modules(load_modules(result))
+    expected = slug_expectations(site_config, result["name"])
+    failures = check_expectations(result["module_index"], expected) if expected else []
+    result["expectations"] = ("FALLA" if failures else "OK") if expected else "N/A"
+    result["expectation_failures"] = failures
+    return result
+
+
+def result_ok(result):
+    #Un slug pasa si respondió 200, trae módulos, cumple sus expectativas
+    #y (si se revisaron) no tiene enlaces rotos
+    return (
+        result["status"] == 200
+        and result["modules_ok"] == "Existen Modulos"
+        and not result.get("expectation_failures")
+        and not result.get("broken_links")
+    )
+
+
+def error_result(name, slug, status):
+    #Resultado para un slug que falló (petición o JSON inválido)
+    return {
+        "name": name,
+        "slug": slug,
+        "status": status,
+        "type": "N/A",
+        "section": "N/A",
+        "modules": 0,
+        "modules_ok": "ERROR",
+        "module_index": build_module_index([]),
+        "modules_list": []
+    }
+
+
+def skipped_result(name, slug):
+    #Slug que no se probó porque el circuito de su host está abierto
+    return error_result(name, slug, STATUS_SKIPPED)
+
+
+def host_failed(status):
+    #Respuestas que cuentan como falla del host para el circuito (un 404 no cuenta)
+    return not isinstance(status, int) or status >= 500 or status == 429
+
+
+async def retry_wait(attempt):
+    await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+class CircuitOpenError(Exception):
+    #El circuito del host está abierto: la petición no se mandó
+    pass
+
+
+class BaseUrlError(Exception):
+    #No se pudo cargar la URL base del sitio (motor Playwright)
+    pass
+
+
+def host_key(url):
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    return (parts.scheme, parts.hostname, port)
+
+
+class CircuitBreaker:
+    #Circuito por host: tras threshold fallas seguidas se abre y allow() regresa False,
+    #así los slugs pendientes de ese host se omiten de inmediato. Después de cooldown
+    #segundos deja pasar una petición de prueba; un éxito lo vuelve a cerrar.
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = {}  # host -> fallas seguidas
+        self._opened = {}  # host -> momento en que se abrió
+
+    def is_open(self, url):
+        return host_key(url) in self._opened
+
+    def allow(self, url):
+        key = host_key(url)
+        opened = self._opened.get(key)
+        if opened is None:
+            return True
+        if time.monotonic() - opened >= self.cooldown:
+            self._opened[key] = time.monotonic()  # una sola petición de prueba por cooldown
+            return True
+        return False
+
+    def record(self, url, ok):
+        key = host_key(url)
+        if ok:
+            self._failures.pop(key, None)
+            self._opened.pop(key, None)
+            return
+        failures = self._failures.get(key, 0) + 1
+        self._failures[key] = failures
+        if failures >= self.threshold and key not in self._opened:
+            print(f"Circuito abierto para {key[1]}: {failures} fallas seguidas", file=sys.stderr)
+            self._opened[key] = time.monotonic()
+
+
+class HostLimits:
+    #Un semáforo por host para limitar las peticiones simultáneas a cada servidor,
+    #aunque varios sitios compartan el mismo host de API.
+    def __init__(self, max_per_host=DEFAULT_CONCURRENCY):
+        self.max_per_host = max_per_host
+        self._limits = {}
+
+    def key(self, url):
+        return host_key(url)
+
+    def limit(self, url):
+        key = self.key(url)
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = self._limits[key] = asyncio.Semaphore(self.max_per_host)
+        return limit
+
+
+class HttpResponse:
+    def __init__(self, url, status, headers, body, timing=None):
+        self.url = url
+        self.status = status
+        self.headers = headers  # llaves en minúsculas
+        self.body = body
+        self.timing = timing or new_timing()  # fases de la petición (ver timing.py)
+
+    def json(self):
+        return loads(self.body)
+
+
+class HttpClient:
+    #Cliente HTTP asíncrono con un pool de conexiones keep-alive por host.
+    #Las peticiones bloqueantes de http.client corren en un pool de hilos y
+    #cada host tiene su propio límite de peticiones simultáneas.
+    def __init__(self, max_per_host=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, max_workers=None):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_workers = max_workers or max_per_host
+        self._idle = {}  # (scheme, host, port) -> conexiones libres
+        self._lock = threading.Lock()
+        self.limits = HostLimits(max_per_host)
+        self._ssl_context = ssl.create_default_context()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="checkfront-http"
+        )
+
+    async def get(self, url, headers=None, deadline=None, breaker=None, method="GET"):
+        #deadline: segundos máximos para la petición completa (redirecciones incluidas),
+        #sin contar la espera por un lugar en el límite del host.
+        #breaker se consulta ya con el lugar asignado: si el host se cayó mientras la
+        #petición esperaba turno, no se manda.
+        async with self.limits.limit(url):
+            if breaker and not breaker.allow(url):
+                raise CircuitOpenError(url)
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, self._request, url, headers, MAX_REDIRECTS, None, deadline,
+                                          method)
+            if deadline is None:
+                return await future
+            return await asyncio.wait_for(future, deadline)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+        self._executor.shutdown(wait=False)
+
+    def _acquire(self, key):
+        # Regresa (conexión, reutilizada)
+        with self._lock:
+            connections = self._idle.get(key)
+            if connections:
+                return connections.pop(), True
+        scheme, host, port = key
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self._ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        return conn, False
+
+    def _release(self, key, conn):
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self.max_per_host:
+                connections.append(conn)
+                return
+        conn.close()
+
+    def _request(self, url, headers=None, redirects=MAX_REDIRECTS, timing=None, deadline=None, method="GET"):
+        # El hilo tampoco se queda bloqueado más que el límite de la petición
+        socket_timeout = min(self.timeout, deadline) if deadline else self.timeout
+        if timing is None:
+            timing = new_timing()
+        parts = urlsplit(url)
+        key = self.limits.key(url)
+        path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        request_headers = {
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip",
+            "User-Agent": USER_AGENT,
+        }
+        if headers:
+            request_headers.update(headers)
+
+        while True:
+            conn, reused = self._acquire(key)
+            if reused:
+                conn.sock.settimeout(socket_timeout)
+            else:
+                conn.timeout = socket_timeout
+            try:
+                start = time.perf_counter()
+                if not reused:
+                    conn.connect()
+                connected = time.perf_counter()
+                conn.request(method, path, headers=request_headers)
+                response = conn.getresponse()
+                first_byte = time.perf_counter()
+                body = response.read()
+            except (ConnectionError, http.client.BadStatusLine):
+                # El servidor pudo cerrar una conexión keep-alive inactiva:
+                # se reintenta una vez con una conexión nueva
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            break
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+        timing["bytes"] += len(body)
+        response_headers = {k.lower(): v for k, v in response.getheaders()}
+        if body and response_headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        timing["connect_ms"] = round(timing["connect_ms"] + ms(connected - start), 1)
+        timing["ttfb_ms"] = round(timing["ttfb_ms"] + ms(first_byte - connected), 1)
+        timing["download_ms"] = round(timing["download_ms"] + ms(time.perf_counter() - first_byte), 1)
+
+        location = response_headers.get("location")
+        if response.status in (301, 302, 303, 307, 308) and location and redirects > 0:
+            return self._request(urljoin(url, location), headers, redirects - 1, timing, deadline, method)
+
+        return HttpResponse(url, response.status, response_headers, body, timing)
+
+
+async def check_slug_http(client, site_config, name, slug, cache=None, retries=DEFAULT_RETRIES, breaker=None,
+                          conditional=True):
+    # Construir la URL de la API
+    api_url = site_config['api_base'] + slug
+    # "timeout" en la configuración del sitio cambia el límite de tiempo por petición
+    deadline = site_config.get("timeout", client.timeout)
+    attempt = 0
+    while True:
+        try:
+            # Con caché se manda una petición condicional (ETag / Last-Modified)
+            headers = cache.validators(api_url) if cache and conditional else None
+            response = await client.get(api_url, headers, deadline, breaker)
+        except CircuitOpenError:
+            if attempt == 0:
+                return skipped_result(name, slug)
+            print(f"Error en {name}: circuito abierto tras {attempt} intentos", file=sys.stderr)
+            return error_result(name, slug, "ERROR")
+        except Exception as e:
+            # Cada intento fallido cuenta para el circuito, así un host caído se detecta
+            # con la primera tanda de peticiones y no después de todos los reintentos
+            if breaker:
+                breaker.record(api_url, False)
+            # Con el circuito abierto ya no se reintenta
+            if isinstance(e, TRANSIENT_ERRORS) and attempt < retries and not (breaker and breaker.is_open(api_url)):
+                await retry_wait(attempt)
+                attempt += 1
+                continue
+            print(f"Error en {name}: {type(e).__name__} {e}", file=sys.stderr)
+            return error_result(name, slug, "ERROR")
+        if breaker:
+            breaker.record(api_url, not host_failed(response.status))
+        if response.status in TRANSIENT_STATUSES and attempt < retries and not (breaker and breaker.is_open(api_url)):
+            await retry_wait(attempt)
+            attempt += 1
+            continue
+        break
+
+    if cache:
+        # 304 o cuerpo idéntico al guardado: se reutiliza el resultado sin parsear
+        cached = cache.lookup(api_url, response)
+        if cached:
+            result = {"name": name, "slug": slug}
+            result.update(cached)
+            result["timing"] = finish_timing(response.timing)
+            return result
+        if response.status == 304 and conditional:
+            # La entrada se borró después de mandar la petición condicional (la desalojó otro
+            # slug u otro proceso que comparte la caché): se pide una vez más sin validadores
+            return await check_slug_http(client, site_config, name, slug, cache, retries, breaker, conditional=False)
+
+    start = time.perf_counter()
+    try:
+        result = build_result_from_body(name, slug, response.status, response.body)
+    except Exception as e:
+        print(f"Error procesando JSON en {name}: {e}", file=sys.stderr)
+        result = error_result(name, slug, response.status)
+        result["timing"] = finish_timing(response.timing, time.perf_counter() - start)
+        return result
+    result["timing"] = finish_timing(response.timing, time.perf_counter() - start)
+    if cache and response.status == 200:
+        # Los mismos bytes de los módulos van después al archivo de la ejecución (spill)
+        cache.store(api_url, response, result, result["modules_raw"])
+    return result
+
+
+async def check_site_http(site_config, on_result=None, concurrency=DEFAULT_CONCURRENCY, client=None, timeout=DEFAULT_TIMEOUT, cache=None,
+                          spill=None, retries=DEFAULT_RETRIES, breaker=None, links=None):
+    #Prueba todos los slugs de un sitio con el motor HTTP.
+    #on_result(result, index) se llama en cuanto termina cada slug;
+    #la lista regresada conserva el orden de sites_config.json.
+    #breaker (CircuitBreaker) puede compartirse entre sitios del mismo host.
+    slugs = list(site_config['slugs'].items())
+    ordered = [None] * len(slugs)
+    own_client = client is None
+    if own_client:
+        client = HttpClient(max_per_host=concurrency, timeout=timeout)
+
+    async def worker(index, name, slug):
+        result = finish_result(
+            await check_slug_http(client, site_config, name, slug, cache, retries, breaker),
+            site_config
+        )
+        if links:
+            await links.check_result(result, site_config)
+        result = pack_modules(result, spill)
+        ordered[index] = result
+        if on_result:
+            on_result(result, index)
+
+    try:
+        await asyncio.gather(*(
+            worker(index, name, slug)
+            for index, (name, slug) in enumerate(slugs)
+        ))
+    finally:
+        if own_client:
+            client.close()
+    return ordered
+
+
+def playwright_timing(request_timing, size):
+    #Fases a partir de request.timing de Playwright (ms relativos a startTime, -1 si no aplica)
+    def span(begin, end):
+        begin, end = request_timing.get(begin, -1), request_timing.get(end, -1)
+        return round(end - begin, 1) if begin >= 0 and end >= begin else 0
+
+    timing = new_timing()
+    timing["connect_ms"] = span("connectStart", "connectEnd")
+    timing["ttfb_ms"] = span("requestStart", "responseStart")
+    timing["download_ms"] = span("responseStart", "responseEnd")
+    timing["bytes"] = size
+    return timing
+
+
+async def check_slug_playwright(page, site_config, name, slug, retries=DEFAULT_RETRIES, breaker=None):
+    # Construir la URL de la API
+    api_url = site_config['api_base'] + slug
+    try:
+        # Capturar respuesta de la API; los errores del navegador (timeouts, conexión) y
+        # las respuestas transitorias se reintentan
+        if breaker and not breaker.allow(api_url):
+            return skipped_result(name, slug)
+        attempt = 0
+        while True:
+            try:
+                async with page.expect_response(api_url) as response_info:
+                    await page.goto(api_url)
+                response = await response_info.value
+            except Exception:
+                if breaker:
+                    breaker.record(api_url, False)
+                if attempt < retries and not (breaker and breaker.is_open(api_url)):
+                    await retry_wait(attempt)
+                    attempt += 1
+                    continue
+                raise
+            if breaker:
+                breaker.record(api_url, not host_failed(response.status))
+            if response.status in TRANSIENT_STATUSES and attempt < retries and not (breaker and breaker.is_open(api_url)):
+                await retry_wait(attempt)
+                attempt += 1
+                continue
+            break
+        
+        status = response.status
+        body = await response.body()
+        
+        start = time.perf_counter()
+        try:
+            result = build_result_from_body(name, slug, status, body)
+        except Exception as e:
+            print(f"Error procesando JSON en {name}: {e}", file=sys.stderr)
+            result = error_result(name, slug, status)
+        result["timing"] = finish_timing(playwright_timing(response.request.timing, len(body)),
+                                         time.perf_counter() - start)
+        return result
+    
+    except Exception as e:
+        print(f"Error en {name}: {e}", file=sys.stderr)
+        return error_result(name, slug, "ERROR")
+
+
+async def check_site_playwright(browser, site_config, on_result=None, concurrency=DEFAULT_CONCURRENCY, limits=None, timeout=DEFAULT_TIMEOUT,
+                                gate_states=None, spill=None, retries=DEFAULT_RETRIES, breaker=None, links=None):
+    #Prueba los slugs de un sitio con Playwright, en un contexto aislado del navegador.
+    #Primero carga la URL base (cookies/JS) y luego reparte los slugs en un pool de páginas.
+    #gate_states ({base_url: (expira, storage_state)}) permite reutilizar las cookies
+    #de una carga reciente de la URL base en lugar de volver a cargarla.
+    slugs = list(site_config['slugs'].items())
+    ordered = [None] * len(slugs)
+    limits = limits or HostLimits(concurrency)
+    base_url = site_config['base_url']
+    cached = gate_states.get(base_url) if gate_states is not None else None
+    if cached and cached[0] > time.monotonic():
+        context = await browser.new_context(storage_state=cached[1])
+    else:
+        cached = None
+        context = await browser.new_context()
+    context.set_default_timeout(site_config.get("timeout", timeout) * 1000)
+    try:
+        page = await context.new_page()
+        if not cached:
+            # De la URL base solo importan sus cookies y su JS: anuncios, analítica y medios
+            # se bloquean ("block" en la configuración del sitio)
+            await block_resources(page, block_classes(site_config))
+            # Navega a la URL base del sitio; con el límite de tiempo y los reintentos de los slugs
+            for attempt in range(retries + 1):
+                try:
+                    await page.goto(base_url)
+                    break
+                except Exception as e:
+                    if attempt == retries:
+                        raise BaseUrlError(f"No se pudo acceder a {base_url}: {e}") from e
+                    await retry_wait(attempt)
+            # La página queda en el pool para los slugs: sin ruteo, las peticiones a la API van directo
+            await unblock_resources(page)
+            if gate_states is not None:
+                gate_states[base_url] = (time.monotonic() + GATE_TTL, await context.storage_state())
+        
+        # Pool de páginas: todas comparten el contexto (y las cookies) de la URL base.
+        # El tamaño del pool es el límite de slugs que se prueban al mismo tiempo.
+        pages = asyncio.Queue()
+        pages.put_nowait(page)
+        for _ in range(min(concurrency, len(slugs)) - 1):
+            pages.put_nowait(await context.new_page())
+        
+        async def worker(index, name, slug):
+            worker_page = await pages.get()
+            try:
+                async with limits.limit(site_config['api_base'] + slug):
+                    result = finish_result(
+                        await check_slug_playwright(worker_page, site_config, name, slug, retries, breaker),
+                        site_config
+                    )
+            finally:
+                pages.put_nowait(worker_page)
+            # Los enlaces se revisan con la página ya libre para el siguiente slug
+            if links:
+                await links.check_result(result, site_config)
+            result = pack_modules(result, spill)
+            ordered[index] = result
+            if on_result:
+                on_result(result, index)
+        
+        await asyncio.gather(*(
+            worker(index, name, slug)
+            for index, (name, slug) in enumerate(slugs)
+        ))
+    finally:
+        await context.close()
+    return ordered
+
+
+async def check_sites(sites, on_result=None, concurrency=DEFAULT_CONCURRENCY, engine=DEFAULT_ENGINE, timeout=DEFAULT_TIMEOUT,
+                      client=None, get_browser=None, gate_states=None, cache=None, spill=None, retries=DEFAULT_RETRIES,
+                      breaker_threshold=BREAKER_THRESHOLD, links=None):
+    #Prueba varios sitios a la vez. sites es {nombre: configuración}.
+    #Todos comparten un solo cliente HTTP (o un solo navegador, con un contexto por sitio)
+    #y el límite de concurrencia se aplica por host.
+    #on_result(site, result, index) se llama en cuanto termina cada slug.
+    #client y get_browser (corrutina que regresa un navegador) permiten reutilizar
+    #recursos ya abiertos; si no se dan, se crean y se cierran en esta llamada.
+    #cache (cache.ResponseCache) activa las peticiones condicionales del motor HTTP.
+    #spill (spill.SpillStore) guarda los módulos en disco en lugar de dejarlos en memoria.
+    #retries reintenta fallas transitorias; con breaker_threshold fallas seguidas de un host,
+    #sus slugs pendientes se marcan SKIPPED (0 desactiva el circuito). El circuito es por
+    #ejecución: la siguiente vuelve a intentar el host.
+    #links (linkcheck.LinkChecker) revisa las URLs de los módulos de cada slug.
+    #Regresa ({sitio: resultados en orden}, {sitio: excepción})
+    engines = {site: config.get("engine", engine) for site, config in sites.items()}
+    breaker = CircuitBreaker(breaker_threshold) if breaker_threshold > 0 else None
+    results = {}
+    errors = {}
+
+    async with contextlib.AsyncExitStack() as stack:
+        if ENGINE_HTTP in engines.values() and client is None:
+            http_sites = sum(1 for e in engines.values() if e == ENGINE_HTTP)
+            client = HttpClient(max_per_host=concurrency, timeout=timeout, max_workers=concurrency * http_sites)
+            stack.callback(client.close)
+        limits = client.limits if client else HostLimits(concurrency)
+
+        browser = None
+        browser_error = None
+        if ENGINE_PLAYWRIGHT in engines.values():
+            # Si el navegador no arranca solo fallan los sitios que lo necesitan
+            try:
+                if get_browser:
+                    browser = await get_browser()
+                else:
+                    from playwright.async_api import async_playwright
+                    playwright = await stack.enter_async_context(async_playwright())
+                    browser = await playwright.chromium.launch(headless=True)
+                    stack.push_async_callback(browser.close)
+            except Exception as e:
+                browser_error = e
+
+        async def run(site, config):
+            callback = None
+            if on_result:
+                callback = lambda result, index: on_result(site, result, index)
+            try:
+                if engines[site] == ENGINE_PLAYWRIGHT:
+                    if browser is None:
+                        raise browser_error
+                    ordered = await check_site_playwright(browser, config, callback, concurrency, limits, timeout,
+                                                          gate_states, spill, retries, breaker, links)
+                else:
+                    ordered = await check_site_http(config, callback, concurrency, client, timeout, cache, spill,
+                                                    retries, breaker, links)
+                results[site] = [r for r in ordered if r is not None]
+            except Exception as e:
+                print(f"Error general en {site}: {e}", file=sys.stderr)
+                errors[site] = e
+
+        await asyncio.gather(*(run(site, config) for site, config in sites.items()))
+
+    # Mismo orden de sitios que la configuración
+    results = {site: results[site] for site in sites if site in results}
+    return results, errors
@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import sqlite3
+import sys
+
+from cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_BYTES, ResponseCache
+from checker import (
+    BREAKER_THRESHOLD,
+    CONFIG_PATH,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_ENGINE,
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+    ENGINE_HTTP,
+    ENGINE_PLAYWRIGHT,
+    EXIT_FAILURES,
+    EXIT_OK,
+    EXIT_USAGE,
+    check_sites,
+    emit,
+    load_config,
+    result_ok,
+    select_sites,
+)
+from exporter import ResultWriter, encode_result, read_export, summarize
+from fingerprint import diff_runs, export_fingerprints, export_hashes, format_report
+from linkcheck import DEFAULT_LINK_CONCURRENCY, create_link_checker
+from results_store import DEFAULT_DB_PATH, DEFAULT_KEEP_RUNS, ResultsStore
+from spill import SpillStore
+
+# Modo sin interfaz gráfica (cron, CI): prueba los sitios y escribe un JSON por línea en stdout.
+# No importa tkinter, y Playwright solo se carga si algún sitio usa ese motor.
+#
+#   python cli.py "Milenio Stage2" "Revista Fama" --concurrency 8 --timeout 10
+#   python cli.py --all --output resultados.ndjson.gz --summary
+#   python cli.py --all --history   (guarda la ejecución en checkfront_history.db)
+#   python cli.py --all --links     (revisa también las URLs de los módulos, ver linkcheck.py)
+#   python cli.py --diff 12 15      (módulos que cambiaron entre dos ejecuciones del historial)
+#   python cli.py --diff anterior.json actual.json
+#   python cli.py --status 404      (resultados del historial con ese status, del más reciente)
+#
+# Código de salida: 0 si todo pasó, 1 si algún slug o sitio falló, 2 por error de uso/configuración.
+# Con --diff: 0 sin cambios, 1 si hay cambios. Con --status: 0 si no hay resultados, 1 si hay.
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Verificador de Sitios API (modo consola)")
+    parser.add_argument("sites", nargs="*", help="Nombres de sitios de la configuración")
+    parser.add_argument("--all", action="store_true", help="Probar todos los sitios")
+    parser.add_argument("--config", default=CONFIG_PATH, help="Archivo de configuración")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Peticiones simultáneas por host")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Segundos por petición")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Reintentos por fallas transitorias")
+    parser.add_argument("--breaker", type=int, default=BREAKER_THRESHOLD,
+                        help="Fallas seguidas de un host antes de omitir sus slugs (0 lo desactiva)")
+    parser.add_argument("--engine", choices=(ENGINE_HTTP, ENGINE_PLAYWRIGHT), default=DEFAULT_ENGINE)
+    parser.add_argument("--modules", action="store_true", help="Incluir modules_list en cada línea")
+    parser.add_argument("--output", help="Exportar también a un archivo (.json, .ndjson, .ndjson.gz)")
+    parser.add_argument("--summary", action="store_true", help="Exportar sin modules_list")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directorio de la caché de respuestas")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+                        help="Tamaño máximo de la caché en MB")
+    parser.add_argument("--no-cache", action="store_true", help="No usar la caché de respuestas")
+    parser.add_argument("--history", nargs="?", const=DEFAULT_DB_PATH,
+                        help=f"Guardar la ejecución en el historial SQLite (por defecto {DEFAULT_DB_PATH})")
+    parser.add_argument("--diff", nargs=2, metavar=("ANTERIOR", "ACTUAL"),
+                        help="Comparar dos ejecuciones (ids del historial o archivos exportados)")
+    parser.add_argument("--status", help="Listar del historial los resultados con ese status (p. ej. 404, ERROR)")
+    parser.add_argument("--run", type=int, help="Con --status, solo esa ejecución del historial")
+    parser.add_argument("--keep-runs", type=int, default=DEFAULT_KEEP_RUNS,
+                        help="Ejecuciones que conserva el historial")
+    parser.add_argument("--links", action="store_true", help="Revisar las URLs de imágenes y links de los módulos")
+    parser.add_argument("--link-concurrency", type=int, default=DEFAULT_LINK_CONCURRENCY,
+                        help="Revisiones de enlaces simultáneas")
+    return parser
+
+
+def load_fingerprints(ref, history_path):
+    #(huellas, cargador de árboles) de una ejecución del historial (id) o de un archivo exportado
+    if ref.isdigit():
+        store = ResultsStore(history_path)
+        return store.run_fingerprints(int(ref)), store.module_hashes
+    return export_fingerprints(read_export(ref)), export_hashes
+
+
+def run_diff(args):
+    history_path = args.history or DEFAULT_DB_PATH
+    try:
+        old, load_old = load_fingerprints(args.diff[0], history_path)
+        new, load_new = load_fingerprints(args.diff[1], history_path)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"No se pudo leer la ejecución: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if not old or not new:
+        print("Ejecución sin resultados", file=sys.stderr)
+        return EXIT_USAGE
+    lines = format_report(diff_runs(old, new, load_old, load_new))
+    for line in lines:
+        emit(line)
+    return EXIT_FAILURES if lines else EXIT_OK
+
+
+def run_status(args):
+    status = int(args.status) if args.status.isdigit() else args.status
+    try:
+        store = ResultsStore(args.history or DEFAULT_DB_PATH)
+        try:
+            found = store.status_results(status, args.run)
+        finally:
+            store.close()
+    except sqlite3.Error as e:
+        print(f"No se pudo leer el historial: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    for run_id, site, result in found:
+        record = summarize(result)
+        record["site"] = site
+        record["run"] = run_id
+        emit(record)
+    return EXIT_FAILURES if found else EXIT_OK
+
+
+def run(args):
+    if args.diff:
+        return run_diff(args)
+    if args.status:
+        return run_status(args)
+
+    config = load_config(args.config)
+    if not config:
+        return EXIT_USAGE
+
+    sites = select_sites(config, args.sites, args.all)
+    if sites is None:
+        return EXIT_USAGE
+
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = ResponseCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+        except OSError as e:
+            print(f"Caché deshabilitada: {e}", file=sys.stderr)
+
+    writer = None
+    if args.output:
+        try:
+            writer = ResultWriter(args.output, args.summary, sites=sites)
+        except OSError as e:
+            print(f"No se pudo abrir {args.output}: {e}", file=sys.stderr)
+            return EXIT_USAGE
+
+    store = run_id = None
+    if args.history:
+        try:
+            store = ResultsStore(args.history)
+            run_id = store.start_run(args.engine, sites)
+        except sqlite3.Error as e:
+            print(f"Historial deshabilitado: {e}", file=sys.stderr)
+            store = None
+
+    links = None
+    if args.links:
+        links = create_link_checker(None if args.no_cache else args.cache_dir, max(1, args.link_concurrency))
+
+    failures = 0
+
+    def on_result(site, result, index):
+        nonlocal failures
+        ok = result_ok(result)
+        if not ok:
+            failures += 1
+        if store:
+            store.add_result(run_id, site, index, result, ok)
+        if writer:
+            writer.write(result, site, index)
+        emit(encode_result(result, not args.modules, site))
+
+    # Los módulos de cada slug se guardan en un archivo temporal, no en memoria
+    spill = SpillStore()
+    try:
+        _, errors = asyncio.run(check_sites(
+            sites,
+            on_result,
+            concurrency=max(1, args.concurrency),
+            engine=args.engine,
+            timeout=args.timeout,
+            cache=cache,
+            spill=spill,
+            retries=max(0, args.retries),
+            breaker_threshold=max(0, args.breaker),
+            links=links
+        ))
+    finally:
+        if links:
+            links.close()
+        if writer:
+            writer.close()
+        if store:
+            store.finish_run(run_id)
+            store.prune(args.keep_runs)
+            store.close()
+        spill.close()
+    for site, error in errors.items():
+        emit({"site": site, "error": str(error)})
+
+    return EXIT_FAILURES if failures or errors else EXIT_OK
+
+
+def main(argv=None):
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import asyncio
+import sys
+import threading
+
+from checker import (
+    BREAKER_THRESHOLD,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_ENGINE,
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+    HttpClient,
+    check_sites,
+)
+from linkcheck import create_link_checker
+
+# Hilo de larga vida para la interfaz gráfica: un solo loop de asyncio, un cliente HTTP
+# con conexiones keep-alive y un navegador caliente que se reutilizan entre ejecuciones.
+# Cada ejecución recibe contextos nuevos del navegador, así que no comparte estado con la anterior.
+
+SHUTDOWN_TIMEOUT = 10  # segundos
+
+
+class CheckEngine:
+    def __init__(self, cache=None):
+        # cache: cache.ResponseCache opcional, compartido entre ejecuciones
+        self.loop = asyncio.new_event_loop()
+        self.cache = cache
+        self._playwright = None
+        self._browser = None
+        self._browser_lock = None
+        self._client = None
+        self._links = None
+        self._gate_states = {}  # base_url -> (expira, storage_state)
+        self._thread = threading.Thread(target=self._run_loop, name="checkfront-engine", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        self.loop.close()
+
+    def submit(self, coro):
+        #Programa una corrutina en el loop del motor; regresa un concurrent.futures.Future
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run_sites(self, sites, on_result=None, concurrency=DEFAULT_CONCURRENCY, engine=DEFAULT_ENGINE, timeout=DEFAULT_TIMEOUT,
+                  spill=None, retries=DEFAULT_RETRIES, breaker_threshold=BREAKER_THRESHOLD, check_links=False):
+        #Igual que checker.check_sites, pero con los recursos calientes del motor.
+        #check_links revisa las URLs de los módulos con un revisor que se conserva entre ejecuciones.
+        return self.submit(self._run_sites(sites, on_result, concurrency, engine, timeout, spill, retries,
+                                           breaker_threshold, check_links))
+
+    async def _run_sites(self, sites, on_result, concurrency, engine, timeout, spill, retries, breaker_threshold,
+                         check_links):
+        links = self._get_links() if check_links else None
+        try:
+            return await check_sites(
+                sites,
+                on_result,
+                concurrency=concurrency,
+                engine=engine,
+                timeout=timeout,
+                client=self._get_client(concurrency, timeout, len(sites)),
+                get_browser=self._get_browser,
+                gate_states=self._gate_states,
+                cache=self.cache,
+                spill=spill,
+                retries=retries,
+                breaker_threshold=breaker_threshold,
+                links=links
+            )
+        finally:
+            # La caché de enlaces se guarda al terminar cada ejecución
+            if links:
+                links.save()
+
+    def _get_client(self, concurrency, timeout, sites_count):
+        # Se conserva el cliente (y sus conexiones abiertas) mientras no cambien los parámetros
+        workers = concurrency * max(1, sites_count)
+        client = self._client
+        if client and client.max_per_host == concurrency and client.timeout == timeout and client.max_workers >= workers:
+            return client
+        if client:
+            client.close()
+        self._client = HttpClient(max_per_host=concurrency, timeout=timeout, max_workers=workers)
+        return self._client
+
+    def _get_links(self):
+        # La caché de enlaces va junto a la de respuestas; sin caché de respuestas, solo en memoria
+        if self._links is None:
+            self._links = create_link_checker(self.cache.directory if self.cache else None)
+        return self._links
+
+    async def _get_browser(self):
+        # Lanza Chromium la primera vez y lo vuelve a lanzar si se cerró o se cayó
+        if self._browser_lock is None:
+            self._browser_lock = asyncio.Lock()
+        async with self._browser_lock:
+            if self._browser and self._browser.is_connected():
+                return self._browser
+            self._browser = None
+            self._gate_states.clear()
+            if self._playwright is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+            try:
+                browser = await self._playwright.chromium.launch(headless=True)
+            except Exception:
+                # El driver de Playwright pudo morir junto con el navegador: se reinicia completo
+                await self._stop_playwright()
+                raise
+            browser.on("disconnected", lambda _: self._on_browser_disconnected(browser))
+            self._browser = browser
+            return browser
+
+    def _on_browser_disconnected(self, browser):
+        if self._browser is browser:
+            print("El navegador se cerró; se relanzará en la siguiente ejecución", file=sys.stderr)
+            self._browser = None
+
+    async def _stop_playwright(self):
+        playwright, self._playwright = self._playwright, None
+        if playwright:
+            try:
+                await playwright.stop()
+            except Exception as e:
+                print(f"Error cerrando Playwright: {e}", file=sys.stderr)
+
+    async def _close(self):
+        browser, self._browser = self._browser, None
+        if browser:
+            try:
+                await browser.close()
+            except Exception as e:
+                print(f"Error cerrando el navegador: {e}", file=sys.stderr)
+        await self._stop_playwright()
+        if self._client:
+            self._client.close()
+            self._client = None
+        if self._links:
+            self._links.close()
+            self._links = None
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        #Cierra navegador y conexiones y detiene el hilo. Se llama al cerrar la ventana.
+        if not self._thread.is_alive():
+            return
+        try:
+            self.submit(self._close()).result(timeout)
+        except Exception as e:
+            print(f"Error al apagar el motor: {e}", file=sys.stderr)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
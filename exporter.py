@@ -0,0 +1,172 @@
+import gzip
+import json
+
+from spill import SpillStore, modules_json
+
+# Exportación de resultados por streaming: un registro compacto por slug, escrito en cuanto
+# llega, sin armar todo el documento en memoria ni llenarlo de espacios.
+#
+#   .json              arreglo JSON compacto (mismo esquema que test_results.json);
+#                      con varios sitios, {"sitio": [resultados]}
+#   .ndjson / .jsonl   un registro JSON por línea, con el campo "site"
+#   .gz                cualquiera de los anteriores comprimido con gzip (p. ej. .ndjson.gz)
+#
+# summary_only omite modules_list para guardar solo la fila de la tabla.
+# Si los módulos están en el archivo de la ejecución (spill) se copian como texto, sin parsearlos.
+# Las huellas por módulo (module_hashes) no se exportan: se recalculan desde modules_list.
+
+FORMAT_JSON = "json"
+FORMAT_NDJSON = "ndjson"
+
+DEFAULT_EXPORT_PATH = "test_results.json"
+MODULE_FIELDS = ("modules_list", "modules_ref", "modules_raw", "module_hashes")
+
+
+def detect_format(path):
+    #Regresa (formato, comprimido) según la extensión del archivo
+    name = path.lower()
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[:-3]
+    if name.endswith(".ndjson") or name.endswith(".jsonl"):
+        return FORMAT_NDJSON, compressed
+    return FORMAT_JSON, compressed
+
+
+def summarize(result):
+    return {k: v for k, v in result.items() if k not in MODULE_FIELDS}
+
+
+def encode(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_result(result, summary_only=False, site=None):
+    #Un resultado como JSON compacto; modules_list se agrega al final como texto ya serializado
+    record = summarize(result)
+    if site is not None:
+        record["site"] = site
+    text = encode(record)
+    if summary_only:
+        return text
+    return text[:-1] + ',"modules_list":' + modules_json(result) + "}"
+
+
+class ResultWriter:
+    #Escribe resultados uno por uno. Con NDJSON cada línea es independiente y se escribe
+    #en cuanto llega. Con JSON los registros se agrupan por sitio en un archivo temporal
+    #y el documento se arma en close(): una lista si hubo un solo sitio, o
+    #{"sitio": [resultados]} si hubo varios (el mismo esquema que export_results).
+    #En JSON los sitios van en el orden de sites y los resultados de cada sitio por su
+    #posición en la configuración (index), no en el orden en que terminaron.
+    def __init__(self, path, summary_only=False, fmt=None, compressed=None, sites=None):
+        detected_fmt, detected_compressed = detect_format(path)
+        self.path = path
+        self.fmt = fmt or detected_fmt
+        self.summary_only = summary_only
+        if compressed is None:
+            compressed = detected_compressed
+        if compressed:
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+        self.count = 0
+        self._spill = SpillStore() if self.fmt == FORMAT_JSON else None
+        self._sites = {site: [] for site in sites or ()}  # sitio -> [(posición, llegada, SpillRef)]
+
+    def write(self, result, site=None, index=None):
+        if self.fmt == FORMAT_JSON:
+            text = encode_result(result, self.summary_only)
+            position = self.count if index is None else index
+            self._sites.setdefault(site, []).append((position, self.count, self._spill.put(text.encode("utf-8"))))
+        else:
+            self._file.write(encode_result(result, self.summary_only, site) + "\n")
+            self._file.flush()  # visible para quien lee el archivo mientras corre la prueba
+        self.count += 1
+
+    def _write_records(self, entries):
+        self._file.write("[")
+        for index, (_, _, ref) in enumerate(sorted(entries, key=lambda entry: entry[:2])):
+            self._file.write(("\n" if index == 0 else ",\n") + ref.read().decode("utf-8"))
+        self._file.write("]")
+
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            if self.fmt == FORMAT_JSON:
+                sites = {site: entries for site, entries in self._sites.items() if entries}
+                if len(sites) <= 1:
+                    self._write_records(next(iter(sites.values()), []))
+                else:
+                    self._file.write("{")
+                    for index, (site, entries) in enumerate(sites.items()):
+                        self._file.write(("\n" if index == 0 else ",\n") + encode(site or "") + ":")
+                        self._write_records(entries)
+                    self._file.write("\n}")
+                self._file.write("\n")
+                self._spill.close()
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export_results(path, site_results, summary_only=False):
+    #Exporta una ejecución terminada ({sitio: resultados}).
+    #En JSON, un solo sitio se guarda como lista (formato original de test_results.json)
+    #y varios sitios como {"sitio": [resultados]}. En NDJSON cada línea lleva su sitio.
+    fmt, compressed = detect_format(path)
+    if fmt == FORMAT_NDJSON:
+        with ResultWriter(path, summary_only, fmt, compressed) as writer:
+            for site, results in site_results.items():
+                for result in results:
+                    writer.write(result, site)
+        return writer.count
+
+    if len(site_results) <= 1:
+        with ResultWriter(path, summary_only, fmt, compressed) as writer:
+            for results in site_results.values():
+                for result in results:
+                    writer.write(result)
+        return writer.count
+
+    opener = gzip.open if compressed else open
+    count = 0
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.write("{")
+        for site_index, (site, results) in enumerate(site_results.items()):
+            f.write(("\n" if site_index == 0 else ",\n") + encode(site) + ":[")
+            for index, result in enumerate(results):
+                f.write(("\n" if index == 0 else ",\n") + encode_result(result, summary_only))
+                count += 1
+            f.write("]")
+        f.write("\n}\n")
+    return count
+
+
+def read_export(path):
+    #Lee un archivo exportado como {sitio: resultados}. En una lista JSON cada registro
+    #va a su campo "site" (exportaciones en vivo anteriores) o, si no lo trae, al sitio "".
+    fmt, compressed = detect_format(path)
+    opener = gzip.open if compressed else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        if fmt == FORMAT_NDJSON:
+            records = (json.loads(line) for line in f if line.strip())
+            return group_records(record for record in records if "error" not in record)
+        data = json.load(f)
+    if isinstance(data, list):
+        return group_records(data)
+    return data
+
+
+def group_records(records):
+    #{sitio: resultados} a partir de registros con su campo "site"
+    site_results = {}
+    for record in records:
+        site_results.setdefault(record.pop("site", ""), []).append(record)
+    return site_results
@@ -0,0 +1,141 @@
+import hashlib
+
+from payload import dumps_sorted
+
+# Huellas de contenido del árbol de módulos, para comparar ejecuciones sin comparar árboles.
+# Cada módulo recibe dos hashes: el de su propio contenido (sin la lista "modules" anidada)
+# y el de su subárbol (su contenido más los subárboles de sus hijos), calculados de abajo
+# hacia arriba. Si el hash del subárbol de un contenedor es igual en las dos ejecuciones,
+# todo lo que cuelga de él es igual y no se revisa.
+#
+# result["fingerprint"]    hash de toda la lista de módulos del slug
+# result["module_hashes"]  [[llave, hash propio, hash del subárbol, [hijos...]], ...]
+#
+# La llave identifica al módulo entre sus hermanos: "id:<id>" si trae id, o "<tipo>#<n>".
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+HASH_SIZE = 8
+
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=HASH_SIZE).hexdigest()
+
+
+def module_key(module, seen):
+    mod_id = module.get("id")
+    if mod_id not in (None, ""):
+        base = f"id:{mod_id}"
+    else:
+        base = str(module.get("type") or "N/A")
+    n = seen.get(base, 0)
+    seen[base] = n + 1
+    if n == 0 and base.startswith("id:"):
+        return base
+    return f"{base}#{n}"
+
+
+def own_hash(module):
+    content = {k: v for k, v in module.items() if k != "modules"}
+    return digest(dumps_sorted(content))
+
+
+def fingerprint_modules(modules):
+    #Regresa (hash de la lista, nodos de primer nivel)
+    roots = []
+    order = []  # nodos en preorden; al recorrerla al revés los hijos van antes que su padre
+    pending = [(modules, roots)]
+    while pending:
+        siblings, out = pending.pop()
+        seen = {}
+        for module in siblings:
+            if not isinstance(module, dict):
+                continue
+            node = [module_key(module, seen), own_hash(module), None, []]
+            out.append(node)
+            order.append(node)
+            children = module.get("modules")
+            if isinstance(children, list) and children:
+                pending.append((children, node[3]))
+
+    for node in reversed(order):
+        node[2] = digest((node[1] + "".join(child[2] for child in node[3])).encode("ascii"))
+    return digest("".join(node[2] for node in roots).encode("ascii")), roots
+
+
+def diff_modules(old_nodes, new_nodes):
+    #Cambios entre dos árboles de huellas: [(cambio, ruta)], ruta como "id:12/lr_list_row#3"
+    changes = []
+    pending = [(old_nodes, new_nodes, "")]
+    while pending:
+        old_list, new_list, prefix = pending.pop()
+        old_by_key = {node[0]: node for node in old_list}
+        new_keys = set()
+        for node in new_list:
+            key = node[0]
+            new_keys.add(key)
+            old = old_by_key.get(key)
+            if old is None:
+                changes.append((ADDED, prefix + key))
+            elif old[2] != node[2]:
+                if old[1] != node[1]:
+                    changes.append((CHANGED, prefix + key))
+                pending.append((old[3], node[3], prefix + key + "/"))
+        for node in old_list:
+            if node[0] not in new_keys:
+                changes.append((REMOVED, prefix + node[0]))
+    changes.sort(key=lambda change: change[1])
+    return changes
+
+
+def diff_runs(old_fingerprints, new_fingerprints, load_hashes, load_new_hashes=None):
+    #Compara dos ejecuciones a partir de {(sitio, slug): (referencia, fingerprint)}.
+    #Solo los slugs con fingerprint distinto cargan su árbol con load_hashes(referencia)
+    #(load_new_hashes para la ejecución nueva, si viene de otra fuente).
+    #Regresa {sitio: {slug: [(cambio, ruta)]}}; un slug nuevo o que ya no está se reporta
+    #como un solo cambio con ruta "*".
+    load_new_hashes = load_new_hashes or load_hashes
+    report = {}
+    for key, (new_ref, new_fingerprint) in new_fingerprints.items():
+        site, slug = key
+        old = old_fingerprints.get(key)
+        if old is None:
+            changes = [(ADDED, "*")]
+        elif old[1] == new_fingerprint:
+            continue
+        else:
+            changes = diff_modules(load_hashes(old[0]), load_new_hashes(new_ref))
+        if changes:
+            report.setdefault(site, {})[slug] = changes
+    for key in old_fingerprints.keys() - new_fingerprints.keys():
+        site, slug = key
+        report.setdefault(site, {})[slug] = [(REMOVED, "*")]
+    return report
+
+
+def export_fingerprints(site_results):
+    #Huellas de resultados exportados ({sitio: resultados}); la referencia es modules_list.
+    #Usa el fingerprint del registro si lo trae y solo recalcula el árbol al comparar.
+    fingerprints = {}
+    for site, results in site_results.items():
+        for result in results:
+            modules = result.get("modules_list") or []
+            fingerprint = result.get("fingerprint") or fingerprint_modules(modules)[0]
+            fingerprints[(site, result.get("slug"))] = (modules, fingerprint)
+    return fingerprints
+
+
+def export_hashes(modules):
+    return fingerprint_modules(modules)[1]
+
+
+def format_report(report):
+    #Líneas de texto del reporte: "sitio slug cambio ruta"
+    lines = []
+    for site in sorted(report):
+        for slug in sorted(report[site]):
+            for change, path in report[site][slug]:
+                lines.append(f"{site}\t{slug}\t{change}\t{path}")
+    return lines
@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import sys
+import time
+from urllib.parse import urljoin
+
+from blocking import BLOCKED_ERROR, RESOURCE_CLASSES, block_classes, block_resources
+from checker import CONFIG_PATH, EXIT_FAILURES, EXIT_OK, EXIT_USAGE, emit, load_config, select_sites
+from timing import latency_summary
+
+# Modo front: visita con Playwright la URL base de cada sitio y las páginas del front que
+# corresponden a sus slugs (el mismo path que en la API, o "front_paths" en la configuración).
+#
+#   python frontend.py "Milenio Stage2"              (revisión rápida: bloquea anuncios, analítica y medios)
+#   python frontend.py --all --measure               (métricas de la página completa, sin bloquear nada)
+#   python frontend.py --all --measure --block ads   (métricas sin anuncios)
+#
+# La revisión rápida solo reporta status y tiempo de carga. Con --measure cada página reporta
+# navigation timing (dns, connect, ttfb, DOMContentLoaded, load), LCP y CLS, bytes transferidos
+# y peticiones por tipo de recurso (hechas, fallidas y bloqueadas).
+# Escribe un JSON por página y uno de resumen por sitio con p50/p95/max de load y LCP.
+#
+# Configuración opcional por sitio en sites_config.json:
+#   "front_paths": {"Home": "/", "Monterrey": "/monterrey", "Solo API": null}   (null: sin página)
+#   "block": ["ads", "analytics", "media"]   (clases que bloquea la revisión rápida)
+#
+# Playwright solo se importa al correr.
+
+DEFAULT_FRONT_CONCURRENCY = 2  # páginas abiertas a la vez por sitio
+DEFAULT_FRONT_TIMEOUT = 30  # segundos por página
+SETTLE_MS = 1000  # espera tras "load" para que LCP y CLS terminen de reportarse
+BASE_NAME = "base_url"
+
+# Se instala antes de que cargue la página: LCP y CLS solo se pueden leer con PerformanceObserver
+VITALS_SCRIPT = """
+(() => {
+    const vitals = window.__checkfront = {lcp: null, cls: 0};
+    try {
+        new PerformanceObserver(list => {
+            for (const entry of list.getEntries()) vitals.lcp = entry.startTime;
+        }).observe({type: "largest-contentful-paint", buffered: true});
+        new PerformanceObserver(list => {
+            for (const entry of list.getEntries()) if (!entry.hadRecentInput) vitals.cls += entry.value;
+        }).observe({type: "layout-shift", buffered: true});
+    } catch (e) {}
+})();
+"""
+
+METRICS_SCRIPT = """
+() => {
+    const nav = performance.getEntriesByType("navigation")[0];
+    const vitals = window.__checkfront || {};
+    if (!nav) return {lcp: vitals.lcp, cls: vitals.cls};
+    return {
+        dns: nav.domainLookupEnd - nav.domainLookupStart,
+        connect: nav.connectEnd - nav.connectStart,
+        ttfb: nav.responseStart,
+        dom_content_loaded: nav.domContentLoadedEventEnd,
+        load: nav.loadEventEnd,
+        lcp: vitals.lcp,
+        cls: vitals.cls,
+    };
+}
+"""
+
+
+def front_pages(site_config):
+    #[(nombre, path)] a visitar: la URL base primero y luego un path por slug, sin repetir
+    front_paths = site_config.get("front_paths", {})
+    pages = {"/": BASE_NAME}
+    for name, slug in site_config["slugs"].items():
+        path = front_paths.get(name, slug)
+        if path is None:
+            continue
+        if path == "/" and pages["/"] == BASE_NAME:
+            pages["/"] = name
+        pages.setdefault(path, name)
+    return [(name, path) for path, name in pages.items()]
+
+
+def page_url(site_config, path):
+    return urljoin(site_config["base_url"].rstrip("/") + "/", path.lstrip("/"))
+
+
+def round_metrics(metrics):
+    timing = {}
+    for key in ("dns", "connect", "ttfb", "dom_content_loaded", "load", "lcp"):
+        value = metrics.get(key)
+        timing[f"{key}_ms"] = round(value, 1) if isinstance(value, (int, float)) else None
+    cls = metrics.get("cls")
+    timing["cls"] = round(cls, 4) if isinstance(cls, (int, float)) else None
+    return timing
+
+
+async def visit_page(context, site, site_config, name, path, measure=False, classes=(), timeout=DEFAULT_FRONT_TIMEOUT):
+    #Carga una página en su propia pestaña del contexto del sitio y regresa su registro
+    url = page_url(site_config, path)
+    record = {"site": site, "name": name, "path": path, "url": url}
+    requests = {}  # tipo de recurso -> peticiones
+    failed = 0
+    sizes = []
+    blocked = {}
+
+    def on_request(request):
+        requests[request.resource_type] = requests.get(request.resource_type, 0) + 1
+
+    def on_request_failed(request):
+        nonlocal failed
+        # Las bloqueadas también llegan aquí (net::ERR_BLOCKED_BY_CLIENT); se cuentan aparte
+        if BLOCKED_ERROR not in (request.failure or "").lower().replace("_", ""):
+            failed += 1
+
+    def on_request_finished(request):
+        sizes.append(asyncio.ensure_future(request.sizes()))
+
+    page = await context.new_page()
+    try:
+        page.set_default_timeout(timeout * 1000)
+        page.on("request", on_request)
+        page.on("requestfailed", on_request_failed)
+        if measure:
+            page.on("requestfinished", on_request_finished)
+            await page.add_init_script(VITALS_SCRIPT)
+        blocked = await block_resources(page, classes)
+
+        start = time.perf_counter()
+        response = await page.goto(url, wait_until="load")
+        record["status"] = response.status if response else None
+        record["seconds"] = round(time.perf_counter() - start, 3)
+        if measure:
+            await page.wait_for_timeout(SETTLE_MS)
+            record["timing"] = round_metrics(await page.evaluate(METRICS_SCRIPT))
+            transferred = 0
+            for size in await asyncio.gather(*sizes, return_exceptions=True):
+                if isinstance(size, dict):
+                    transferred += size.get("responseHeadersSize", 0) + size.get("responseBodySize", 0)
+            record["bytes"] = transferred
+    except Exception as e:
+        record["status"] = "ERROR"
+        record["error"] = f"{type(e).__name__} {e}"
+    finally:
+        for size in sizes:
+            size.cancel()
+        await page.close()
+
+    total_blocked = sum(blocked.values())
+    record["requests"] = sum(requests.values()) - total_blocked
+    record["failed"] = failed
+    record["blocked"] = blocked
+    record["by_type"] = requests
+    return record
+
+
+def page_ok(record):
+    return isinstance(record.get("status"), int) and record["status"] < 400
+
+
+def site_summary(site, records):
+    #Resumen del sitio: páginas, errores y p50/p95/max de load y LCP (ms)
+    summary = {"site": site, "summary": True, "pages": len(records), "errors": sum(1 for r in records if not page_ok(r))}
+    for key in ("load_ms", "lcp_ms"):
+        values = sorted(
+            r["timing"][key] for r in records
+            if page_ok(r) and r.get("timing") and r["timing"].get(key) is not None
+        )
+        if values:
+            summary[key] = latency_summary(values)
+    seconds = sorted(r["seconds"] for r in records if "seconds" in r)
+    if seconds:
+        summary["load_seconds"] = latency_summary(seconds)
+    if any("bytes" in r for r in records):
+        summary["bytes"] = sum(r.get("bytes", 0) for r in records)
+    return summary
+
+
+async def check_front(browser, site, site_config, measure=False, classes=None, concurrency=DEFAULT_FRONT_CONCURRENCY,
+                      timeout=DEFAULT_FRONT_TIMEOUT, on_page=None):
+    #Visita las páginas del front de un sitio en un contexto aislado. La URL base va primero
+    #(deja las cookies para las demás); el resto se reparte en concurrency pestañas.
+    #classes: clases a bloquear; None usa "block" del sitio en la revisión rápida y nada con measure.
+    if classes is None:
+        classes = () if measure else block_classes(site_config)
+    pages = front_pages(site_config)
+    records = [None] * len(pages)
+    slots = asyncio.Semaphore(concurrency)
+    context = await browser.new_context()
+    try:
+        async def visit(index, name, path):
+            async with slots:
+                record = await visit_page(context, site, site_config, name, path, measure, classes, timeout)
+            records[index] = record
+            if on_page:
+                on_page(record)
+
+        await visit(0, *pages[0])
+        await asyncio.gather(*(visit(index, name, path) for index, (name, path) in enumerate(pages) if index > 0))
+    finally:
+        await context.close()
+    return records
+
+
+async def run_front(sites, measure=False, classes=None, concurrency=DEFAULT_FRONT_CONCURRENCY,
+                    timeout=DEFAULT_FRONT_TIMEOUT, on_page=None):
+    #Todos los sitios a la vez con un solo navegador; regresa {sitio: registros}
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        try:
+            results = await asyncio.gather(*(
+                check_front(browser, site, config, measure, classes, concurrency, timeout, on_page)
+                for site, config in sites.items()
+            ))
+        finally:
+            await browser.close()
+    return dict(zip(sites, results))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Revisión y métricas del front de los sitios con Playwright")
+    parser.add_argument("sites", nargs="*", help="Nombres de sitios de la configuración")
+    parser.add_argument("--all", action="store_true", help="Revisar todos los sitios")
+    parser.add_argument("--config", default=CONFIG_PATH, help="Archivo de configuración")
+    parser.add_argument("--measure", action="store_true",
+                        help="Medir navigation timing, LCP/CLS, bytes y peticiones de cada página")
+    parser.add_argument("--block", nargs="*", choices=RESOURCE_CLASSES,
+                        help="Clases de recursos a bloquear (por defecto: \"block\" del sitio, o nada con --measure)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_FRONT_CONCURRENCY, help="Páginas a la vez por sitio")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_FRONT_TIMEOUT, help="Segundos por página")
+    return parser
+
+
+def run(args):
+    config = load_config(args.config)
+    if not config:
+        return EXIT_USAGE
+    sites = select_sites(config, args.sites, args.all)
+    if sites is None:
+        return EXIT_USAGE
+
+    started = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def on_page(record):
+        record["time"] = started
+        emit(record)
+
+    try:
+        results = asyncio.run(run_front(
+            sites,
+            measure=args.measure,
+            classes=tuple(args.block) if args.block is not None else None,
+            concurrency=max(1, args.concurrency),
+            timeout=args.timeout,
+            on_page=on_page
+        ))
+    except Exception as e:
+        # Playwright sin instalar o el navegador no arrancó
+        print(f"No se pudo abrir el navegador: {type(e).__name__} {e}", file=sys.stderr)
+        return EXIT_FAILURES
+
+    failures = 0
+    for site, records in results.items():
+        summary = site_summary(site, records)
+        summary["time"] = started
+        emit(summary)
+        failures += summary["errors"]
+    return EXIT_FAILURES if failures else EXIT_OK
+
+
+def main(argv=None):
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+from cache import DEFAULT_CACHE_DIR
+from checker import (
+    EXIT_FAILURES,
+    EXIT_OK,
+    EXIT_USAGE,
+    TRANSIENT_ERRORS,
+    TRANSIENT_STATUSES,
+    HttpClient,
+    emit,
+    retry_wait,
+)
+from exporter import read_export
+from spill import load_modules
+
+# Revisión de enlaces: las URLs de imágenes, links y medios que traen los módulos de cada slug
+# se revisan con HEAD (o GET de un solo byte si el servidor no acepta HEAD).
+#   - Cada URL se revisa una sola vez aunque aparezca en muchos slugs o sitios: las peticiones
+#     en curso se comparten y los resultados quedan en una caché con vencimiento (LinkCache),
+#     que se guarda en el directorio de la caché de respuestas para la siguiente ejecución.
+#   - Las peticiones simultáneas se limitan en total y por host.
+#   - Los enlaces rotos (status >= 400 o sin respuesta) se reportan por módulo:
+#     result["broken_links"] = [{"module": "3.0.2", "id", "type", "field": "image.src", "url", "status"}]
+#     y result["links"] = {"checked": URLs distintas del slug, "broken": enlaces rotos}.
+#
+#   python cli.py --all --links
+#   python linkcheck.py test_results.json   (enlaces de una exportación completa)
+
+DEFAULT_LINK_CONCURRENCY = 16
+DEFAULT_LINK_PER_HOST = 6
+DEFAULT_LINK_TIMEOUT = 10  # segundos por URL
+LINK_RETRIES = 1
+LINK_TTL = 60 * 60  # segundos que se reutiliza una URL que respondió bien
+BROKEN_TTL = 5 * 60  # las rotas se vuelven a revisar antes
+LINKS_FILE = "links.json"
+
+LINK_PREFIXES = ("http://", "https://", "//")
+# Campos cuyo valor puede ser una ruta relativa del front ("/politica/..."); se resuelven contra base_url
+RELATIVE_LINK_FIELDS = ("link",)
+# Servidores que no aceptan HEAD: se reintenta con GET de un byte
+HEAD_REFUSED = (403, 405, 501)
+
+
+def link_url(field, value, base_url):
+    #URL absoluta a revisar para un valor de un módulo, o None si no es un enlace
+    if not isinstance(value, str) or not value or any(c.isspace() for c in value):
+        return None
+    if value.startswith(LINK_PREFIXES):
+        return urljoin(base_url or "https:", value) if value.startswith("//") else value
+    if base_url and field in RELATIVE_LINK_FIELDS and value.startswith("/"):
+        return urljoin(base_url, value)
+    return None
+
+
+def extract_links(modules, base_url=None):
+    #[(ruta del módulo, id, tipo, campo, url)] de todo el árbol de módulos.
+    #La ruta del módulo es la misma de module_index ("3.0.2"); el campo es la ruta dentro
+    #del módulo ("image.src", "items.2.link"), sin entrar a sus módulos hijos.
+    links = []
+    stack = [(modules[i], str(i)) for i in range(len(modules) - 1, -1, -1)]
+    while stack:
+        module, path = stack.pop()
+        if not isinstance(module, dict):
+            continue
+        # Pila de (llave, ruta del campo, valor); al revés para reportar en el orden del módulo
+        fields = [(key, key, value) for key, value in reversed(module.items()) if key != "modules"]
+        while fields:
+            key, field, value = fields.pop()
+            if isinstance(value, dict):
+                fields.extend((k, f"{field}.{k}", v) for k, v in reversed(value.items()))
+            elif isinstance(value, list):
+                fields.extend((key, f"{field}.{i}", value[i]) for i in range(len(value) - 1, -1, -1))
+            else:
+                url = link_url(key, value, base_url)
+                if url:
+                    links.append((path, module.get("id"), module.get("type"), field, url))
+
+        children = module.get("modules")
+        if isinstance(children, list):
+            for i in range(len(children) - 1, -1, -1):
+                stack.append((children[i], f"{path}.{i}"))
+    return links
+
+
+def is_broken(status):
+    return not isinstance(status, int) or status >= 400
+
+
+class LinkCache:
+    #Status de cada URL revisada con el momento de la revisión: {url: [status, time.time()]}.
+    #Con path se carga al crearla y se guarda con save(); sin path vive solo en memoria.
+    def __init__(self, path=None, ttl=LINK_TTL, broken_ttl=BROKEN_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.broken_ttl = broken_ttl
+        self._entries = {}
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                print(f"Caché de enlaces ignorada: {e}", file=sys.stderr)
+
+    def _fresh(self, entry, now):
+        status, checked = entry
+        return now - checked < (self.broken_ttl if is_broken(status) else self.ttl)
+
+    def get(self, url):
+        entry = self._entries.get(url)
+        if entry is None or not self._fresh(entry, time.time()):
+            return None
+        return entry[0]
+
+    def put(self, url, status):
+        self._entries[url] = [status, time.time()]
+
+    def save(self):
+        #Escribe solo las entradas vigentes; primero a un temporal para no dejar el archivo a medias
+        if not self.path:
+            return
+        now = time.time()
+        entries = {url: entry for url, entry in self._entries.items() if self._fresh(entry, now)}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class LinkChecker:
+    #Revisa URLs con un cliente HTTP propio (los hosts de imágenes no son los de la API).
+    #Se puede compartir entre sitios y ejecuciones; close() guarda la caché.
+    def __init__(self, cache=None, concurrency=DEFAULT_LINK_CONCURRENCY, per_host=DEFAULT_LINK_PER_HOST,
+                 timeout=DEFAULT_LINK_TIMEOUT, client=None):
+        self.cache = cache if cache is not None else LinkCache()
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._own_client = client is None
+        self.client = client or HttpClient(max_per_host=min(per_host, concurrency), timeout=timeout,
+                                           max_workers=concurrency)
+        self._slots = None
+        self._pending = {}  # url -> tarea en curso, compartida por todos los slugs que la piden
+        self.requests = 0
+        self.cache_hits = 0
+        self.shared = 0
+
+    async def status(self, url):
+        cached = self.cache.get(url)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+        task = self._pending.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._check(url))
+            self._pending[url] = task
+            task.add_done_callback(lambda _: self._pending.pop(url, None))
+        else:
+            self.shared += 1
+        # shield: si un slug se cancela, la revisión sigue para los demás que la esperan
+        return await asyncio.shield(task)
+
+    async def _check(self, url):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        headers = {"Accept": "*/*", "Accept-Encoding": "identity"}
+        attempt = 0
+        async with self._slots:
+            while True:
+                try:
+                    self.requests += 1
+                    response = await self.client.get(url, headers, self.timeout, method="HEAD")
+                    if response.status in HEAD_REFUSED:
+                        self.requests += 1
+                        response = await self.client.get(url, dict(headers, Range="bytes=0-0"), self.timeout)
+                    status = response.status
+                except TRANSIENT_ERRORS:
+                    status = "ERROR"
+                except Exception as e:
+                    # URL mal formada, esquema no soportado, etc.
+                    print(f"Enlace inválido {url}: {type(e).__name__} {e}", file=sys.stderr)
+                    status = "ERROR"
+                if (status == "ERROR" or status in TRANSIENT_STATUSES) and attempt < LINK_RETRIES:
+                    await retry_wait(attempt)
+                    attempt += 1
+                    continue
+                break
+        self.cache.put(url, status)
+        return status
+
+    async def check_links(self, links):
+        #Revisa [(ruta, id, tipo, campo, url)]; regresa (URLs distintas, enlaces rotos)
+        urls = list(dict.fromkeys(link[4] for link in links))
+        statuses = dict(zip(urls, await asyncio.gather(*(self.status(url) for url in urls))))
+        broken = [
+            {"module": path, "id": mod_id, "type": mod_type, "field": field, "url": url, "status": statuses[url]}
+            for path, mod_id, mod_type, field, url in links
+            if is_broken(statuses[url])
+        ]
+        return len(urls), broken
+
+    async def check_result(self, result, site_config):
+        #Agrega "links" y "broken_links" a un resultado con módulos
+        if result["status"] != 200 or not result.get("modules"):
+            return result
+        links = extract_links(load_modules(result), site_config.get("base_url"))
+        checked, broken = await self.check_links(links)
+        result["links"] = {"checked": checked, "broken": len(broken)}
+        result["broken_links"] = broken
+        return result
+
+    def stats(self):
+        return {"requests": self.requests, "cache_hits": self.cache_hits, "shared": self.shared}
+
+    def save(self):
+        try:
+            self.cache.save()
+        except OSError as e:
+            print(f"No se pudo guardar la caché de enlaces: {e}", file=sys.stderr)
+
+    def close(self):
+        if self._own_client:
+            self.client.close()
+        self.save()
+
+
+def create_link_checker(cache_dir=DEFAULT_CACHE_DIR, concurrency=DEFAULT_LINK_CONCURRENCY):
+    #Revisor con la caché de enlaces en cache_dir (None: solo en memoria)
+    return LinkChecker(LinkCache(os.path.join(cache_dir, LINKS_FILE) if cache_dir else None), concurrency)
+
+
+def format_broken(broken_links):
+    #Una línea por enlace roto, para la interfaz
+    return [
+        f"{link['module']} {link['type'] or ''} {link['field']}: {link['status']} {link['url']}"
+        for link in broken_links
+    ]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Revisión de los enlaces de los módulos de una exportación")
+    parser.add_argument("export", help="Exportación completa (.json, .ndjson, .ndjson.gz) con modules_list")
+    parser.add_argument("--base-url", help="URL del front para resolver los links relativos")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_LINK_CONCURRENCY, help="Peticiones simultáneas")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directorio de la caché")
+    parser.add_argument("--no-cache", action="store_true", help="No leer ni guardar la caché de enlaces")
+    return parser
+
+
+async def check_export(site_results, checker, base_url=None, on_result=None):
+    #Revisa los enlaces de todos los slugs a la vez; regresa cuántos tienen enlaces rotos
+    site_config = {"base_url": base_url}
+    failures = 0
+
+    async def check(site, result):
+        nonlocal failures
+        await checker.check_result(result, site_config)
+        if result.get("broken_links"):
+            failures += 1
+        if on_result and "links" in result:
+            record = {"site": site} if site else {}
+            record.update({key: result[key] for key in ("name", "slug", "links", "broken_links")})
+            on_result(record)
+
+    await asyncio.gather(*(
+        check(site, result)
+        for site, results in site_results.items()
+        for result in results
+    ))
+    return failures
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        site_results = read_export(args.export)
+    except (OSError, ValueError) as e:
+        print(f"No se pudo leer {args.export}: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    checker = create_link_checker(None if args.no_cache else args.cache_dir, max(1, args.concurrency))
+    start = time.perf_counter()
+    try:
+        failures = asyncio.run(check_export(site_results, checker, args.base_url, emit))
+    finally:
+        checker.close()
+    summary = {"summary": True, "seconds": round(time.perf_counter() - start, 1), "slugs_with_broken_links": failures}
+    summary.update(checker.stats())
+    emit(summary)
+    return EXIT_FAILURES if failures else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
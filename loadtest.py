@@ -0,0 +1,214 @@
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+
+from checker import (
+    CONFIG_PATH,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_TIMEOUT,
+    EXIT_FAILURES,
+    EXIT_OK,
+    EXIT_USAGE,
+    HttpClient,
+    emit,
+    load_config,
+)
+from timing import LatencyHistogram
+
+# Modo de carga: repite los slugs de un sitio contra su API durante un tiempo fijo y reporta
+# throughput, tasa de errores y p50/p95/p99 por intervalo. Usa el mismo cliente HTTP del
+# verificador (conexiones keep-alive, límite por host) y no parsea el JSON.
+#
+#   python loadtest.py "Milenio Stage2" --duration 60 --concurrency 20
+#   python loadtest.py "Milenio Stage2" --duration 60 --rate 50 --interval 5
+#
+# Con --concurrency, cada trabajador manda una petición en cuanto termina la anterior.
+# Con --rate, las peticiones salen a ritmo fijo sin esperar respuestas (la latencia incluye
+# la espera por un lugar libre); si hay más de MAX_PENDING_FACTOR * concurrencia pendientes,
+# la petición se descarta y se cuenta como "dropped".
+# Las latencias van a histogramas de memoria constante, nunca a una lista de muestras.
+# Escribe un JSON por intervalo en stdout y al final uno con "summary": true.
+
+DEFAULT_DURATION = 30  # segundos
+DEFAULT_INTERVAL = 1  # segundos
+LOAD_PERCENTILES = (50, 95, 99)
+MAX_PENDING_FACTOR = 10
+# Un intervalo más corto que esta fracción de --interval (el resto de la prueba tras el último
+# reporte) no se reporta solo: su rps saldría de un denominador casi cero. Cuenta en el resumen.
+MIN_INTERVAL_FRACTION = 0.5
+
+
+class LoadStats:
+    #Conteos y latencias del intervalo actual y de toda la prueba
+    def __init__(self):
+        self.started = time.monotonic()
+        self.total = LatencyHistogram()
+        self.statuses = {}
+        self.errors = 0
+        self.dropped = 0
+        self._reset_interval()
+
+    def _reset_interval(self):
+        self.interval = LatencyHistogram()
+        self.interval_errors = 0
+        self.interval_started = time.monotonic()
+
+    def record(self, status, latency_ms):
+        self.interval.record(latency_ms)
+        key = str(status)
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        if status != 200:
+            self.errors += 1
+            self.interval_errors += 1
+
+    def report(self, histogram, errors, seconds):
+        report = {
+            "requests": histogram.count,
+            "rps": round(histogram.count / seconds, 1) if seconds > 0 else 0,
+            "errors": errors,
+            "error_rate": round(errors / histogram.count, 4) if histogram.count else 0,
+            "mean_ms": histogram.mean,
+        }
+        for p in LOAD_PERCENTILES:
+            report[f"p{p}_ms"] = histogram.percentile(p)
+        report["max_ms"] = round(histogram.max, 1) if histogram.count else None
+        return report
+
+    def close_interval(self, min_seconds=0):
+        #Reporte del intervalo que termina; su histograma se suma al total.
+        #Regresa None si duró menos de min_seconds (solo cuenta en el resumen).
+        now = time.monotonic()
+        seconds = now - self.interval_started
+        report = None
+        if seconds >= min_seconds:
+            report = {"t": round(now - self.started, 1)}
+            report.update(self.report(self.interval, self.interval_errors, seconds))
+        self.total.merge(self.interval)
+        self._reset_interval()
+        return report
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        report = {"summary": True, "duration": round(elapsed, 1)}
+        report.update(self.report(self.total, self.errors, elapsed))
+        report["dropped"] = self.dropped
+        report["statuses"] = self.statuses
+        return report
+
+
+async def timed_get(client, url, stats, scheduled=None):
+    #Una petición; la latencia cuenta desde que se programó (modo --rate) o desde que sale
+    start = scheduled if scheduled is not None else time.perf_counter()
+    try:
+        response = await client.get(url)
+        status = response.status
+    except Exception:
+        status = "ERROR"
+    stats.record(status, (time.perf_counter() - start) * 1000)
+
+
+async def run_load(site_config, duration=DEFAULT_DURATION, concurrency=DEFAULT_CONCURRENCY, rate=None,
+                   interval=DEFAULT_INTERVAL, timeout=DEFAULT_TIMEOUT, on_interval=None, client=None):
+    #Prueba de carga sobre los slugs de un sitio. on_interval(reporte) se llama cada
+    #interval segundos. Regresa el resumen de toda la prueba.
+    urls = itertools.cycle([site_config['api_base'] + slug for slug in site_config['slugs'].values()])
+    stats = LoadStats()
+    own_client = client is None
+    if own_client:
+        client = HttpClient(max_per_host=concurrency, timeout=timeout)
+    deadline = time.monotonic() + duration
+
+    async def closed_loop():
+        while time.monotonic() < deadline:
+            await timed_get(client, next(urls), stats)
+
+    async def open_loop():
+        pending = set()
+        period = 1 / rate
+        next_send = time.perf_counter()
+        while time.monotonic() < deadline:
+            if len(pending) >= concurrency * MAX_PENDING_FACTOR:
+                stats.dropped += 1
+            else:
+                task = asyncio.ensure_future(timed_get(client, next(urls), stats, next_send))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            next_send += period
+            await asyncio.sleep(max(0, next_send - time.perf_counter()))
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+
+    min_seconds = interval * MIN_INTERVAL_FRACTION
+
+    def close_interval():
+        report = stats.close_interval(min_seconds)
+        if on_interval and report and report["requests"]:
+            on_interval(report)
+
+    async def reporter():
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(interval, max(0, deadline - time.monotonic())))
+            close_interval()
+
+    try:
+        if rate:
+            load = [open_loop()]
+        else:
+            load = [closed_loop() for _ in range(concurrency)]
+        await asyncio.gather(reporter(), *load)
+        # Lo que terminó después del último intervalo
+        close_interval()
+    finally:
+        if own_client:
+            client.close()
+    return stats.summary()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de un sitio")
+    parser.add_argument("site", help="Nombre del sitio en la configuración")
+    parser.add_argument("--config", default=CONFIG_PATH, help="Archivo de configuración")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="Segundos de prueba")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Peticiones simultáneas (con --rate, límite de conexiones)")
+    parser.add_argument("--rate", type=float, help="Peticiones por segundo (en lugar de concurrencia fija)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Segundos por reporte")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Segundos por petición")
+    parser.add_argument("--max-error-rate", type=float, default=0.0,
+                        help="Tasa de errores tolerada antes de salir con código 1")
+    return parser
+
+
+def run(args):
+    config = load_config(args.config)
+    if not config:
+        return EXIT_USAGE
+    site_config = config.get(args.site)
+    if not site_config or not site_config.get("slugs"):
+        print(f"Sitio no encontrado o sin slugs: {args.site}", file=sys.stderr)
+        return EXIT_USAGE
+    if args.duration <= 0 or args.interval <= 0 or (args.rate is not None and args.rate <= 0):
+        print("--duration, --interval y --rate deben ser mayores que 0", file=sys.stderr)
+        return EXIT_USAGE
+
+    summary = asyncio.run(run_load(
+        site_config,
+        duration=args.duration,
+        concurrency=max(1, args.concurrency),
+        rate=args.rate,
+        interval=args.interval,
+        timeout=args.timeout,
+        on_interval=emit
+    ))
+    emit(summary)
+    return EXIT_FAILURES if summary["error_rate"] > args.max_error_rate else EXIT_OK
+
+
+def main(argv=None):
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,50 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import json
-import asyncio
-from playwright.async_api import async_playwright
-import threading
+import queue
+import sqlite3
+import time
 import webbrowser
+from checker import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_ENGINE,
+    ENGINE_HTTP,
+    ENGINE_PLAYWRIGHT,
+    load_config,
+    result_ok,
+)
+from cache import ResponseCache
+from engine import CheckEngine
+from exporter import DEFAULT_EXPORT_PATH, ResultWriter, export_results
+from fingerprint import diff_runs
+from linkcheck import format_broken
+from modules_index import build_module_index, find_module
+from results_store import ResultsStore
+from spill import load_modules
+
+# Archivos de exportación disponibles; el formato sale de la extensión
+EXPORT_PATHS = (
+    DEFAULT_EXPORT_PATH,
+    "test_results.ndjson",
+    "test_results.ndjson.gz",
+)
+
+# Render por lotes: la cola de actualizaciones de la tabla se aplica una vez por cuadro,
+# y las vistas grandes se llenan por bloques para no congelar la ventana
+UI_FRAME_MS = 33
+TREE_CHUNK_ROWS = 200
+TEXT_PAGE_LINES = 2000
+
+# Columnas de latencia de la tabla (ordenables)
+LATENCY_COLUMNS = (
+    ("ttfb_ms", "TTFB (ms)"),
+    ("total_ms", "Total (ms)"),
+    ("size_kb", "Tamaño (KB)"),
+)
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value:.0f} ms"
 
 class ModuleDetailWindow:
     #Esta clase maneja la ventana de detalles de los módulos
@@ -13,6 +53,7 @@ class ModuleDetailWindow:
     def __init__(self, parent, modules):
         self.parent = parent
         self.modules = modules
+        self.module_ids = None  # id -> ruta en el árbol, se arma con la primera búsqueda
         
         self.window = tk.Toplevel(parent)
         self.window.title("Detalle de Módulos")
@@ -60,6 +101,15 @@ class ModuleDetailWindow:
             command=self.show_full_details
         ).pack(side=tk.LEFT, padx=5)
         
+        # Buscar un módulo por su ID, también entre los anidados
+        self.id_var = tk.StringVar()
+        ttk.Entry(btn_frame, textvariable=self.id_var, width=12).pack(side=tk.LEFT, padx=5)
+        ttk.Button(
+            btn_frame,
+            text="Buscar ID",
+            command=self.find_by_id
+        ).pack(side=tk.LEFT, padx=5)
+        
         ttk.Button(
             btn_frame,
             text="Cerrar",
@@ -69,8 +119,14 @@ class ModuleDetailWindow:
         # Llenar el Treeview con los módulos
         self.populate_tree()
     
-    def populate_tree(self):
-        for idx, module in enumerate(self.modules):
+    def populate_tree(self, start=0):
+        # Inserta un bloque de filas y agenda el siguiente, así la ventana
+        # responde aunque haya miles de módulos
+        if not self.window.winfo_exists():
+            return
+        end = min(start + TREE_CHUNK_ROWS, len(self.modules))
+        for idx in range(start, end):
+            module = self.modules[idx]
             mod_type = module.get("type", "N/A")
             mod_id = module.get("id", "N/A") or "N/A"
             template = module.get("template", "N/A") or "N/A"
@@ -87,6 +143,16 @@ class ModuleDetailWindow:
                 template[:50] + "..." if len(template) > 50 else template,
                 show_str
             ))
+        if end < len(self.modules):
+            self.window.after(1, self.populate_tree, end)
+    def find_by_id(self):
+        if self.module_ids is None:
+            self.module_ids = build_module_index(self.modules, ids=True)["ids"]
+        path = self.module_ids.get(self.id_var.get().strip())
+        if path is None:
+            messagebox.showinfo("Información", "No hay un módulo con ese ID")
+            return
+        self.show_module_details(find_module(self.modules, path))
     # Esta función muestra los detalles completos del módulo seleccionado
     # en una nueva ventana. Si no hay módulos seleccionados, muestra un mensaje de advertencia.
     # Si el índice del módulo es inválido, muestra un mensaje de error.
@@ -133,9 +199,32 @@ class ModuleDetailWindow:
         text_area = scrolledtext.ScrolledText(json_frame, wrap=tk.WORD)
         text_area.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        formatted_data = json.dumps(full_module, indent=4, ensure_ascii=False)
-        text_area.insert(tk.INSERT, formatted_data)
-        text_area.config(state=tk.DISABLED)
+        # El JSON se formatea por páginas de líneas conforme se muestra (iterencode va pieza
+        # por pieza); el resto se formatea al presionar "Mostrar más"
+        chunks = json.JSONEncoder(indent=4, ensure_ascii=False).iterencode(full_module)
+        more_button = ttk.Button(json_frame)
+        
+        def show_more():
+            page = []
+            lines = 0
+            finished = True
+            for chunk in chunks:
+                page.append(chunk)
+                lines += chunk.count("\n")
+                if lines >= TEXT_PAGE_LINES:
+                    finished = False
+                    break
+            text_area.config(state=tk.NORMAL)
+            text_area.insert(tk.END, "".join(page))
+            text_area.config(state=tk.DISABLED)
+            if finished:
+                more_button.pack_forget()
+            else:
+                more_button.config(text=f"Mostrar más (siguientes {TEXT_PAGE_LINES} líneas)")
+        
+        more_button.config(command=show_more)
+        more_button.pack(pady=5)
+        show_more()
         
         # Pestaña de vista previa
         preview_frame = ttk.Frame(notebook)
@@ -163,7 +252,7 @@ class ModuleDetailWindow:
         ttk.Button(
             btn_frame,
             text="Copiar JSON",
-            command=lambda: self.copy_to_clipboard(formatted_data)
+            command=lambda: self.copy_to_clipboard(json.dumps(full_module, indent=4, ensure_ascii=False))
         ).pack(side=tk.LEFT, padx=5)
         
         # Botón para cerrar
@@ -178,6 +267,87 @@ class ModuleDetailWindow:
         self.window.clipboard_append(text)
         messagebox.showinfo("Información", "JSON copiado al portapapeles")
 
+class SlugHistoryWindow:
+    #Ventana con las últimas ejecuciones guardadas de un slug (más reciente primero).
+    #Doble clic en una ejecución abre sus módulos.
+    def __init__(self, parent, store, site, slug):
+        self.parent = parent
+        self.store = store
+        self.history = store.slug_history(site, slug)
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Historial: {site} {slug}")
+        self.window.geometry("800x400")
+        
+        columns = ("run", "started", "status", "modules", "modules_ok", "expectations")
+        self.tree = ttk.Treeview(self.window, columns=columns, show="headings")
+        self.tree.heading("run", text="Ejecución")
+        self.tree.heading("started", text="Inicio")
+        self.tree.heading("status", text="Status")
+        self.tree.heading("modules", text="Módulos")
+        self.tree.heading("modules_ok", text="Módulos OK")
+        self.tree.heading("expectations", text="Expectativas")
+        self.tree.column("run", width=80, anchor=tk.CENTER)
+        self.tree.column("started", width=160)
+        self.tree.column("status", width=80, anchor=tk.CENTER)
+        self.tree.column("modules", width=80, anchor=tk.CENTER)
+        self.tree.column("modules_ok", width=160)
+        self.tree.column("expectations", width=100, anchor=tk.CENTER)
+        
+        scrollbar = ttk.Scrollbar(self.window, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscroll=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        
+        for position, (run_id, started, result) in enumerate(self.history):
+            self.tree.insert("", tk.END, iid=str(position), values=(
+                run_id,
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started)),
+                result["status"],
+                result["modules"],
+                result["modules_ok"],
+                result["expectations"]
+            ))
+        
+        self.tree.bind("<Double-1>", self.on_double_click)
+    
+    def on_double_click(self, event):
+        item_id = self.tree.identify_row(event.y)
+        if not item_id:
+            return
+        result = self.history[int(item_id)][2]
+        modules = load_modules(result)
+        if modules:
+            ModuleDetailWindow(self.window, modules)
+        else:
+            messagebox.showinfo("Información", "No se encontraron detalles de módulos")
+
+class RunDiffWindow:
+    #Ventana con los módulos agregados, quitados o cambiados por slug entre dos ejecuciones
+    def __init__(self, parent, report, old_run, new_run):
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Cambios: ejecución {old_run} -> {new_run}")
+        self.window.geometry("800x500")
+        
+        self.tree = ttk.Treeview(self.window, columns=("change",), show="tree headings")
+        self.tree.heading("#0", text="Sitio / Slug / Módulo")
+        self.tree.heading("change", text="Cambio")
+        self.tree.column("#0", width=600)
+        self.tree.column("change", width=120, anchor=tk.CENTER)
+        
+        scrollbar = ttk.Scrollbar(self.window, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscroll=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        
+        for site in sorted(report):
+            site_id = self.tree.insert("", tk.END, text=site, open=True)
+            for slug in sorted(report[site]):
+                changes = report[site][slug]
+                slug_id = self.tree.insert(site_id, tk.END, text=slug, values=(len(changes),))
+                for change, path in changes:
+                    self.tree.insert(slug_id, tk.END, text=path, values=(change,))
+
 class SiteTesterApp:
     def __init__(self, root):
         self.root = root
@@ -186,7 +356,7 @@ class SiteTesterApp:
         self.root.resizable(True, True)
         
         # Cargar configuración
-        self.config = self.load_config()
+        self.config = load_config()
         if not self.config:
             messagebox.showerror("Error", "No se pudo cargar sites_config.json")
             self.root.destroy()
@@ -195,23 +365,28 @@ class SiteTesterApp:
         # Crear interfaz
         self.create_widgets()
         
+        # Motor con navegador y conexiones calientes, compartido por todas las ejecuciones
+        self.engine = CheckEngine(self.create_cache())
+        # Historial de ejecuciones; la tabla, el detalle y la exportación leen de aquí
+        self.store = self.create_store()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Cola de actualizaciones de la interfaz; el hilo del motor solo encola
+        self.ui_queue = queue.SimpleQueue()
+        self.drain_job = self.root.after(UI_FRAME_MS, self.drain_ui_queue)
+        
         # Estado de pruebas
         self.testing = False
-        self.results = []
+        self.run_id = None  # ejecución actual en el historial
+        self.row_ids = {}  # (sitio, índice del slug) -> fila del Treeview
+        self.row_keys = {}  # fila del Treeview -> (sitio, posición del slug en la ejecución actual)
+        self.live_writer = None  # exportación mientras corre la prueba
+        self.broken_links = None  # enlaces rotos de la ejecución, si se revisaron
         
         # Enlazar evento de clic en el Treeview
         self.results_tree.bind('<ButtonRelease-1>', self.on_module_click)
-
-    def load_config(self):
-        try:
-            with open('sites_config.json', 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print("Archivo sites_config.json no encontrado")
-            return None
-        except json.JSONDecodeError:
-            print("Error en formato JSON")
-            return None
+        # Doble clic en una fila: últimas ejecuciones de ese slug
+        self.results_tree.bind('<Double-1>', self.on_row_double_click)
 
     def create_widgets(self):
         # Frame principal
@@ -238,6 +413,45 @@ class SiteTesterApp:
         self.site_dropdown.pack(side=tk.LEFT, padx=5)
         self.site_dropdown.current(0)
         
+        # Probar todos los sitios de la configuración al mismo tiempo
+        self.all_sites_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            site_frame,
+            text="Todos los sitios",
+            variable=self.all_sites_var
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # Límite de slugs que se prueban en paralelo
+        ttk.Label(site_frame, text="Concurrencia:").pack(side=tk.LEFT, padx=5)
+        self.concurrency_var = tk.IntVar(value=DEFAULT_CONCURRENCY)
+        ttk.Spinbox(
+            site_frame,
+            from_=1,
+            to=32,
+            textvariable=self.concurrency_var,
+            width=5
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # Motor de verificación: HTTP directo o Playwright (para endpoints que
+        # necesitan cookies o JS del navegador)
+        ttk.Label(site_frame, text="Motor:").pack(side=tk.LEFT, padx=5)
+        self.engine_var = tk.StringVar(value=DEFAULT_ENGINE)
+        ttk.Combobox(
+            site_frame,
+            textvariable=self.engine_var,
+            values=(ENGINE_HTTP, ENGINE_PLAYWRIGHT),
+            state="readonly",
+            width=12
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # Revisar también las URLs de imágenes y links de los módulos
+        self.check_links_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            site_frame,
+            text="Revisar enlaces",
+            variable=self.check_links_var
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Botón de prueba
         self.test_button = ttk.Button(
             site_frame, 
@@ -251,15 +465,19 @@ class SiteTesterApp:
         results_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         
         # Crear tabla con columna para módulos
-        columns = ("name", "slug", "status", "type", "section", "modules", "modules_ok")
+        columns = ("name", "slug", "status", "type", "section", "modules", "modules_ok", "expectations",
+                   "ttfb_ms", "total_ms", "size_kb")
         self.results_tree = ttk.Treeview(
             results_frame, 
             columns=columns, 
-            show="headings",
+            show="tree headings",
             selectmode="extended"
         )
         
         # Configurar columnas
+        # La columna del árbol agrupa los slugs por sitio cuando se prueban todos
+        self.results_tree.heading("#0", text="Sitio")
+        self.results_tree.column("#0", width=160, anchor=tk.W)
         self.results_tree.heading("name", text="Nombre")
         self.results_tree.heading("slug", text="Slug")
         self.results_tree.heading("status", text="Código")
@@ -267,6 +485,10 @@ class SiteTesterApp:
         self.results_tree.heading("section", text="Sección")
         self.results_tree.heading("modules", text="Módulos")
         self.results_tree.heading("modules_ok", text="Existencia de modulos")
+        self.results_tree.heading("expectations", text="Expectativas")
+        # Columnas de latencia: clic en el encabezado para ordenar
+        for column, text in LATENCY_COLUMNS:
+            self.results_tree.heading(column, text=text, command=lambda c=column: self.sort_by_column(c))
         
         self.results_tree.column("name", width=150, anchor=tk.W)
         self.results_tree.column("slug", width=200, anchor=tk.W)
@@ -275,6 +497,11 @@ class SiteTesterApp:
         self.results_tree.column("section", width=150, anchor=tk.W)
         self.results_tree.column("modules", width=80, anchor=tk.CENTER)
         self.results_tree.column("modules_ok", width=100, anchor=tk.CENTER)
+        self.results_tree.column("expectations", width=90, anchor=tk.CENTER)
+        self.results_tree.column("ttfb_ms", width=90, anchor=tk.E)
+        self.results_tree.column("total_ms", width=90, anchor=tk.E)
+        self.results_tree.column("size_kb", width=80, anchor=tk.E)
+        self.sort_descending = {}
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(
@@ -286,6 +513,15 @@ class SiteTesterApp:
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.results_tree.pack(fill=tk.BOTH, expand=True)
         
+        # Aplicar formato de color (una sola vez)
+        self.results_tree.tag_configure("success", foreground="green")
+        self.results_tree.tag_configure("error", foreground="red")
+        self.results_tree.tag_configure("warning", foreground="orange")
+        
+        # Aplicar formato especial para la columna de módulos
+        self.results_tree.tag_configure("module_success", foreground="green")
+        self.results_tree.tag_configure("module_error", foreground="red")
+        
         # Etiqueta de estado
         self.status_var = tk.StringVar(value="Listo")
         status_bar = ttk.Label(
@@ -305,136 +541,186 @@ class SiteTesterApp:
             text="Exportar Resultados", 
             command=self.export_results
         ).pack(side=tk.RIGHT)
+        
+        # Módulos que cambiaron respecto a la ejecución anterior del historial
+        ttk.Button(
+            export_frame,
+            text="Comparar con anterior",
+            command=self.show_run_diff
+        ).pack(side=tk.LEFT)
+        
+        # Archivo (formato) de exportación y opciones
+        self.export_path_var = tk.StringVar(value=DEFAULT_EXPORT_PATH)
+        ttk.Combobox(
+            export_frame,
+            textvariable=self.export_path_var,
+            values=EXPORT_PATHS,
+            state="readonly",
+            width=25
+        ).pack(side=tk.RIGHT, padx=5)
+        
+        # Solo resumen: sin modules_list
+        self.summary_only_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            export_frame,
+            text="Solo resumen",
+            variable=self.summary_only_var
+        ).pack(side=tk.RIGHT, padx=5)
+        
+        # Escribe cada resultado en el archivo en cuanto termina el slug
+        self.live_export_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            export_frame,
+            text="Guardar mientras prueba",
+            variable=self.live_export_var
+        ).pack(side=tk.RIGHT, padx=5)
 
     def start_tests(self):
         if self.testing:
             return
+        
+        if self.all_sites_var.get():
+            sites = dict(self.config)
+        else:
+            selected_site = self.site_var.get()
+            if not selected_site:
+                messagebox.showwarning("Advertencia", "Seleccione un sitio primero")
+                return
             
-        selected_site = self.site_var.get()
-        if not selected_site:
-            messagebox.showwarning("Advertencia", "Seleccione un sitio primero")
-            return
+            # Obtener configuración del sitio
+            site_config = self.config.get(selected_site)
+            if not site_config:
+                messagebox.showerror("Error", f"Configuración no encontrada para {selected_site}")
+                return
+            sites = {selected_site: site_config}
             
         # Limpiar resultados anteriores
         for item in self.results_tree.get_children():
             self.results_tree.delete(item) 
+        self.row_ids = {}
+        self.row_keys = {}
         self.testing = True
         self.test_button.config(state=tk.DISABLED)
-        self.status_var.set(f"Probando: {selected_site}...")
-        
-        # Obtener configuración del sitio
-        site_config = self.config.get(selected_site)
-        if not site_config:
-            messagebox.showerror("Error", f"Configuración no encontrada para {selected_site}")
-            self.testing = False
-            self.test_button.config(state=tk.NORMAL)
-            return
+        self.status_var.set(f"Probando: {', '.join(sites)}...")
+        
+        try:
+            concurrency = max(1, int(self.concurrency_var.get()))
+        except (tk.TclError, ValueError):
+            concurrency = DEFAULT_CONCURRENCY
+        engine = self.engine_var.get()
+        
+        # Una fila por slug desde el inicio, así el orden de la tabla no depende
+        # de cuál slug termina primero. Con varios sitios, cada uno tiene su grupo.
+        for site, site_config in sites.items():
+            parent = ""
+            if len(sites) > 1:
+                parent = self.results_tree.insert("", tk.END, text=site, open=True)
+            for index, (name, slug) in enumerate(site_config['slugs'].items()):
+                self.row_ids[(site, index)] = self.results_tree.insert(
+                    parent,
+                    tk.END,
+                    values=(name, slug, "...", "", "", "", "", "", "", "", "")
+                )
+        
+        # Exportación en vivo: un registro por slug conforme terminan
+        self.live_writer = None
+        if self.live_export_var.get():
+            try:
+                self.live_writer = ResultWriter(
+                    self.export_path_var.get(), self.summary_only_var.get(), sites=sites
+                )
+            except OSError as e:
+                messagebox.showerror("Error", f"No se pudo abrir el archivo de exportación: {e}")
+        
+        # Ejecutar pruebas en el hilo del motor; cada resultado se guarda en el historial
+        check_links = self.check_links_var.get()
+        self.broken_links = 0 if check_links else None
+        self.run_id = self.store.start_run(engine, sites)
+        future = self.engine.run_sites(sites, self.on_slug_result, concurrency, engine, check_links=check_links)
+        future.add_done_callback(self.on_run_finished)
+
+    def on_run_finished(self, future):
+        # Se llama desde el hilo del motor cuando termina la ejecución
+        try:
+            _, errors = future.result()
+        except Exception as e:
+            print(f"Error general: {e}")
+            errors = {"motor": e}
+        
+        if self.live_writer:
+            self.live_writer.close()
+        
+        self.store.finish_run(self.run_id)
+        self.store.prune()
         
-        # Ejecutar pruebas en un hilo separado
-        threading.Thread(
-            target=self.run_tests_in_thread,
-            args=(site_config,),
-            daemon=True
-        ).start()
+        if errors:
+            self.ui_queue.put((self.show_run_errors, (", ".join(errors),)))
+        
+        # Después de todas las filas ya encoladas
+        self.ui_queue.put((self.on_tests_complete, ()))
 
-    def run_tests_in_thread(self, site_config):
-        #define un nuevo loop de eventos para asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(self.test_site(site_config))#lo corre hasta que termine
-        loop.close()
-        
-        self.root.after(0, self.on_tests_complete)
+    def show_run_errors(self, failed):
+        messagebox.showwarning(
+            "Advertencia",
+            f"No se pudo probar: {failed}. Pruebe encendiendo el stage o con otro sitio."
+        )
 
-    async def test_site(self, site_config):
-        self.results = [] #inicializa la lista de resultados
-        # Inicia Playwright y abre el navegador
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            
+    def create_cache(self):
+        # Caché de respuestas en disco; si no se puede crear, se prueba sin caché
+        try:
+            return ResponseCache()
+        except OSError as e:
+            print(f"Caché deshabilitada: {e}")
+            return None
+
+    def create_store(self):
+        # Si no se puede abrir el archivo del historial, se guarda solo en memoria
+        try:
+            store = ResultsStore()
+            store.prune()
+            return store
+        except sqlite3.Error as e:
+            print(f"Historial en memoria: {e}")
+            return ResultsStore(":memory:")
+
+    def on_close(self):
+        # Cierra el navegador y las conexiones antes de destruir la ventana
+        self.root.after_cancel(self.drain_job)
+        self.engine.shutdown()
+        self.store.close()
+        self.root.destroy()
+
+    def on_slug_result(self, site, result, index):
+        # Se llama desde el hilo de pruebas en cuanto termina cada slug. Los módulos llegan
+        # como bytes; el hilo escritor del historial los guarda y la tabla los lee de ahí.
+        if self.broken_links is not None:
+            self.broken_links += len(result.get("broken_links", ()))
+        if self.live_writer:
             try:
-                await page.goto(site_config['base_url'])# Navega a la URL base del sitio
-                
-                for name, slug in site_config['slugs'].items():#entra en los slugs del sitio
-                    # Construir la URL de la API
-                    api_url = site_config['api_base'] + slug #forma la URL de la API
-                    
-                    try:
-                        # Capturar respuesta de la API
-                        async with page.expect_response(api_url) as response_info:
-                            await page.goto(api_url)
-                        
-                        response = await response_info.value
-                        status = response.status
-                        
-                        try:
-                            api_data = await response.json()
-                            # Obtener datos JSON y contar módulos
-                            modules = api_data.get("data", {}).get("modules", [])
-                            modules_count = len(modules)
-                            modules_ok = "Existen Modulos" if modules_count > 0 else "No"
-                            
-                            filtered_data = {
-                                "type": api_data.get("type"),
-                                "section": api_data.get("data", {}).get("section"),
-                            }
-                            
-                            # Guardar la lista completa de módulos
-                            result = {
-                                "name": name,
-                                "slug": slug,
-                                "status": status,
-                                "type": filtered_data.get("type", "N/A"),
-                                "section": filtered_data.get("section", "N/A"),
-                                "modules": modules_count,
-                                "modules_ok": modules_ok,
-                                "modules_list": modules  # Guardamos la lista completa
-                            }
-                            
-                            self.results.append(result)
-                            self.update_results_table(result)
-                            
-                        except Exception as e:
-                            print(f"Error procesando JSON en {name}: {e}")
-                            result = {
-                                "name": name,
-                                "slug": slug,
-                                "status": status,
-                                "type": "N/A",
-                                "section": "N/A",
-                                "modules": 0,
-                                "modules_ok": "ERROR",
-                                "modules_list": []
-                            }
-                            self.results.append(result)
-                            self.update_results_table(result)
-                    
-                    except Exception as e:
-                        print(f"Error en {name}: {e}")
-                        result = {
-                            "name": name,
-                            "slug": slug,
-                            "status": "ERROR",
-                            "type": "N/A",
-                            "section": "N/A",
-                            "modules": 0,
-                            "modules_ok": "ERROR",
-                            "modules_list": []
-                        }
-                        self.results.append(result)
-                        self.update_results_table(result)
-            
-            except Exception as e:
-                print(f"Error general: {e}")
-                messagebox.showwarning("Advertencia", "No se pudo acceder a la URL base del sitio. Pruebe encendiendo el stage o con otro sitio.")
-            finally:
-                await browser.close()
+                self.live_writer.write(result, site, index)
+            except OSError as e:
+                print(f"Error exportando {result['name']}: {e}")
+                self.live_writer.close()
+                self.live_writer = None
+        self.store.add_result(self.run_id, site, index, result, result_ok(result))
+        self.update_results_table(site, result, index)
 
-    def update_results_table(self, result):
-        self.root.after(0, lambda: self._update_table(result))
+    def update_results_table(self, site, result, index):
+        self.ui_queue.put((self._update_table, (site, result, index)))
 
-    def _update_table(self, result):
+    def drain_ui_queue(self):
+        # Aplica de una vez todo lo pendiente y vuelve a revisar en el siguiente cuadro
+        # Si un callback falla se reprograma igual; lo que quede se aplica en el siguiente cuadro
+        try:
+            while True:
+                callback, args = self.ui_queue.get_nowait()
+                callback(*args)
+        except queue.Empty:
+            pass
+        finally:
+            self.drain_job = self.root.after(UI_FRAME_MS, self.drain_ui_queue)
+
+    def _update_table(self, site, result, index):
         # Determinar color según el estado
         if result["status"] == 200:
             tags = ("success",)
@@ -449,10 +735,13 @@ class SiteTesterApp:
         else:
             module_tags = ("module_error",)
         
-        # Insertar en la tabla
-        item_id = self.results_tree.insert(
-            "", 
-            tk.END, 
+        timing = result.get("timing") or {}
+        
+        # Actualizar la fila reservada para este slug
+        row_id = self.row_ids[(site, index)]
+        self.row_keys[row_id] = (site, index)
+        self.results_tree.item(
+            row_id,
             values=(
                 result["name"],
                 result["slug"],
@@ -460,47 +749,87 @@ class SiteTesterApp:
                 result["type"],
                 result["section"],
                 result["modules"],
-                result["modules_ok"]
+                result["modules_ok"],
+                result["expectations"],
+                timing.get("ttfb_ms", ""),
+                timing.get("total_ms", ""),
+                round(timing["bytes"] / 1024, 1) if "bytes" in timing else ""
             ),
             tags=tags
         )
+
+    def sort_by_column(self, column):
+        # Ordena las filas de cada grupo por el valor numérico de la columna;
+        # cada clic invierte el orden. Las filas sin valor quedan al final.
+        descending = self.sort_descending.get(column, True)
+        self.sort_descending[column] = not descending
         
-        # Aplicar formato de color
-        self.results_tree.tag_configure("success", foreground="green")
-        self.results_tree.tag_configure("error", foreground="red")
-        self.results_tree.tag_configure("warning", foreground="orange")
-        
-        # Aplicar formato especial para la columna de módulos
-        self.results_tree.tag_configure("module_success", foreground="green")
-        self.results_tree.tag_configure("module_error", foreground="red")
+        def value(item_id):
+            try:
+                number = float(self.results_tree.set(item_id, column))
+            except ValueError:
+                return (1, 0)
+            return (0, -number if descending else number)
+        
+        parents = [""] + [item for item in self.results_tree.get_children("") if not self.results_tree.set(item, "name")]
+        for parent in parents:
+            rows = [item for item in self.results_tree.get_children(parent) if self.results_tree.set(item, "name")]
+            for position, item_id in enumerate(sorted(rows, key=value)):
+                self.results_tree.move(item_id, parent, position)
 
     def on_tests_complete(self):
         self.testing = False
         self.test_button.config(state=tk.NORMAL)
         
-        success_count = sum(1 for r in self.results if r["status"] == 200)
-        error_count = sum(1 for r in self.results if r["status"] != 200)
-        modules_ok_count = sum(1 for r in self.results if r.get("modules_ok") == "Existen Modulos")
+        # Conteos calculados por el historial, sin recorrer los resultados
+        summary = self.store.run_summary(self.run_id)
         
-        self.status_var.set(
-            f"Pruebas completadas: {success_count} éxitos, {error_count} errores | "
-            f"Módulos OK: {modules_ok_count}/{len(self.results)}"
+        status = (
+            f"Pruebas completadas: {summary['success']} éxitos, "
+            f"{summary['total'] - summary['success'] - summary['skipped']} errores, {summary['skipped']} omitidos | "
+            f"Módulos OK: {summary['modules_ok']}/{summary['total']} | "
+            f"Expectativas fallidas: {summary['expectation_failures']} | "
+            f"Latencia p50/p95/max: {format_ms(summary['p50'])} / {format_ms(summary['p95'])} / {format_ms(summary['max'])}"
         )
-    #esta función exporta los resultados a un archivo JSON
+        if self.broken_links is not None:
+            status += f" | Enlaces rotos: {self.broken_links}"
+        self.status_var.set(status)
+    #esta función exporta los resultados al archivo elegido (JSON, NDJSON o .gz)
     #Si no hay resultados, muestra un mensaje informativo.
     #Si hay un error al exportar, muestra un mensaje de error.
     #Si la exportación es exitosa, muestra un mensaje de éxito.
     def export_results(self):
-        if not self.results:
+        site_results = self.store.run_results(self.run_id) if self.run_id else {}
+        if not site_results:
             messagebox.showinfo("Exportar", "No hay resultados para exportar")
             return
-            
+        
+        path = self.export_path_var.get()
         try:
-            with open('test_results.json', 'w') as f:
-                json.dump(self.results, f, indent=2)
-            messagebox.showinfo("Éxito", "Resultados exportados a test_results.json")
+            # Con varios sitios la exportación se agrupa por sitio
+            export_results(path, site_results, self.summary_only_var.get())
+            messagebox.showinfo("Éxito", f"Resultados exportados a {path}")
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo exportar: {e}")
+    def show_run_diff(self):
+        # Compara huellas de la ejecución actual con la anterior; solo los slugs
+        # con huella distinta cargan su árbol de módulos
+        previous = self.store.previous_run(self.run_id) if self.run_id and not self.testing else None
+        if previous is None:
+            messagebox.showinfo("Comparar", "No hay una ejecución anterior para comparar")
+            return
+        
+        current = self.store.run_fingerprints(self.run_id)
+        old = self.store.run_fingerprints(previous)
+        # Solo los sitios que probaron las dos ejecuciones; cada una pudo probar otros
+        sites = {site for site, _ in current} & {site for site, _ in old}
+        current = {key: value for key, value in current.items() if key[0] in sites}
+        old = {key: value for key, value in old.items() if key[0] in sites}
+        report = diff_runs(old, current, self.store.module_hashes)
+        if not report:
+            messagebox.showinfo("Comparar", f"Sin cambios respecto a la ejecución {previous}")
+            return
+        RunDiffWindow(self.root, report, previous, self.run_id)
     # Esta función maneja el evento de clic en la columna de módulos
     # del Treeview. Si se hace clic en un módulo, abre una ventana
     # de detalles mostrando la lista de módulos asociados al slug.
@@ -522,26 +851,53 @@ class SiteTesterApp:
         column = self.results_tree.identify_column(event.x)
         item_id = self.results_tree.identify_row(event.y)
         
+        # Clic en la columna de expectativas (columna #8): detalle de las que fallaron
+        # y de los enlaces rotos por módulo, si se revisaron
+        if column == "#8":
+            result = self.row_result(item_id)
+            if result and (result.get("expectation_failures") or result.get("broken_links")):
+                lines = list(result.get("expectation_failures") or [])
+                if result.get("broken_links"):
+                    lines.append("Enlaces rotos:")
+                    lines.extend(format_broken(result["broken_links"]))
+                messagebox.showinfo("Expectativas", f"{result['name']} ({result['slug']}):\n" + "\n".join(lines))
+            return
+        
         # Solo procesar clics en la columna de módulos (columna #6)
         if column == "#6":
-            # Obtener los valores del item
-            item_values = self.results_tree.item(item_id, "values")
-            slug = item_values[1]
-            modules_count = item_values[5]
+            # Buscar el resultado de la fila por su id (el slug puede repetirse entre sitios)
+            result = self.row_result(item_id)
+            if result is None:
+                return
             
-            if modules_count == 0:
+            if result["modules"] == 0:
                 messagebox.showinfo("Información", "Este slug no tiene módulos")
                 return
             
-            # Buscar los módulos en los resultados
-            for result in self.results:
-                if result['slug'] == slug:
-                    modules = result.get('modules_list', [])
-                    if modules:
-                        ModuleDetailWindow(self.root, modules)
-                    else:
-                        messagebox.showinfo("Información", "No se encontraron detalles de módulos")
-                    break
+            modules = load_modules(result)
+            if modules:
+                ModuleDetailWindow(self.root, modules)
+            else:
+                messagebox.showinfo("Información", "No se encontraron detalles de módulos")
+
+    def row_result(self, item_id):
+        # Resultado de una fila de la tabla, leído del historial por su id
+        key = self.row_keys.get(item_id)
+        if key is None:
+            return None
+        return self.store.find_result(self.run_id, *key)
+
+    def on_row_double_click(self, event):
+        # Las columnas de módulos y expectativas ya abren su propio detalle con un clic
+        if self.results_tree.identify_column(event.x) in ("#6", "#8"):
+            return
+        item_id = self.results_tree.identify_row(event.y)
+        key = self.row_keys.get(item_id)
+        if key is None:
+            return
+        result = self.row_result(item_id)
+        if result:
+            SlugHistoryWindow(self.root, self.store, key[0], result["slug"])
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,100 @@
+# Índice compacto del árbol de módulos de un slug.
+# Los payloads anidan módulos: ctr_ads y ctr_modules traen su propia lista "modules".
+# build_module_index recorre el árbol una sola vez (iterativo, sin recursión) y deja
+# listo todo lo que se pregunta después: conteos por tipo, por profundidad,
+# anuncios / no anuncios y, si se pide (ids=True), la ruta de cada id. Las expectativas
+# de sites_config.json se revisan contra este índice, sin volver a recorrer el árbol.
+# El module_index de cada resultado (el que va a la caché, al historial y a las
+# exportaciones) lleva solo los conteos; la ventana de detalle arma el de los ids al abrirse.
+#
+# Expectativas en sites_config.json (conteos mínimos por slug; "*" aplica a todos):
+#   "expectations": {
+#       "*": {"total": 1},
+#       "Home": {"ad_leaderboard": 1, "ctr_modules": 3, "ads": 2}
+#   }
+# Las llaves son tipos de módulo, o "total" / "ads" / "non_ads".
+
+ALL_SLUGS = "*"
+INDEX_TOTALS = ("total", "ads", "non_ads")
+
+
+def is_ad(module):
+    return module.get("is_ad") is True or str(module.get("type", "")).startswith("ad_")
+
+
+def build_module_index(modules, ids=False):
+    index = {
+        "total": 0,
+        "ads": 0,
+        "non_ads": 0,
+        "by_type": {},
+        "by_depth": [],  # posición = profundidad (0 = módulos de primer nivel)
+    }
+    by_type = index["by_type"]
+    by_depth = index["by_depth"]
+    if ids:
+        index["ids"] = {}  # id -> ruta de índices, p. ej. "3.0.2"
+    id_paths = index.get("ids")
+
+    # Pila de (módulo, profundidad, ruta); se apilan al revés para visitar en orden
+    stack = [(modules[i], 0, str(i)) for i in range(len(modules) - 1, -1, -1)]
+    while stack:
+        module, depth, path = stack.pop()
+        if not isinstance(module, dict):
+            continue
+
+        index["total"] += 1
+        if is_ad(module):
+            index["ads"] += 1
+        else:
+            index["non_ads"] += 1
+        mod_type = module.get("type") or "N/A"
+        by_type[mod_type] = by_type.get(mod_type, 0) + 1
+        if depth == len(by_depth):
+            by_depth.append(0)
+        by_depth[depth] += 1
+        if id_paths is not None:
+            mod_id = module.get("id")
+            if mod_id not in (None, "") and str(mod_id) not in id_paths:
+                id_paths[str(mod_id)] = path
+
+        children = module.get("modules")
+        if isinstance(children, list):
+            for i in range(len(children) - 1, -1, -1):
+                stack.append((children[i], depth + 1, f"{path}.{i}"))
+
+    return index
+
+
+def find_module(modules, path):
+    #Regresa el módulo en la ruta del índice ("3.0.2"), o None
+    module = None
+    current = modules
+    for part in path.split("."):
+        try:
+            module = current[int(part)]
+        except (IndexError, ValueError, TypeError):
+            return None
+        current = module.get("modules") if isinstance(module, dict) else None
+    return module
+
+
+def slug_expectations(site_config, name):
+    #Mínimos esperados para un slug: los de "*" más los del slug
+    expectations = site_config.get("expectations") or {}
+    expected = dict(expectations.get(ALL_SLUGS, {}))
+    expected.update(expectations.get(name, {}))
+    return expected
+
+
+def check_expectations(index, expected):
+    #Regresa la lista de expectativas que no se cumplen
+    failures = []
+    for key, minimum in expected.items():
+        if key in INDEX_TOTALS:
+            count = index[key]
+        else:
+            count = index["by_type"].get(key, 0)
+        if count < minimum:
+            failures.append(f"{key}: {count} < {minimum}")
+    return failures
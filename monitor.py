@@ -0,0 +1,263 @@
+import argparse
+import asyncio
+import heapq
+import random
+import sys
+import time
+
+from cache import DEFAULT_CACHE_DIR, ResponseCache
+from checker import (
+    CONFIG_PATH,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_TIMEOUT,
+    EXIT_OK,
+    EXIT_USAGE,
+    HttpClient,
+    check_slug_http,
+    emit,
+    finish_result,
+    load_config,
+    select_sites,
+)
+
+# Monitoreo continuo: un solo scheduler de asyncio revisa todos los slugs configurados,
+# cada uno con su propio intervalo.
+#   - Un slug sano que no cambia espera cada vez más (x BACKOFF, hasta max_interval).
+#   - Un slug que falla o que cambia de estado seguido (flapping) se revisa cada min_interval.
+#   - Cada espera lleva jitter (±JITTER) y el arranque se reparte en el primer intervalo,
+#     para que los slugs no se revisen todos al mismo tiempo.
+# Solo se escribe algo cuando un slug cambia de estado (p. ej. 200 -> 404, con módulos -> sin
+# módulos, expectativas OK -> FALLA): un JSON por línea en stdout. Un slug que ya arranca mal
+# también se reporta. Usa el motor HTTP y la caché de respuestas (peticiones condicionales).
+#
+#   python monitor.py --all --interval 60 --min-interval 15 --max-interval 900
+
+DEFAULT_INTERVAL = 60  # segundos
+DEFAULT_MIN_INTERVAL = 15
+DEFAULT_MAX_INTERVAL = 15 * 60
+BACKOFF = 1.5
+JITTER = 0.1
+FLAP_WINDOW = 10  # últimas revisiones que se miran para detectar flapping
+FLAP_THRESHOLD = 3  # cambios de estado dentro de la ventana
+
+
+def slug_state(result):
+    #Lo que cuenta como "estado" de un slug para detectar transiciones
+    return {
+        "status": result["status"],
+        "modules": result["modules_ok"] == "Existen Modulos",
+        "expectations": result.get("expectations", "N/A"),
+    }
+
+
+def is_healthy(state):
+    return state["status"] == 200 and state["modules"] and state["expectations"] != "FALLA"
+
+
+class SlugWatch:
+    #Estado de un slug vigilado
+    __slots__ = ("site", "name", "slug", "interval", "state", "changes", "checks")
+
+    def __init__(self, site, name, slug, interval):
+        self.site = site
+        self.name = name
+        self.slug = slug
+        self.interval = interval
+        self.state = None
+        self.changes = []  # 1 si la revisión cambió el estado, 0 si no (últimas FLAP_WINDOW)
+        self.checks = 0
+
+    def flapping(self):
+        return sum(self.changes) >= FLAP_THRESHOLD
+
+
+class Monitor:
+    def __init__(self, sites, on_transition=None, interval=DEFAULT_INTERVAL, min_interval=DEFAULT_MIN_INTERVAL,
+                 max_interval=DEFAULT_MAX_INTERVAL, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT,
+                 cache=None, client=None):
+        self.sites = sites
+        self.on_transition = on_transition
+        self.interval = interval
+        self.min_interval = min(min_interval, interval)
+        self.max_interval = max(max_interval, interval)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache = cache
+        self.client = client
+        self.requests = 0
+        self.transitions = 0
+        self.started = None
+        self._random = random.Random()
+        self._queue = []  # heap de (siguiente revisión, contador, SlugWatch)
+        self._counter = 0
+        self._wake = None
+
+    def _schedule(self, watch, delay):
+        self._counter += 1
+        jitter = 1 + self._random.uniform(-JITTER, JITTER)
+        heapq.heappush(self._queue, (time.monotonic() + delay * jitter, self._counter, watch))
+        self._wake.set()
+
+    def next_interval(self, watch, healthy, changed):
+        #Sanos y estables se alejan; con fallas o flapping se revisan seguido;
+        #al recuperarse vuelven al intervalo base
+        if not healthy or watch.flapping():
+            return self.min_interval
+        if changed:
+            return self.interval
+        return min(watch.interval * BACKOFF, self.max_interval)
+
+    async def check(self, watch):
+        site_config = self.sites[watch.site]
+        try:
+            result = finish_result(
+                await check_slug_http(self.client, site_config, watch.name, watch.slug, self.cache),
+                site_config
+            )
+        except Exception as e:
+            # Un error inesperado no debe sacar al slug del monitoreo
+            print(f"Error en {watch.site} {watch.name}: {e}", file=sys.stderr)
+            self._schedule(watch, self.min_interval)
+            return
+        self.requests += 1
+        watch.checks += 1
+        state = slug_state(result)
+        healthy = is_healthy(state)
+        previous = watch.state
+        changed = previous is not None and state != previous
+        watch.changes = (watch.changes + [int(changed)])[-FLAP_WINDOW:]
+        watch.state = state
+
+        if changed or (previous is None and not healthy):
+            self.transitions += 1
+            if self.on_transition:
+                self.on_transition({
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "site": watch.site,
+                    "name": watch.name,
+                    "slug": watch.slug,
+                    "from": previous,
+                    "to": state,
+                    "flapping": watch.flapping(),
+                })
+
+        watch.interval = self.next_interval(watch, healthy, changed)
+        self._schedule(watch, watch.interval)
+
+    async def run(self, duration=None):
+        #Vigila hasta que se cancele (o durante duration segundos) y regresa el resumen
+        self._wake = asyncio.Event()
+        self.started = time.monotonic()
+        own_client = self.client is None
+        if own_client:
+            self.client = HttpClient(max_per_host=self.concurrency, timeout=self.timeout)
+
+        watches = [
+            SlugWatch(site, name, slug, self.interval)
+            for site, config in self.sites.items()
+            for name, slug in config["slugs"].items()
+        ]
+        for watch in watches:
+            # El arranque se reparte en el primer intervalo
+            self._schedule(watch, self._random.uniform(0, self.interval))
+
+        deadline = self.started + duration if duration else None
+        running = set()
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                now = time.monotonic()
+                while self._queue and self._queue[0][0] <= now:
+                    _, _, watch = heapq.heappop(self._queue)
+                    task = asyncio.ensure_future(self.check(watch))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+                wait = self._queue[0][0] - now if self._queue else self.interval
+                if deadline is not None:
+                    wait = min(wait, deadline - now)
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), max(0, wait))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            if own_client:
+                self.client.close()
+        return self.summary(len(watches))
+
+    def summary(self, slugs):
+        #Peticiones hechas contra las que haría un sondeo fijo cada interval segundos
+        elapsed = time.monotonic() - self.started if self.started else 0
+        return {
+            "summary": True,
+            "seconds": round(elapsed, 1),
+            "slugs": slugs,
+            "requests": self.requests,
+            "fixed_requests": int(slugs * elapsed / self.interval),
+            "transitions": self.transitions,
+        }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Monitoreo continuo de sitios API")
+    parser.add_argument("sites", nargs="*", help="Nombres de sitios de la configuración")
+    parser.add_argument("--all", action="store_true", help="Vigilar todos los sitios")
+    parser.add_argument("--config", default=CONFIG_PATH, help="Archivo de configuración")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Intervalo base en segundos")
+    parser.add_argument("--min-interval", type=float, default=DEFAULT_MIN_INTERVAL,
+                        help="Intervalo para slugs con fallas o flapping")
+    parser.add_argument("--max-interval", type=float, default=DEFAULT_MAX_INTERVAL,
+                        help="Intervalo máximo para slugs sanos y estables")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Peticiones simultáneas por host")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Segundos por petición")
+    parser.add_argument("--duration", type=float, help="Segundos de monitoreo (por defecto, hasta Ctrl+C)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directorio de la caché de respuestas")
+    parser.add_argument("--no-cache", action="store_true", help="No usar la caché de respuestas")
+    return parser
+
+
+def run(args):
+    config = load_config(args.config)
+    if not config:
+        return EXIT_USAGE
+    sites = select_sites(config, args.sites, args.all)
+    if sites is None:
+        return EXIT_USAGE
+    if args.interval <= 0 or args.min_interval <= 0:
+        print("Los intervalos deben ser mayores que 0", file=sys.stderr)
+        return EXIT_USAGE
+
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = ResponseCache(args.cache_dir)
+        except OSError as e:
+            print(f"Caché deshabilitada: {e}", file=sys.stderr)
+
+    monitor = Monitor(
+        sites,
+        emit,
+        interval=args.interval,
+        min_interval=args.min_interval,
+        max_interval=args.max_interval,
+        concurrency=max(1, args.concurrency),
+        timeout=args.timeout,
+        cache=cache
+    )
+    try:
+        summary = asyncio.run(monitor.run(args.duration))
+    except KeyboardInterrupt:
+        summary = monitor.summary(sum(len(config["slugs"]) for config in sites.values()))
+    emit(summary)
+    return EXIT_OK
+
+
+def main(argv=None):
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
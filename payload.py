@@ -0,0 +1,121 @@
+import json
+from json.decoder import WHITESPACE, scanstring
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Lectura de los payloads de la API a partir de los bytes de la respuesta.
+# El verificador solo necesita "type", "data.section" y "data.modules"; parse_payload saca
+# esos campos y regresa además los módulos como los bytes JSON que se guardan en el archivo
+# de la ejecución (spill) y en la caché, sin volver a serializarlos.
+#
+# Si orjson está instalado se usa para parsear y serializar (varias veces más rápido); si no,
+# se recorre el objeto con el scanner en C de json y los módulos se cortan tal cual del cuerpo.
+
+BACKEND = "orjson" if orjson else "json"  # lo reporta benchmark.py
+
+_decoder = json.JSONDecoder()
+_scan_once = _decoder.scan_once
+_ws = WHITESPACE.match
+
+# Campos que se recorren por dentro: {"data": {}} = los miembros de "data" se separan uno por uno
+PAYLOAD_FIELDS = {"data": {}}
+
+
+def loads(data):
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj):
+    #JSON compacto en bytes UTF-8 (mismo formato que spill.encode_modules)
+    if orjson:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:  # p. ej. enteros de más de 64 bits
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_sorted(obj):
+    #JSON compacto con llaves ordenadas, para las huellas de fingerprint.py.
+    #orjson y json solo difieren en floats con exponente (1e20 frente a 1e+20).
+    if orjson:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _object_fields(s, idx, nested):
+    #Recorre el objeto que empieza en s[idx] y regresa ({llave: (valor, inicio, fin)}, fin).
+    #Las llaves de nested se recorren igual, por dentro; el resto se lee con el scanner de json.
+    fields = {}
+    idx = _ws(s, idx + 1).end()
+    if s[idx] == "}":
+        return fields, idx + 1
+    while True:
+        if s[idx] != '"':
+            raise ValueError(f"Se esperaba una llave en la posición {idx}")
+        key, idx = scanstring(s, idx + 1)
+        idx = _ws(s, idx).end()
+        if s[idx] != ":":
+            raise ValueError(f"Se esperaba ':' en la posición {idx}")
+        idx = _ws(s, idx + 1).end()
+        start = idx
+        if key in nested and s[idx] == "{":
+            value, idx = _object_fields(s, idx, nested[key])
+        else:
+            try:
+                value, idx = _scan_once(s, idx)
+            except StopIteration:
+                raise ValueError(f"Valor inválido en la posición {idx}") from None
+        fields[key] = (value, start, idx)
+        idx = _ws(s, idx).end()
+        if s[idx] == ",":
+            idx = _ws(s, idx + 1).end()
+        elif s[idx] == "}":
+            return fields, idx + 1
+        else:
+            raise ValueError(f"Se esperaba ',' o '}}' en la posición {idx}")
+
+
+def parse_payload(body):
+    #Regresa (type, section, módulos, módulos como bytes JSON) de un payload de la API.
+    #Lanza ValueError si el cuerpo no es JSON válido.
+    if orjson:
+        api_data = orjson.loads(body)
+        if not isinstance(api_data, dict):
+            raise ValueError("El payload no es un objeto JSON")
+        data = api_data.get("data")
+        if not isinstance(data, dict):
+            return api_data.get("type"), None, [], b"[]"
+        modules = data.get("modules", [])
+        return api_data.get("type"), data.get("section"), modules, dumps(modules)
+
+    s = body.decode("utf-8") if isinstance(body, (bytes, bytearray)) else body
+    idx = _ws(s, 0).end()
+    if not s.startswith("{", idx):
+        json.loads(s)  # si ni siquiera es JSON válido, que lo diga json
+        raise ValueError("El payload no es un objeto JSON")
+    try:
+        fields, end = _object_fields(s, idx, PAYLOAD_FIELDS)
+    except IndexError:
+        raise ValueError("JSON incompleto") from None
+    if _ws(s, end).end() != len(s):
+        raise ValueError(f"Datos extra en la posición {end}")
+
+    api_type = fields["type"][0] if "type" in fields else None
+    data = fields.get("data")
+    if data is None or not isinstance(data[0], dict):
+        return api_type, None, [], b"[]"
+    data_fields = data[0]
+    section = data_fields["section"][0] if "section" in data_fields else None
+    if "modules" not in data_fields:
+        return api_type, section, [], b"[]"
+    modules, start, end = data_fields["modules"]
+    return api_type, section, modules, s[start:end].encode("utf-8")
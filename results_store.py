@@ -0,0 +1,329 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+
+from spill import modules_bytes
+from timing import latency_summary
+
+# Historial de ejecuciones en SQLite.
+# Cada ejecución (run) guarda sus resultados con índices por (sitio, slug, run), por
+# (run, sitio, posición) y por (status, run), así la interfaz encuentra el resultado de una
+# fila, consulta las últimas N ejecuciones de un slug, busca los resultados con un status
+# y exporta una ejecución sin recorrer listas en memoria.
+# Los módulos de cada resultado van comprimidos en una tabla aparte para que la tabla
+# principal se mantenga angosta, junto con las huellas de cada módulo (ver fingerprint.py);
+# el hash de todo el slug queda en la tabla principal para comparar ejecuciones rápido.
+# La retención borra las ejecuciones más viejas.
+# add_result no bloquea a quien lo llama (el hilo del motor): un hilo escritor comprime
+# los módulos e inserta los resultados en lotes, con un commit por lote.
+
+DEFAULT_DB_PATH = "checkfront_history.db"
+DEFAULT_KEEP_RUNS = 100
+HISTORY_LIMIT = 20
+WRITE_BATCH = 50  # resultados por commit del hilo escritor
+
+# Columnas propias de la tabla; el resto del resultado va en "extra" como JSON
+RESULT_COLUMNS = ("name", "slug", "status", "type", "section", "modules", "modules_ok", "expectations", "fingerprint")
+SKIPPED_FIELDS = ("modules_list", "modules_ref", "modules_raw", "module_hashes")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL,
+    engine TEXT,
+    sites TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    site TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    slug TEXT,
+    status,
+    type TEXT,
+    section TEXT,
+    modules INTEGER,
+    modules_ok TEXT,
+    expectations TEXT,
+    fingerprint TEXT,
+    total_ms REAL,
+    ok INTEGER NOT NULL,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS result_modules (
+    result_id INTEGER PRIMARY KEY REFERENCES results(id) ON DELETE CASCADE,
+    body BLOB NOT NULL,
+    hashes TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_site_slug_run ON results (site, slug, run_id);
+CREATE INDEX IF NOT EXISTS idx_results_status ON results (status, run_id);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id, site, position);
+"""
+
+# Columnas agregadas después de la primera versión del historial: (tabla, columna, tipo)
+MIGRATIONS = (
+    ("results", "fingerprint", "TEXT"),
+    ("result_modules", "hashes", "TEXT"),
+    ("results", "total_ms", "REAL"),
+)
+
+
+class StoreRef:
+    #Referencia a los módulos guardados de un resultado; se leen al pedirlos
+    __slots__ = ("store", "result_id")
+
+    def __init__(self, store, result_id):
+        self.store = store
+        self.result_id = result_id
+
+    def read(self):
+        return self.store.modules_bytes(self.result_id)
+
+
+class ResultsStore:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        # La conexión se comparte entre el hilo del motor y el de la interfaz
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._queue = None  # resultados pendientes del hilo escritor
+        self._writer = None
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+            self._conn.commit()
+
+    def _migrate(self):
+        for table, column, kind in MIGRATIONS:
+            columns = [row["name"] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+
+    def close(self):
+        if self._writer:
+            self.flush()
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        with self._lock:
+            self._conn.close()
+
+    def start_run(self, engine, sites):
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (started, engine, sites) VALUES (?, ?, ?)",
+                (time.time(), engine, json.dumps(list(sites), ensure_ascii=False))
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def finish_run(self, run_id):
+        self.flush()
+        with self._lock:
+            self._conn.execute("UPDATE runs SET finished = ? WHERE id = ?", (time.time(), run_id))
+            self._conn.commit()
+
+    def _row(self, run_id, site, position, result, ok):
+        #Valores de las dos tablas para un resultado; aquí se comprimen los módulos
+        extra = {k: v for k, v in result.items() if k not in RESULT_COLUMNS and k not in SKIPPED_FIELDS}
+        body = zlib.compress(modules_bytes(result))
+        hashes = json.dumps(result.get("module_hashes", []), separators=(",", ":"))
+        # El total también va en su propia columna para los percentiles de la ejecución
+        total_ms = (result.get("timing") or {}).get("total_ms")
+        values = ((run_id, site, position) + tuple(result.get(column) for column in RESULT_COLUMNS)
+                  + (total_ms, int(bool(ok)), json.dumps(extra, ensure_ascii=False)))
+        return values, body, hashes
+
+    def _insert(self, values, body, hashes):
+        cursor = self._conn.execute(
+            "INSERT INTO results (run_id, site, position, name, slug, status, type, section, modules,"
+            " modules_ok, expectations, fingerprint, total_ms, ok, extra)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            values
+        )
+        self._conn.execute(
+            "INSERT INTO result_modules (result_id, body, hashes) VALUES (?, ?, ?)", (cursor.lastrowid, body, hashes)
+        )
+        return cursor.lastrowid
+
+    def add_result(self, run_id, site, position, result, ok):
+        #Encola un resultado; el hilo escritor lo guarda con sus módulos comprimidos y
+        #find_result lo encuentra en cuanto se escribe (flush() espera a los pendientes). Una vez guardados, los bytes
+        #de los módulos (modules_raw) se sueltan del resultado: se leen del historial.
+        if self._writer is None:
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._write_queued, name="checkfront-history", daemon=True)
+            self._writer.start()
+        self._queue.put((run_id, site, position, result, ok))
+
+    def _write_queued(self):
+        # Espera un resultado y se lleva de una vez los que ya estén en la cola, hasta WRITE_BATCH
+        while True:
+            items = [self._queue.get()]
+            while len(items) < WRITE_BATCH:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in items
+            try:
+                rows = [self._row(*item) for item in items if item is not None]
+                with self._lock:
+                    for row in rows:
+                        self._insert(*row)
+                    self._conn.commit()
+                for item in items:
+                    if item is not None:
+                        item[3].pop("modules_raw", None)
+            except Exception as e:
+                # El hilo sigue vivo: flush() no debe quedarse esperando
+                print(f"No se pudo guardar en el historial: {e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        #Espera a que el hilo escritor guarde los resultados pendientes
+        if self._writer:
+            self._queue.join()
+
+    def _to_result(self, row):
+        result = {column: row[column] for column in RESULT_COLUMNS}
+        result.update(json.loads(row["extra"] or "{}"))
+        result["modules_ref"] = StoreRef(self, row["id"])
+        return result
+
+    def find_result(self, run_id, site, position):
+        #Resultado de un slug de una ejecución por su posición en la configuración
+        self.flush()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM results WHERE run_id = ? AND site = ? AND position = ?", (run_id, site, position)
+            ).fetchone()
+        return self._to_result(row) if row else None
+
+    def modules_bytes(self, result_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM result_modules WHERE result_id = ?", (result_id,)
+            ).fetchone()
+        return zlib.decompress(row["body"]) if row else b"[]"
+
+    def module_hashes(self, result_id):
+        #Árbol de huellas de los módulos de un resultado (ver fingerprint.py)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hashes FROM result_modules WHERE result_id = ?", (result_id,)
+            ).fetchone()
+        return json.loads(row["hashes"]) if row and row["hashes"] else []
+
+    def run_fingerprints(self, run_id):
+        #{(sitio, slug): (id del resultado, fingerprint)} de una ejecución, sin leer módulos
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, site, slug, fingerprint FROM results WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        return {(row["site"], row["slug"]): (row["id"], row["fingerprint"]) for row in rows}
+
+    def previous_run(self, run_id):
+        #Id de la ejecución terminada más reciente antes de run_id que probó alguno
+        #de sus sitios, o None
+        with self._lock:
+            run = self._conn.execute("SELECT sites FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if run is None:
+                return None
+            sites = set(json.loads(run["sites"] or "[]"))
+            rows = self._conn.execute(
+                "SELECT id, sites FROM runs WHERE id < ? AND finished IS NOT NULL ORDER BY id DESC", (run_id,)
+            )
+            for row in rows:
+                if sites & set(json.loads(row["sites"] or "[]")):
+                    return row["id"]
+        return None
+
+    def run_results(self, run_id):
+        #{sitio: resultados} de una ejecución, en el orden de la configuración
+        self.flush()
+        with self._lock:
+            run = self._conn.execute("SELECT sites FROM runs WHERE id = ?", (run_id,)).fetchone()
+            rows = self._conn.execute(
+                "SELECT * FROM results WHERE run_id = ? ORDER BY site, position", (run_id,)
+            ).fetchall()
+        grouped = {site: [] for site in json.loads(run["sites"])} if run else {}
+        for row in rows:
+            grouped.setdefault(row["site"], []).append(self._to_result(row))
+        return {site: results for site, results in grouped.items() if results}
+
+    def run_summary(self, run_id):
+        #Conteos de la ejecución calculados en SQLite, más p50/p95/max de total_ms
+        self.flush()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS total,"
+                " SUM(status = 200) AS success,"
+                " SUM(modules_ok = 'Existen Modulos') AS modules_ok,"
+                " SUM(expectations = 'FALLA') AS expectation_failures,"
+                " SUM(status = 'SKIPPED') AS skipped,"
+                " SUM(ok) AS ok"
+                " FROM results WHERE run_id = ?",
+                (run_id,)
+            ).fetchone()
+            latencies = [r[0] for r in self._conn.execute(
+                "SELECT total_ms FROM results WHERE run_id = ? AND total_ms IS NOT NULL ORDER BY total_ms",
+                (run_id,)
+            )]
+        summary = {key: row[key] or 0 for key in row.keys()}
+        summary.update(latency_summary(latencies))
+        return summary
+
+    def slug_history(self, site, slug, limit=HISTORY_LIMIT):
+        #Últimas ejecuciones de un slug, de la más reciente a la más vieja: [(run_id, inicio, resultado)]
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT results.*, runs.started FROM results JOIN runs ON runs.id = results.run_id"
+                " WHERE results.site = ? AND results.slug = ? ORDER BY results.run_id DESC LIMIT ?",
+                (site, slug, limit)
+            ).fetchall()
+        return [(row["run_id"], row["started"], self._to_result(row)) for row in rows]
+
+    def status_results(self, status, run_id=None, limit=HISTORY_LIMIT):
+        #Resultados con un status dado (p. ej. 404 o "ERROR") de una ejecución, o de las más
+        #recientes a las más viejas si no se indica; usa el índice por (status, run):
+        #[(run_id, sitio, resultado)]
+        self.flush()
+        if run_id is None:
+            query = "SELECT * FROM results WHERE status = ? ORDER BY run_id DESC, site, position LIMIT ?"
+            params = (status, limit)
+        else:
+            query = "SELECT * FROM results WHERE status = ? AND run_id = ? ORDER BY site, position"
+            params = (status, run_id)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [(row["run_id"], row["site"], self._to_result(row)) for row in rows]
+
+    def prune(self, keep_runs=DEFAULT_KEEP_RUNS, max_age_days=None):
+        #Retención: conserva las últimas keep_runs ejecuciones y, opcionalmente,
+        #borra las más viejas que max_age_days. Regresa cuántas ejecuciones se borraron.
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM runs WHERE id NOT IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)",
+                (keep_runs,)
+            ).rowcount
+            if max_age_days is not None:
+                deleted += self._conn.execute(
+                    "DELETE FROM runs WHERE started < ?", (time.time() - max_age_days * 86400,)
+                ).rowcount
+            self._conn.commit()
+        return deleted
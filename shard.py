@@ -0,0 +1,422 @@
+import argparse
+import concurrent.futures
+import json
+import os
+import shutil
+import socket
+import sys
+import time
+from multiprocessing import get_context
+
+from checker import (
+    BREAKER_THRESHOLD,
+    CONFIG_PATH,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_ENGINE,
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+    ENGINE_HTTP,
+    ENGINE_PLAYWRIGHT,
+    EXIT_FAILURES,
+    EXIT_OK,
+    EXIT_USAGE,
+    emit,
+    load_config,
+    result_ok,
+    select_sites,
+)
+from engine import CheckEngine
+from exporter import encode, encode_result, export_results, summarize
+from spill import SpillStore, modules_bytes
+
+# Ejecución repartida en varios procesos (o máquinas) con una cola de archivos.
+# Un solo proceso con un solo loop de asyncio no usa más de un núcleo para parsear y sacar
+# huellas de payloads grandes; aquí el coordinador parte los slugs en shards y los trabajadores
+# los toman de un directorio compartido:
+#
+#   <cola>/<ejecución>/jobs/0001.json       shard pendiente: un sitio y un grupo de sus slugs
+#   <cola>/<ejecución>/claimed/0001.json.W  tomado por el trabajador W (rename atómico)
+#   <cola>/<ejecución>/results/0001.results resultados del shard
+#   <cola>/<ejecución>/STOP                 la ejecución terminó; los trabajadores locales salen
+#
+# Cada trabajador usa el motor caliente (engine.CheckEngine) y mantiene su shard "vivo" tocando
+# el archivo tomado; si deja de hacerlo por más de SHARD_LEASE segundos (se cayó), el coordinador
+# regresa el shard a jobs/. Los resultados se juntan en el orden de la configuración con el mismo
+# esquema de export_results; los módulos se copian como bytes, sin volver a parsearlos.
+#
+#   python shard.py run --all --workers 4 --output resultados.ndjson.gz
+#   python shard.py run --all --workers 0 --queue-dir /mnt/compartido/cola   (solo trabajadores remotos)
+#   python shard.py worker /mnt/compartido/cola                               (en cada máquina)
+#
+# El límite de concurrencia es por trabajador: con N trabajadores un host recibe hasta N veces
+# --concurrency peticiones a la vez.
+
+DEFAULT_QUEUE_DIR = ".checkfront_queue"
+DEFAULT_SHARD_SIZE = 8  # slugs por shard
+SHARD_LEASE = 60  # segundos sin señal antes de dar un shard por abandonado
+HEARTBEAT = SHARD_LEASE / 4
+POLL_INTERVAL = 0.2
+
+JOBS_DIR = "jobs"
+CLAIMED_DIR = "claimed"
+RESULTS_DIR = "results"
+STOP_FILE = "STOP"
+RESULTS_SUFFIX = ".results"
+
+
+def make_shards(sites, shard_size=DEFAULT_SHARD_SIZE, options=None):
+    #Parte {sitio: configuración} en shards de hasta shard_size slugs; cada shard es de un solo
+    #sitio (así comparte conexiones y la carga de la URL base) y guarda la posición original de sus slugs
+    shards = []
+    for site, config in sites.items():
+        slugs = list(config["slugs"].items())
+        for start in range(0, len(slugs), shard_size):
+            chunk = slugs[start:start + shard_size]
+            shards.append({
+                "site": site,
+                "config": dict(config, slugs=dict(chunk)),
+                "indexes": list(range(start, start + len(chunk))),
+                "options": options or {},
+            })
+    return shards
+
+
+def new_run_dir(queue_dir):
+    run_dir = os.path.join(queue_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    for name in (JOBS_DIR, CLAIMED_DIR, RESULTS_DIR):
+        os.makedirs(os.path.join(run_dir, name))
+    return run_dir
+
+
+def enqueue(run_dir, shards):
+    #Escribe cada shard con un temporal + rename, para que nadie tome uno a medias
+    names = []
+    for number, shard in enumerate(shards, 1):
+        name = f"{number:04d}.json"
+        tmp_path = os.path.join(run_dir, f".{name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(shard, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(run_dir, JOBS_DIR, name))
+        names.append(name)
+    return names
+
+
+def active_runs(queue_dir):
+    #Ejecuciones con trabajo posible: queue_dir mismo si es una ejecución, o sus subdirectorios
+    if os.path.isdir(os.path.join(queue_dir, JOBS_DIR)):
+        candidates = [queue_dir]
+    else:
+        try:
+            candidates = [os.path.join(queue_dir, name) for name in sorted(os.listdir(queue_dir))]
+        except FileNotFoundError:
+            return []
+    return [
+        run_dir for run_dir in candidates
+        if os.path.isdir(os.path.join(run_dir, JOBS_DIR)) and not os.path.exists(os.path.join(run_dir, STOP_FILE))
+    ]
+
+
+def claim_shard(queue_dir, worker_id):
+    #Toma el siguiente shard pendiente con un rename atómico: (ejecución, nombre, ruta tomada) o None
+    for run_dir in active_runs(queue_dir):
+        jobs = os.path.join(run_dir, JOBS_DIR)
+        try:
+            names = sorted(os.listdir(jobs))
+        except FileNotFoundError:
+            continue
+        for name in names:
+            claimed = os.path.join(run_dir, CLAIMED_DIR, f"{name}.{worker_id}")
+            try:
+                os.rename(os.path.join(jobs, name), claimed)
+            except FileNotFoundError:
+                continue  # otro trabajador lo tomó primero
+            os.utime(claimed)  # rename conserva la fecha vieja; el plazo empieza ahora
+            return run_dir, name, claimed
+    return None
+
+
+def write_record(out, site, index, result):
+    #Resumen en una línea con "modules_bytes" y luego los módulos tal cual: los bytes del
+    #payload pueden traer saltos de línea, así que van con su longitud y no como otra línea
+    modules = modules_bytes(result)
+    record = summarize(result)
+    record.update(site=site, index=index, modules_bytes=len(modules))
+    out.write(encode(record).encode("utf-8") + b"\n" + modules + b"\n")
+
+
+def read_records(path):
+    #Registros de un archivo de resultados: (sitio, posición, resultado con modules_raw) o
+    #(sitio, None, {"error": ...}) si el sitio completo falló
+    with open(path, "rb") as f:
+        for line in f:
+            record = json.loads(line)
+            size = record.pop("modules_bytes", None)
+            if size is None:
+                yield record["site"], None, record
+                continue
+            record["modules_raw"] = f.read(size)
+            f.readline()
+            yield record.pop("site"), record.pop("index"), record
+
+
+def run_shard(engine, run_dir, name, claimed):
+    #Corre un shard en el motor del trabajador y deja sus resultados en results/.
+    #Si el shard deja de ser suyo (el coordinador lo volvió a encolar o borró la ejecución)
+    #lo abandona y regresa False.
+    with open(claimed, "r", encoding="utf-8") as f:
+        shard = json.load(f)
+    site = shard["site"]
+    indexes = shard["indexes"]
+    options = shard["options"]
+    results_path = os.path.join(run_dir, RESULTS_DIR, name[:-len(".json")] + RESULTS_SUFFIX)
+    tmp_path = f"{results_path}.{os.getpid()}.tmp"
+
+    spill = SpillStore()
+    try:
+        with open(tmp_path, "wb") as out:
+            def on_result(site, result, index):
+                # Un shard abandonado puede entregar resultados mientras se cancela
+                if not out.closed:
+                    write_record(out, site, indexes[index], result)
+
+            future = engine.run_sites(
+                {site: shard["config"]},
+                on_result,
+                options.get("concurrency", DEFAULT_CONCURRENCY),
+                options.get("engine", DEFAULT_ENGINE),
+                options.get("timeout", DEFAULT_TIMEOUT),
+                spill=spill,
+                retries=options.get("retries", DEFAULT_RETRIES),
+                breaker_threshold=options.get("breaker", BREAKER_THRESHOLD)
+            )
+            while True:
+                try:
+                    _, errors = future.result(HEARTBEAT)
+                    break
+                except concurrent.futures.TimeoutError:
+                    try:
+                        os.utime(claimed)
+                    except OSError as e:
+                        future.cancel()
+                        print(f"Shard {name} abandonado: {e}", file=sys.stderr)
+                        return False
+            for error_site, error in errors.items():
+                out.write(encode({"site": error_site, "error": str(error)}).encode("utf-8") + b"\n")
+        try:
+            os.replace(tmp_path, results_path)
+        except OSError as e:
+            print(f"No se pudieron guardar los resultados del shard {name}: {e}", file=sys.stderr)
+            return False
+    finally:
+        spill.close()
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass  # ya se movió a results/, o la ejecución se borró
+    try:
+        os.remove(claimed)
+    except FileNotFoundError:
+        pass  # el coordinador ya lo había dado por abandonado
+    return True
+
+
+def worker(queue_dir, idle_exit=None):
+    #Toma shards de queue_dir (una ejecución o el directorio de la cola) hasta que la ejecución
+    #termine (STOP) o pasen idle_exit segundos sin trabajo
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    engine = CheckEngine()
+    idle_since = time.monotonic()
+    try:
+        while True:
+            claimed = claim_shard(queue_dir, worker_id)
+            if claimed:
+                # Un shard que falla no tumba al trabajador: el coordinador lo vuelve a encolar
+                # cuando venza su plazo
+                try:
+                    run_shard(engine, *claimed)
+                except Exception as e:
+                    print(f"Error en el shard {claimed[1]}: {type(e).__name__} {e}", file=sys.stderr)
+                idle_since = time.monotonic()
+                continue
+            if os.path.exists(os.path.join(queue_dir, STOP_FILE)):
+                return
+            if idle_exit is not None and time.monotonic() - idle_since > idle_exit:
+                return
+            time.sleep(POLL_INTERVAL)
+    finally:
+        engine.shutdown()
+
+
+def requeue_stale(run_dir, lease=SHARD_LEASE):
+    #Regresa a jobs/ los shards cuyo trabajador dejó de dar señal; regresa cuántos
+    claimed_dir = os.path.join(run_dir, CLAIMED_DIR)
+    requeued = 0
+    now = time.time()
+    for entry in os.scandir(claimed_dir):
+        try:
+            stale = now - entry.stat().st_mtime > lease
+        except FileNotFoundError:
+            continue
+        if not stale:
+            continue
+        name = entry.name.split(".json.", 1)[0] + ".json"
+        try:
+            os.rename(entry.path, os.path.join(run_dir, JOBS_DIR, name))
+        except FileNotFoundError:
+            continue
+        print(f"Shard {name} abandonado por {entry.name[len(name) + 1:]}; se vuelve a encolar", file=sys.stderr)
+        requeued += 1
+    return requeued
+
+
+class Coordinator:
+    #Encola los shards de una ejecución, arranca los trabajadores locales y junta los resultados
+    def __init__(self, sites, workers=1, shard_size=DEFAULT_SHARD_SIZE, queue_dir=DEFAULT_QUEUE_DIR, options=None,
+                 on_result=None):
+        self.sites = sites
+        self.workers = workers
+        self.shard_size = shard_size
+        self.queue_dir = queue_dir
+        self.options = options or {}
+        self.on_result = on_result
+        self.spill = SpillStore()
+        self.errors = {}
+
+    def run(self, keep_queue=False):
+        #Regresa ({sitio: resultados en orden}, {sitio: error}), como checker.check_sites
+        run_dir = new_run_dir(self.queue_dir)
+        pending = set(name[:-len(".json")] for name in enqueue(
+            run_dir, make_shards(self.sites, self.shard_size, self.options)
+        ))
+        ordered = {site: [None] * len(config["slugs"]) for site, config in self.sites.items()}
+
+        context = get_context("spawn")
+        processes = [context.Process(target=worker, args=(run_dir,), daemon=True) for _ in range(self.workers)]
+        for process in processes:
+            process.start()
+        try:
+            results_dir = os.path.join(run_dir, RESULTS_DIR)
+            while pending:
+                merged = False
+                for entry in os.scandir(results_dir):
+                    shard = entry.name[:-len(RESULTS_SUFFIX)]
+                    if entry.name.endswith(RESULTS_SUFFIX) and shard in pending:
+                        self.merge(entry.path, ordered)
+                        pending.discard(shard)
+                        merged = True
+                if merged:
+                    continue
+                requeue_stale(run_dir)
+                if processes and not any(process.is_alive() for process in processes):
+                    raise RuntimeError("Todos los trabajadores locales terminaron con shards pendientes")
+                time.sleep(POLL_INTERVAL)
+        finally:
+            with open(os.path.join(run_dir, STOP_FILE), "w"):
+                pass
+            for process in processes:
+                process.join(SHARD_LEASE)
+            if not keep_queue:
+                shutil.rmtree(run_dir, ignore_errors=True)
+
+        results = {
+            site: [result for result in results if result is not None]
+            for site, results in ordered.items()
+            if site not in self.errors
+        }
+        return results, self.errors
+
+    def merge(self, path, ordered):
+        for site, index, result in read_records(path):
+            if index is None:
+                self.errors[site] = result["error"]
+                continue
+            # Los módulos pasan al archivo de la ejecución; en memoria solo queda el resumen
+            result["modules_ref"] = self.spill.put(result.pop("modules_raw"))
+            ordered[site][index] = result
+            if self.on_result:
+                self.on_result(site, result, index)
+
+    def close(self):
+        self.spill.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Verificación repartida en varios procesos o máquinas")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Coordinar una ejecución")
+    run_parser.add_argument("sites", nargs="*", help="Nombres de sitios de la configuración")
+    run_parser.add_argument("--all", action="store_true", help="Probar todos los sitios")
+    run_parser.add_argument("--config", default=CONFIG_PATH, help="Archivo de configuración")
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Trabajadores locales (0: solo trabajadores remotos)")
+    run_parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="Slugs por shard")
+    run_parser.add_argument("--queue-dir", default=DEFAULT_QUEUE_DIR, help="Directorio de la cola")
+    run_parser.add_argument("--keep-queue", action="store_true", help="No borrar la ejecución de la cola al terminar")
+    run_parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                            help="Peticiones simultáneas por host en cada trabajador")
+    run_parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Segundos por petición")
+    run_parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Reintentos por fallas transitorias")
+    run_parser.add_argument("--breaker", type=int, default=BREAKER_THRESHOLD,
+                            help="Fallas seguidas de un host antes de omitir sus slugs (0 lo desactiva)")
+    run_parser.add_argument("--engine", choices=(ENGINE_HTTP, ENGINE_PLAYWRIGHT), default=DEFAULT_ENGINE)
+    run_parser.add_argument("--output", help="Exportar a un archivo (.json, .ndjson, .ndjson.gz)")
+    run_parser.add_argument("--summary", action="store_true", help="Exportar sin modules_list")
+
+    worker_parser = commands.add_parser("worker", help="Tomar shards de una cola compartida")
+    worker_parser.add_argument("queue_dir", nargs="?", default=DEFAULT_QUEUE_DIR, help="Directorio de la cola")
+    worker_parser.add_argument("--idle-exit", type=float, help="Salir tras estos segundos sin trabajo")
+    return parser
+
+
+def run(args):
+    if args.command == "worker":
+        try:
+            worker(args.queue_dir, args.idle_exit)
+        except KeyboardInterrupt:
+            pass
+        return EXIT_OK
+
+    config = load_config(args.config)
+    if not config:
+        return EXIT_USAGE
+    sites = select_sites(config, args.sites, args.all)
+    if sites is None:
+        return EXIT_USAGE
+
+    failures = 0
+
+    def on_result(site, result, index):
+        nonlocal failures
+        if not result_ok(result):
+            failures += 1
+        emit(encode_result(result, True, site))
+
+    options = {
+        "concurrency": max(1, args.concurrency),
+        "engine": args.engine,
+        "timeout": args.timeout,
+        "retries": max(0, args.retries),
+        "breaker": max(0, args.breaker),
+    }
+    coordinator = Coordinator(sites, max(0, args.workers), max(1, args.shard_size), args.queue_dir, options, on_result)
+    try:
+        site_results, errors = coordinator.run(args.keep_queue)
+        if args.output:
+            export_results(args.output, site_results, args.summary)
+    except (OSError, RuntimeError) as e:
+        print(f"Error en la ejecución repartida: {e}", file=sys.stderr)
+        return EXIT_FAILURES
+    finally:
+        coordinator.close()
+    for site, error in errors.items():
+        emit({"site": site, "error": error})
+    return EXIT_FAILURES if failures or errors else EXIT_OK
+
+
+def main(argv=None):
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import tempfile
+import threading
+
+from payload import dumps, loads
+
+# Almacenamiento de modules_list fuera de memoria.
+# Los resultados en memoria solo conservan los campos del resumen; los módulos de cada slug
+# se escriben como bytes JSON en un archivo temporal de la ejecución y el resultado guarda
+# un SpillRef (desplazamiento y longitud). Solo se parsean cuando alguien los pide, por
+# ejemplo al abrir la ventana de detalle, o se copian tal cual al exportar.
+# Lo usan los modos de consola (cli.py, shard.py). La interfaz no: sus resultados van al
+# historial SQLite (results_store.py), cuyo hilo escritor comprime los bytes y los suelta.
+
+
+def encode_modules(modules):
+    return dumps(modules)
+
+
+class SpillRef:
+    __slots__ = ("store", "offset", "length")
+
+    def __init__(self, store, offset, length):
+        self.store = store
+        self.offset = offset
+        self.length = length
+
+    def read(self):
+        return self.store.read(self.offset, self.length)
+
+
+class SpillStore:
+    #Archivo temporal de solo-agregar; se borra solo al cerrarse
+    def __init__(self, directory=None):
+        self._file = tempfile.TemporaryFile(prefix="checkfront-", suffix=".spill", dir=directory)
+        self._lock = threading.Lock()
+        self._size = 0
+
+    def put(self, data):
+        with self._lock:
+            self._file.seek(self._size)
+            self._file.write(data)
+            offset = self._size
+            self._size += len(data)
+        return SpillRef(self, offset, len(data))
+
+    def read(self, offset, length):
+        with self._lock:
+            self._file.flush()
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    @property
+    def size(self):
+        return self._size
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def pack_modules(result, spill=None):
+    #Deja el resultado en su forma compacta: con spill, los módulos se van al archivo
+    #(modules_ref); sin spill, se quedan solo como bytes JSON (modules_raw), sin la lista
+    #ya parseada, y load_modules los parsea de nuevo si alguien los pide.
+    if spill is None:
+        if "modules_raw" in result:
+            result.pop("modules_list", None)
+        return result
+    raw = result.pop("modules_raw", None)
+    if raw is None:
+        raw = encode_modules(result.get("modules_list", []))
+    result.pop("modules_list", None)
+    result["modules_ref"] = spill.put(raw)
+    return result
+
+
+def load_modules(result):
+    #Lista de módulos del resultado, parseándola desde el archivo si hace falta
+    if "modules_list" in result:
+        return result["modules_list"]
+    ref = result.get("modules_ref")
+    if ref is not None:
+        return loads(ref.read())
+    raw = result.get("modules_raw")
+    if raw is not None:
+        return loads(raw)
+    return []
+
+
+def modules_bytes(result):
+    #Módulos del resultado como bytes JSON, sin parsearlos si están en el archivo
+    ref = result.get("modules_ref")
+    if ref is not None:
+        return ref.read()
+    raw = result.get("modules_raw")
+    if raw is not None:
+        return raw
+    return dumps(result.get("modules_list", []))
+
+
+def modules_json(result):
+    return modules_bytes(result).decode("utf-8")
@@ -0,0 +1,75 @@
+import pytest
+
+import checker
+from benchmark import ReplayServer, measure
+from checker import CircuitBreaker
+
+API = "https://api.example.com/v2/home"
+OTHER = "https://otra.example.com/v2/home"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(checker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_threshold_consecutive_failures(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    breaker.record(API, False)
+    breaker.record(API, False)
+    breaker.record(API, True)  # un éxito reinicia la cuenta
+    breaker.record(API, False)
+    breaker.record(API, False)
+    assert breaker.allow(API)
+    breaker.record(API, False)
+    assert breaker.is_open(API)
+    assert not breaker.allow(API)
+    # Otro host, o el mismo host con otra ruta
+    assert breaker.allow(OTHER)
+    assert not breaker.allow("https://api.example.com:443/v2/otra")
+
+
+def test_half_open_lets_one_probe_per_cooldown(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.record(API, False)
+    clock[0] += 29
+    assert not breaker.allow(API)
+    clock[0] += 1
+    assert breaker.allow(API)
+    assert not breaker.allow(API)  # solo una petición de prueba
+
+    # La prueba falla: sigue abierto otro cooldown
+    breaker.record(API, False)
+    assert breaker.is_open(API)
+    clock[0] += 30
+    assert breaker.allow(API)
+
+    # La prueba pasa: se cierra
+    breaker.record(API, True)
+    assert not breaker.is_open(API)
+    assert breaker.allow(API) and breaker.allow(API)
+
+
+@pytest.fixture
+def failing_server():
+    server = ReplayServer({"/": (200, b'{"data":{"modules":[]}}')}, error_rate=1.0).start()
+    yield server
+    server.stop()
+
+
+def test_benchmark_sends_every_request(failing_server):
+    # Sin reintentos ni breaker, cada slug se pide una vez aunque todos fallen
+    config = failing_server.site_config({"Home": "/"}, copies=12)
+    report = measure(config, checker.ENGINE_HTTP, 4, 5)
+    assert report["skipped"] == 0
+    assert report["statuses"] == {"500": 12}
+    assert failing_server.requests == 12
+
+
+def test_benchmark_breaker_flag_skips_slugs(failing_server):
+    config = failing_server.site_config({"Home": "/"}, copies=12)
+    report = measure(config, checker.ENGINE_HTTP, 1, 5, retries=0, breaker_threshold=2)
+    assert report["skipped"] == 10
+    assert failing_server.requests == 2
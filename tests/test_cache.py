@@ -0,0 +1,132 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from cache import ResponseCache
+from checker import HttpClient, HttpResponse, build_result_from_body, check_slug_http
+
+URL = "https://api.example.com/v2/deportes"
+BODY = b'{"type":"Board","data":{"section":"Deportes","modules":[{"id":1,"type":"lr_list"}]}}'
+HEADERS = {"etag": '"v1"', "last-modified": "Tue, 01 Oct 2024 10:00:00 GMT"}
+
+
+def store(cache, url=URL, body=BODY, headers=HEADERS):
+    response = HttpResponse(url, 200, headers, body)
+    result = build_result_from_body("Deportes", "/deportes", 200, body)
+    cache.store(url, response, result, result["modules_raw"])
+    return result
+
+
+def test_validators_come_from_stored_headers(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    assert cache.validators(URL) is None
+    store(cache)
+    assert cache.validators(URL) == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Tue, 01 Oct 2024 10:00:00 GMT",
+    }
+
+
+def test_not_modified_returns_stored_result(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    result = store(cache)
+    cached = cache.lookup(URL, HttpResponse(URL, 304, {}, b""))
+    assert cached["status"] == 200
+    assert cached["modules_raw"] == result["modules_raw"]
+    assert cached["module_index"] == result["module_index"]
+    assert cached["fingerprint"] == result["fingerprint"]
+
+
+def test_same_body_hits_and_changed_body_misses(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    store(cache)
+    assert cache.lookup(URL, HttpResponse(URL, 200, {}, BODY)) is not None
+    assert cache.lookup(URL, HttpResponse(URL, 200, {}, BODY.replace(b"Deportes", b"Otra"))) is None
+    assert cache.lookup(URL, HttpResponse(URL, 500, {}, BODY)) is None
+
+
+def test_only_200_responses_are_stored(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    result = build_result_from_body("Deportes", "/deportes", 200, BODY)
+    cache.store(URL, HttpResponse(URL, 404, HEADERS, BODY), result, result["modules_raw"])
+    assert cache.validators(URL) is None
+
+
+def test_entries_survive_a_new_instance(tmp_path):
+    store(ResponseCache(str(tmp_path)))
+    cache = ResponseCache(str(tmp_path))
+    assert cache.lookup(URL, HttpResponse(URL, 304, {}, b"")) is not None
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    store(cache, URL + "/1")
+    store(cache, URL + "/2")
+    # Usar la primera la deja como la más reciente
+    assert cache.lookup(URL + "/1", HttpResponse(URL, 304, {}, b"")) is not None
+    # Cabe una sola entrada (el tamaño de cada una varía unos bytes por la fecha guardada)
+    cache.max_bytes = cache._total * 3 // 4
+    store(cache, URL + "/1")
+    assert cache.validators(URL + "/1") is not None
+    assert cache.validators(URL + "/2") is None
+    assert cache._total <= cache.max_bytes
+
+
+class EtagHandler(BaseHTTPRequestHandler):
+    #Responde 304 a cualquier petición condicional y el cuerpo con su ETag a las demás
+    def do_GET(self):
+        self.server.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match"):
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def etag_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EtagHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class VanishingCache(ResponseCache):
+    #Otro slug u otro proceso borra la entrada justo después de mandar la petición condicional
+    def validators(self, url):
+        headers = super().validators(url)
+        if headers:
+            self._remove(self._key(url))
+        return headers
+
+
+def test_not_modified_without_entry_is_requested_again(tmp_path, etag_server):
+    site_config = {"api_base": f"http://127.0.0.1:{etag_server.server_port}"}
+
+    async def check(cache):
+        client = HttpClient()
+        try:
+            return await check_slug_http(client, site_config, "Deportes", "/deportes", cache)
+        finally:
+            client.close()
+
+    cache = VanishingCache(str(tmp_path))
+    assert asyncio.run(check(cache))["status"] == 200
+    result = asyncio.run(check(cache))
+    assert etag_server.requests == [None, '"v1"', None]
+    assert result["status"] == 200
+    assert result["modules"] == 1
+    # La respuesta completa vuelve a quedar en la caché
+    assert cache.validators(site_config["api_base"] + "/deportes") is not None
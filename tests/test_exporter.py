@@ -0,0 +1,106 @@
+import gzip
+import json
+
+import pytest
+
+from exporter import ResultWriter, export_results, read_export
+
+
+def make_result(name, modules=None):
+    return {"name": name, "slug": f"/{name}", "status": 200, "modules": 1,
+            "modules_list": modules if modules is not None else [{"id": name}]}
+
+
+@pytest.mark.parametrize("filename", ["out.json", "out.json.gz", "out.ndjson", "out.ndjson.gz"])
+def test_writer_round_trip_keeps_sites(tmp_path, filename):
+    path = str(tmp_path / filename)
+    with ResultWriter(path) as writer:
+        writer.write(make_result("a"), "Uno")
+        writer.write(make_result("b"), "Dos")
+        writer.write(make_result("c"), "Uno")
+    assert writer.count == 3
+
+    site_results = read_export(path)
+    assert {site: [r["name"] for r in results] for site, results in site_results.items()} == {
+        "Uno": ["a", "c"],
+        "Dos": ["b"],
+    }
+    assert site_results["Uno"][0]["modules_list"] == [{"id": "a"}]
+
+
+def test_writer_json_matches_export_results(tmp_path):
+    # La exportación en vivo y la final tienen el mismo esquema
+    live = tmp_path / "live.json"
+    final = tmp_path / "final.json"
+    site_results = {"Uno": [make_result("a"), make_result("c")], "Dos": [make_result("b")]}
+    with ResultWriter(str(live)) as writer:
+        writer.write(site_results["Uno"][0], "Uno")
+        writer.write(site_results["Dos"][0], "Dos")
+        writer.write(site_results["Uno"][1], "Uno")
+    export_results(str(final), site_results)
+    assert json.loads(live.read_text(encoding="utf-8")) == json.loads(final.read_text(encoding="utf-8"))
+
+
+def test_writer_json_uses_config_order(tmp_path):
+    # Los slugs terminan en cualquier orden; el JSON sale en el orden de la configuración
+    live = tmp_path / "live.json"
+    final = tmp_path / "final.json"
+    site_results = {"Uno": [make_result("a"), make_result("b"), make_result("c")], "Dos": [make_result("d")]}
+    with ResultWriter(str(live), sites=["Uno", "Dos", "Tres"]) as writer:
+        for site, index in [("Dos", 0), ("Uno", 2), ("Uno", 0), ("Uno", 1)]:
+            writer.write(site_results[site][index], site, index)
+    export_results(str(final), site_results)
+    assert live.read_text(encoding="utf-8") == final.read_text(encoding="utf-8")
+
+
+def test_single_site_json_is_a_list(tmp_path):
+    path = tmp_path / "out.json"
+    with ResultWriter(str(path)) as writer:
+        writer.write(make_result("a"), "Uno")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert isinstance(data, list)
+    assert "site" not in data[0]
+
+
+def test_empty_json_export(tmp_path):
+    path = tmp_path / "out.json"
+    ResultWriter(str(path)).close()
+    assert json.loads(path.read_text(encoding="utf-8")) == []
+
+
+def test_summary_only_drops_modules(tmp_path):
+    path = tmp_path / "out.ndjson.gz"
+    with ResultWriter(str(path), summary_only=True) as writer:
+        writer.write(dict(make_result("a"), module_hashes=[["x"]]), "Uno")
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        record = json.loads(f.readline())
+    assert record == {"name": "a", "slug": "/a", "status": 200, "modules": 1, "site": "Uno"}
+
+
+def test_writer_copies_module_bytes(tmp_path):
+    path = tmp_path / "out.json"
+    raw = b'[{"id":1,"title":"\xc3\xb1"}]'
+    with ResultWriter(str(path)) as writer:
+        writer.write({"name": "a", "slug": "/a", "status": 200, "modules_raw": raw})
+    assert json.loads(path.read_text(encoding="utf-8"))[0]["modules_list"] == [{"id": 1, "title": "ñ"}]
+
+
+def test_read_export_groups_flat_list_by_site(tmp_path):
+    # Exportaciones en vivo anteriores: una lista plana con "site" en cada registro
+    path = tmp_path / "flat.json"
+    path.write_text(json.dumps([
+        {"site": "Uno", "name": "Home", "slug": "/"},
+        {"site": "Dos", "name": "Home", "slug": "/"},
+        {"name": "Sin sitio", "slug": "/x"},
+    ]), encoding="utf-8")
+    site_results = read_export(str(path))
+    assert list(site_results) == ["Uno", "Dos", ""]
+    assert all("site" not in r for results in site_results.values() for r in results)
+
+
+def test_read_export_skips_site_errors(tmp_path):
+    path = tmp_path / "out.ndjson"
+    path.write_text(
+        '{"site":"Uno","name":"a","slug":"/a"}\n\n{"site":"Dos","error":"sin conexión"}\n', encoding="utf-8"
+    )
+    assert read_export(str(path)) == {"Uno": [{"name": "a", "slug": "/a"}]}
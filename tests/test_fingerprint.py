@@ -0,0 +1,100 @@
+import json
+
+from cli import main as cli_main
+from checker import EXIT_FAILURES, EXIT_OK
+from exporter import read_export
+from fingerprint import ADDED, CHANGED, REMOVED, diff_runs, export_fingerprints, fingerprint_modules, format_report
+
+OLD = [
+    {"id": 1, "type": "lr_list", "title": "Portada"},
+    {"id": 2, "type": "ctr_modules", "modules": [
+        {"id": 3, "type": "card", "title": "Nota"},
+        {"type": "banner"},
+    ]},
+]
+NEW = [
+    {"id": 1, "type": "lr_list", "title": "Portada"},
+    {"id": 2, "type": "ctr_modules", "modules": [
+        {"id": 3, "type": "card", "title": "Nota editada"},
+        {"id": 4, "type": "card"},
+    ]},
+]
+
+
+def fingerprints(site_modules):
+    #{(sitio, slug): (árbol de huellas, fingerprint)} como los que arma el historial
+    result = {}
+    for key, modules in site_modules.items():
+        fingerprint, nodes = fingerprint_modules(modules)
+        result[key] = (nodes, fingerprint)
+    return result
+
+
+def test_fingerprint_ignores_key_order():
+    reordered = [{"title": "Portada", "type": "lr_list", "id": 1}] + OLD[1:]
+    assert fingerprint_modules(reordered)[0] == fingerprint_modules(OLD)[0]
+    assert fingerprint_modules(NEW)[0] != fingerprint_modules(OLD)[0]
+
+
+def test_diff_reports_nested_changes_only():
+    report = diff_runs(
+        fingerprints({("Uno", "/"): OLD}),
+        fingerprints({("Uno", "/"): NEW}),
+        lambda nodes: nodes
+    )
+    assert report == {"Uno": {"/": [
+        (REMOVED, "id:2/banner#0"),
+        (CHANGED, "id:2/id:3"),
+        (ADDED, "id:2/id:4"),
+    ]}}
+
+
+def test_unchanged_slugs_do_not_load_hashes():
+    def load(nodes):
+        raise AssertionError("no debería cargar árboles sin cambios")
+
+    same = fingerprints({("Uno", "/"): OLD, ("Dos", "/"): OLD})
+    assert diff_runs(same, dict(same), load) == {}
+
+
+def test_added_and_removed_slugs():
+    report = diff_runs(
+        fingerprints({("Uno", "/viejo"): OLD}),
+        fingerprints({("Uno", "/nuevo"): OLD}),
+        lambda nodes: nodes
+    )
+    assert report == {"Uno": {"/nuevo": [(ADDED, "*")], "/viejo": [(REMOVED, "*")]}}
+    assert format_report(report) == ["Uno\t/nuevo\tadded\t*", "Uno\t/viejo\tremoved\t*"]
+
+
+def test_export_fingerprints_keep_sites_apart(tmp_path):
+    # Dos sitios con el mismo slug en una lista plana no deben chocar
+    path = tmp_path / "flat.json"
+    path.write_text(json.dumps([
+        {"site": "Uno", "slug": "/", "modules_list": OLD},
+        {"site": "Dos", "slug": "/", "modules_list": NEW},
+    ]), encoding="utf-8")
+    keys = export_fingerprints(read_export(str(path)))
+    assert set(keys) == {("Uno", "/"), ("Dos", "/")}
+
+
+def test_cli_diff_of_identical_exports(tmp_path, capsys):
+    records = [
+        {"site": "Uno", "name": "Home", "slug": "/", "modules_list": OLD},
+        {"site": "Dos", "name": "Home", "slug": "/", "modules_list": NEW},
+    ]
+    first = tmp_path / "a.json"
+    second = tmp_path / "b.json"
+    first.write_text(json.dumps(records), encoding="utf-8")
+    second.write_text(json.dumps({"Uno": [records[0]], "Dos": [records[1]]}), encoding="utf-8")
+    assert cli_main(["--diff", str(first), str(second)]) == EXIT_OK
+    assert capsys.readouterr().out == ""
+
+    records[1] = dict(records[1], modules_list=OLD)
+    second.write_text(json.dumps(records), encoding="utf-8")
+    assert cli_main(["--diff", str(first), str(second)]) == EXIT_FAILURES
+    assert capsys.readouterr().out.splitlines() == [
+        "Dos\t/\tadded\tid:2/banner#0",
+        "Dos\t/\tchanged\tid:2/id:3",
+        "Dos\t/\tremoved\tid:2/id:4",
+    ]
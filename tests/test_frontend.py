@@ -0,0 +1,45 @@
+from blocking import block_classes, classify
+from frontend import front_pages, page_url, round_metrics, site_summary
+
+
+def test_classify_by_host_then_resource_type():
+    assert classify("https://securepubads.g.doubleclick.net/tag.js", "script") == "ads"
+    assert classify("https://www.googletagmanager.com/gtm.js", "script") == "analytics"
+    assert classify("https://cdn.milenio.com/foto.jpg", "image") == "media"
+    assert classify("https://www.milenio.com/app.js", "script") is None
+    assert classify("https://notdoubleclick.net/x.js", "script") is None
+
+
+def test_block_classes_ignores_unknown(capsys):
+    assert block_classes({"name": "Uno", "block": ["ads", "videos"]}) == ("ads",)
+    assert "videos" in capsys.readouterr().err
+    assert block_classes({}) == ("ads", "analytics", "media")
+    assert block_classes({"block": []}) == ()
+
+
+def test_front_pages_dedupe_paths_and_start_with_base():
+    site_config = {
+        "base_url": "https://www.milenio.com/",
+        "slugs": {"Home": "/", "Política": "/politica", "Otra política": "/politica", "API": "/api-only"},
+        "front_paths": {"API": None},
+    }
+    assert front_pages(site_config) == [("Home", "/"), ("Política", "/politica")]
+    assert front_pages({"slugs": {"Deportes": "/deportes"}}) == [("base_url", "/"), ("Deportes", "/deportes")]
+    assert page_url(site_config, "/politica") == "https://www.milenio.com/politica"
+
+
+def test_round_metrics_and_site_summary():
+    assert round_metrics({"ttfb": 12.345, "load": None, "cls": 0.123456}) == {
+        "dns_ms": None, "connect_ms": None, "ttfb_ms": 12.3, "dom_content_loaded_ms": None, "load_ms": None,
+        "lcp_ms": None, "cls": 0.1235,
+    }
+    records = [
+        {"status": 200, "seconds": 1.0, "timing": {"load_ms": 900, "lcp_ms": 1200}, "bytes": 100},
+        {"status": 200, "seconds": 2.0, "timing": {"load_ms": 1500, "lcp_ms": None}, "bytes": 50},
+        {"status": "ERROR", "seconds": 30.0},
+    ]
+    summary = site_summary("Uno", records)
+    assert summary["pages"] == 3 and summary["errors"] == 1
+    assert summary["load_ms"] == {"p50": 900, "p95": 1500, "max": 1500}
+    assert summary["lcp_ms"] == {"p50": 1200, "p95": 1200, "max": 1200}
+    assert summary["bytes"] == 150
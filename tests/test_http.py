@@ -0,0 +1,125 @@
+import asyncio
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from checker import HttpClient, check_site_http
+
+BODY = b'{"type":"Board","data":{"section":"Home","modules":[{"id":1,"type":"lr_list"}]}}'
+DELAYS = {"/api/lento": 0.3, "/api/medio": 0.15, "/api/espera": 0.1}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if self.path == "/api/viejo":
+                self.reply(301, b"", {"Location": "/api/home"})
+                return
+            time.sleep(DELAYS.get(self.path, 0))
+            body = BODY
+            headers = {"Content-Type": "application/json"}
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body)
+                headers["Content-Encoding"] = "gzip"
+            self.reply(200, body, headers)
+            if self.path == "/api/cierra":
+                # Cierra la conexión sin avisar: el cliente la deja en el pool como keep-alive
+                self.close_connection = True
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def reply(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_all(client, urls, sequential=False):
+    async def main():
+        try:
+            if sequential:
+                return [await client.get(url) for url in urls]
+            return await asyncio.gather(*(client.get(url) for url in urls))
+        finally:
+            client.close()
+    return asyncio.run(main())
+
+
+def test_site_results_keep_config_order(server):
+    site_config = {
+        "api_base": server.base_url + "/api",
+        "slugs": {"Lento": "/lento", "Medio": "/medio", "Rapido": "/home"},
+    }
+    finished = []
+    results = asyncio.run(check_site_http(site_config, lambda result, index: finished.append(index), concurrency=3))
+    # Terminan en otro orden, pero la lista regresa en el de la configuración
+    assert finished == [2, 1, 0]
+    assert [r["name"] for r in results] == ["Lento", "Medio", "Rapido"]
+    assert all(r["status"] == 200 and r["modules"] == 1 for r in results)
+
+
+def test_keep_alive_reuses_connections(server):
+    responses = get_all(HttpClient(max_per_host=2), [server.base_url + "/api/home"] * 3, sequential=True)
+    assert [r.status for r in responses] == [200, 200, 200]
+    assert server.connections == 1
+    assert [r.timing["connect_ms"] for r in responses[1:]] == [0, 0]
+
+
+def test_stale_connection_is_replaced(server):
+    urls = [server.base_url + "/api/cierra", server.base_url + "/api/home"]
+    responses = get_all(HttpClient(max_per_host=1), urls, sequential=True)
+    assert [r.status for r in responses] == [200, 200]
+    assert server.connections == 2
+
+
+def test_redirects_are_followed_and_gzip_is_decoded(server):
+    response, = get_all(HttpClient(), [server.base_url + "/api/viejo"])
+    assert response.status == 200
+    assert response.url == server.base_url + "/api/home"
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.body == BODY
+    assert response.json()["data"]["section"] == "Home"
+    assert response.timing["bytes"] == len(gzip.compress(BODY))
+
+
+def test_requests_per_host_are_limited(server):
+    responses = get_all(HttpClient(max_per_host=2, max_workers=6), [server.base_url + "/api/espera"] * 6)
+    assert all(r.status == 200 for r in responses)
+    assert server.max_in_flight == 2
@@ -0,0 +1,93 @@
+import asyncio
+
+import linkcheck
+from linkcheck import LinkCache, LinkChecker, extract_links, link_url
+
+MODULES = [
+    {"id": 1, "type": "card", "image": {"src": "https://img.example.com/a.jpg"}, "link": "/politica/nota",
+     "modules": [{"id": 2, "type": "card", "items": [{"link": "//cdn.example.com/b.png"}, {"link": "texto"}]}]},
+    {"id": 3, "type": "lr_list", "title": "https://no es un enlace", "link": "/solo-relativo"},
+]
+
+
+def test_link_url():
+    assert link_url("src", "https://a.com/x", None) == "https://a.com/x"
+    assert link_url("src", "//a.com/x", "http://front.com/") == "http://a.com/x"
+    assert link_url("link", "/nota", "https://front.com/") == "https://front.com/nota"
+    assert link_url("src", "/nota", "https://front.com/") is None
+    assert link_url("link", "/nota", None) is None
+    assert link_url("link", "https://a.com/con espacio", None) is None
+    assert link_url("link", 12, None) is None
+
+
+def test_extract_links_reports_module_path_and_field():
+    assert extract_links(MODULES, "https://front.com") == [
+        ("0", 1, "card", "image.src", "https://img.example.com/a.jpg"),
+        ("0", 1, "card", "link", "https://front.com/politica/nota"),
+        ("0.0", 2, "card", "items.0.link", "https://cdn.example.com/b.png"),
+        ("1", 3, "lr_list", "link", "https://front.com/solo-relativo"),
+    ]
+
+
+def test_link_cache_expires_and_persists(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(linkcheck.time, "time", lambda: now[0])
+    path = str(tmp_path / "links.json")
+    cache = LinkCache(path, ttl=100, broken_ttl=10)
+    cache.put("https://ok", 200)
+    cache.put("https://rota", 404)
+    now[0] += 20
+    assert cache.get("https://ok") == 200
+    assert cache.get("https://rota") is None  # las rotas vencen antes
+    cache.save()
+
+    reloaded = LinkCache(path, ttl=100, broken_ttl=10)
+    assert reloaded.get("https://ok") == 200
+    assert reloaded.get("https://rota") is None
+    now[0] += 100
+    assert reloaded.get("https://ok") is None
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+
+
+class FakeClient:
+    #Responde según la URL; HEAD rechazado en /nohead
+    def __init__(self):
+        self.calls = []
+
+    async def get(self, url, headers=None, deadline=None, method="GET"):
+        self.calls.append((method, url))
+        await asyncio.sleep(0.01)
+        if "/nohead" in url:
+            return FakeResponse(405 if method == "HEAD" else 206)
+        return FakeResponse(404 if "/rota" in url else 200)
+
+
+def test_checker_dedupes_urls_and_reports_broken():
+    client = FakeClient()
+    checker = LinkChecker(client=client)
+    links = [
+        ("0", 1, "card", "image.src", "https://a.com/ok"),
+        ("1", 2, "card", "image.src", "https://a.com/ok"),
+        ("2", 3, "card", "link", "https://a.com/rota"),
+        ("3", 4, "card", "link", "https://a.com/nohead"),
+    ]
+
+    async def run():
+        # Dos slugs a la vez piden las mismas URLs: cada una se revisa una sola vez
+        return await asyncio.gather(checker.check_links(links), checker.check_links(links))
+
+    (checked, broken), _ = asyncio.run(run())
+    assert checked == 3
+    assert broken == [{"module": "2", "id": 3, "type": "card", "field": "link", "url": "https://a.com/rota",
+                       "status": 404}]
+    assert sorted(client.calls) == [
+        ("GET", "https://a.com/nohead"),
+        ("HEAD", "https://a.com/nohead"),
+        ("HEAD", "https://a.com/ok"),
+        ("HEAD", "https://a.com/rota"),
+    ]
+    assert checker.shared == 3
@@ -0,0 +1,21 @@
+import time
+
+from loadtest import LoadStats
+
+
+def test_short_interval_only_counts_in_summary():
+    stats = LoadStats()
+    stats.record(200, 10)
+    stats.record(500, 30)
+    time.sleep(0.05)
+    report = stats.close_interval(0.01)
+    assert report["requests"] == 2
+    assert report["errors"] == 1
+
+    # Tramo final de milisegundos: no se reporta solo, pero entra al resumen
+    stats.record(200, 20)
+    assert stats.close_interval(10) is None
+    summary = stats.summary()
+    assert summary["requests"] == 3
+    assert summary["errors"] == 1
+    assert summary["statuses"] == {"200": 2, "500": 1}
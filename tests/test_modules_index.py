@@ -0,0 +1,44 @@
+from modules_index import build_module_index, check_expectations, find_module, slug_expectations
+
+MODULES = [
+    {"id": 1, "type": "ad_leaderboard"},
+    {"id": 2, "type": "ctr_modules", "modules": [
+        {"id": 3, "type": "lr_list"},
+        {"id": 4, "type": "ctr_ads", "modules": [{"id": 5, "type": "banner", "is_ad": True}]},
+    ]},
+    "no es un módulo",
+]
+
+
+def test_index_counts_nested_modules():
+    index = build_module_index(MODULES)
+    assert index == {
+        "total": 5,
+        "ads": 2,
+        "non_ads": 3,
+        "by_type": {"ad_leaderboard": 1, "ctr_modules": 1, "lr_list": 1, "ctr_ads": 1, "banner": 1},
+        "by_depth": [2, 2, 1],
+    }
+    # La ruta de cada id sale del mismo recorrido, solo si se pide
+    ids = build_module_index(MODULES, ids=True)["ids"]
+    assert ids == {"1": "0", "2": "1", "3": "1.0", "4": "1.1", "5": "1.1.0"}
+    assert find_module(MODULES, ids["5"]) == {"id": 5, "type": "banner", "is_ad": True}
+    assert find_module(MODULES, "1.5") is None
+    assert find_module(MODULES, "2.0") is None
+
+
+def test_expectations_merge_wildcard_and_slug():
+    site_config = {"expectations": {"*": {"total": 1, "ads": 1}, "Home": {"ads": 3, "lr_list": 1}}}
+    assert slug_expectations(site_config, "Home") == {"total": 1, "ads": 3, "lr_list": 1}
+    assert slug_expectations(site_config, "Otra") == {"total": 1, "ads": 1}
+    assert slug_expectations({}, "Home") == {}
+
+
+def test_check_expectations_reports_missing_minimums():
+    index = build_module_index(MODULES)
+    assert check_expectations(index, {"total": 5, "lr_list": 1}) == []
+    assert check_expectations(index, {"ads": 3, "ctr_modules": 2, "gallery": 1}) == [
+        "ads: 2 < 3",
+        "ctr_modules: 1 < 2",
+        "gallery: 0 < 1",
+    ]
@@ -0,0 +1,110 @@
+import asyncio
+
+import monitor
+from checker import HttpResponse
+from monitor import BACKOFF, FLAP_THRESHOLD, FLAP_WINDOW, JITTER, Monitor, SlugWatch
+
+OK_BODY = b'{"data":{"modules":[{"id":1,"type":"lr_list"}]}}'
+EMPTY_BODY = b'{"data":{"modules":[]}}'
+SITES = {"Uno": {"api_base": "http://uno", "slugs": {"Home": "/"}}}
+
+
+class FakeClient:
+    #Responde con la siguiente respuesta de la lista: (estado, cuerpo)
+    timeout = 5
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.urls = []
+
+    async def get(self, url, headers=None, deadline=None, breaker=None):
+        self.urls.append(url)
+        status, body = self.responses.pop(0)
+        return HttpResponse(url, status, {}, body)
+
+
+def new_monitor(responses=(), **kwargs):
+    transitions = []
+    kwargs.setdefault("interval", 60)
+    kwargs.setdefault("min_interval", 15)
+    kwargs.setdefault("max_interval", 300)
+    mon = Monitor(SITES, transitions.append, client=FakeClient(responses), **kwargs)
+    return mon, transitions
+
+
+def run_checks(mon, watch, times):
+    async def checks():
+        mon._wake = asyncio.Event()
+        for _ in range(times):
+            await mon.check(watch)
+    asyncio.run(checks())
+
+
+def test_healthy_stable_slugs_back_off_up_to_max():
+    mon, _ = new_monitor()
+    watch = SlugWatch("Uno", "Home", "/", 60)
+    intervals = []
+    for _ in range(6):
+        watch.interval = mon.next_interval(watch, healthy=True, changed=False)
+        intervals.append(watch.interval)
+    assert intervals[:3] == [60 * BACKOFF, 60 * BACKOFF ** 2, 60 * BACKOFF ** 3]
+    assert intervals[-1] == 300
+
+
+def test_failures_and_flapping_tighten_and_recovery_resets():
+    mon, _ = new_monitor()
+    watch = SlugWatch("Uno", "Home", "/", 200)
+    assert mon.next_interval(watch, healthy=False, changed=True) == 15
+    assert mon.next_interval(watch, healthy=True, changed=True) == 60
+    watch.changes = [1] * FLAP_THRESHOLD
+    assert mon.next_interval(watch, healthy=True, changed=False) == 15
+
+
+def test_min_and_max_wrap_the_base_interval():
+    mon, _ = new_monitor(interval=30, min_interval=45, max_interval=20)
+    assert (mon.min_interval, mon.max_interval) == (30, 30)
+
+
+def test_only_transitions_are_reported():
+    responses = [(200, OK_BODY)] * 3 + [(404, b"")] * 2 + [(200, OK_BODY)]
+    mon, transitions = new_monitor(responses)
+    watch = SlugWatch("Uno", "Home", "/", 60)
+    run_checks(mon, watch, len(responses))
+    assert mon.requests == 6
+    assert [(t["from"] and t["from"]["status"], t["to"]["status"]) for t in transitions] == [(200, 404), (404, 200)]
+    assert mon.client.urls == ["http://uno/"] * 6
+    assert watch.interval == 60  # recién recuperado: intervalo base
+
+
+def test_a_slug_that_starts_broken_is_reported():
+    mon, transitions = new_monitor([(200, EMPTY_BODY)])
+    watch = SlugWatch("Uno", "Home", "/", 60)
+    run_checks(mon, watch, 1)
+    assert len(transitions) == 1
+    assert transitions[0]["from"] is None
+    assert transitions[0]["to"] == {"status": 200, "modules": False, "expectations": "N/A"}
+    assert watch.interval == 15
+
+
+def test_flapping_is_flagged_and_window_is_bounded():
+    responses = [(200, OK_BODY), (200, EMPTY_BODY)] * FLAP_WINDOW
+    mon, transitions = new_monitor(responses)
+    watch = SlugWatch("Uno", "Home", "/", 60)
+    run_checks(mon, watch, len(responses))
+    assert len(watch.changes) == FLAP_WINDOW
+    assert [t["flapping"] for t in transitions[:FLAP_THRESHOLD]] == [False] * (FLAP_THRESHOLD - 1) + [True]
+    assert watch.interval == 15
+
+
+def test_schedule_adds_jitter(monkeypatch):
+    monkeypatch.setattr(monitor.time, "monotonic", lambda: 1000.0)
+    mon, _ = new_monitor()
+
+    async def schedule():
+        mon._wake = asyncio.Event()
+        for _ in range(200):
+            mon._schedule(SlugWatch("Uno", "Home", "/", 60), 100)
+    asyncio.run(schedule())
+    delays = [when - 1000.0 for when, _, _ in mon._queue]
+    assert all(100 * (1 - JITTER) <= delay <= 100 * (1 + JITTER) for delay in delays)
+    assert len(set(delays)) > 1
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+import payload
+
+BODY = (
+    '{"code": 200, "type": "Board", "meta": {"x": [1, 2]},\n'
+    ' "data": {"section": "Año", "extra": null, "modules": [{"id": 1, "title": "ñ \\"q\\""}, {"id": 2}]}}'
+).encode("utf-8")
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(payload, "orjson", None)
+    elif payload.orjson is None:
+        pytest.skip("orjson no está instalado")
+    return request.param
+
+
+def test_parse_payload_extracts_summary_fields(backend):
+    api_type, section, modules, raw = payload.parse_payload(BODY)
+    expected = json.loads(BODY)["data"]["modules"]
+    assert (api_type, section, modules) == ("Board", "Año", expected)
+    assert json.loads(raw) == expected
+
+
+@pytest.mark.parametrize("body, expected", [
+    (b'{"type": "Board"}', ("Board", None, [], b"[]")),
+    (b'{"type": "Board", "data": []}', ("Board", None, [], b"[]")),
+    (b'{"data": {"section": "Home"}}', (None, "Home", [], b"[]")),
+])
+def test_parse_payload_without_modules(backend, body, expected):
+    assert payload.parse_payload(body) == expected
+
+
+@pytest.mark.parametrize("body", [b"", b"[1, 2]", b'{"type": "Board"', b'{"type": "Board"} extra', b"no json"])
+def test_parse_payload_rejects_invalid_json(backend, body):
+    with pytest.raises(ValueError):
+        payload.parse_payload(body)
+
+
+def test_dumps_is_compact_utf8(backend):
+    assert payload.dumps({"a": "ñ", "b": [1, 2]}) == '{"a":"ñ","b":[1,2]}'.encode("utf-8")
+    assert payload.dumps_sorted({"b": 1, "a": 2}) == b'{"a":2,"b":1}'
@@ -0,0 +1,136 @@
+import time
+
+import pytest
+
+from results_store import ResultsStore
+from spill import load_modules
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+def make_result(name, status=200, modules=b'[{"id":1}]', total_ms=None, **extra):
+    result = {"name": name, "slug": f"/{name}", "status": status, "modules": 1, "modules_ok": "Existen Modulos",
+              "fingerprint": f"f-{name}", "modules_raw": modules, "module_hashes": [["1", "a", "b", []]]}
+    if total_ms is not None:
+        result["timing"] = {"total_ms": total_ms}
+    result.update(extra)
+    return result
+
+
+def finished_run(store, sites, results=()):
+    run_id = store.start_run("http", sites)
+    for site, position, result in results:
+        store.add_result(run_id, site, position, result, result["status"] == 200)
+    store.finish_run(run_id)
+    return run_id
+
+
+def test_results_round_trip_with_modules(store):
+    run_id = store.start_run("http", ["Uno"])
+    result = make_result("a", section="Home")
+    store.add_result(run_id, "Uno", 0, result, True)
+    # El hilo escritor suelta los bytes una vez guardados
+    store.flush()
+    assert "modules_raw" not in result
+
+    found = store.find_result(run_id, "Uno", 0)
+    assert found["name"] == "a" and found["section"] == "Home"
+    assert "module_hashes" not in found
+    assert load_modules(found) == [{"id": 1}]
+    assert store.module_hashes(found["modules_ref"].result_id) == [["1", "a", "b", []]]
+    assert store.find_result(run_id, "Uno", 1) is None
+
+
+def test_run_results_keep_config_order(store):
+    run_id = finished_run(store, ["Uno", "Dos"], [
+        ("Dos", 1, make_result("d")),
+        ("Uno", 1, make_result("b")),
+        ("Dos", 0, make_result("c")),
+        ("Uno", 0, make_result("a")),
+    ])
+    site_results = store.run_results(run_id)
+    assert list(site_results) == ["Uno", "Dos"]
+    assert [r["name"] for r in site_results["Uno"]] == ["a", "b"]
+    assert [r["name"] for r in site_results["Dos"]] == ["c", "d"]
+
+
+def test_many_queued_results_are_all_written(store):
+    run_id = finished_run(store, ["Uno"], [("Uno", i, make_result(f"s{i}")) for i in range(120)])
+    assert store.run_summary(run_id)["total"] == 120
+
+
+def test_run_summary_counts_and_latency(store):
+    run_id = finished_run(store, ["Uno"], [
+        ("Uno", 0, make_result("a", total_ms=100)),
+        ("Uno", 1, make_result("b", status=404, total_ms=300)),
+        ("Uno", 2, make_result("c", status="SKIPPED")),
+    ])
+    summary = store.run_summary(run_id)
+    assert summary["total"] == 3
+    assert summary["success"] == 1
+    assert summary["skipped"] == 1
+    assert summary["ok"] == 1
+    assert summary["max"] == 300
+
+
+def test_previous_run_shares_a_site(store):
+    fama = finished_run(store, ["Fama"])
+    finished_run(store, ["Milenio"])
+    unfinished = store.start_run("http", ["Fama"])
+    current = store.start_run("http", ["Fama", "Otro"])
+    assert store.previous_run(current) == fama
+    assert store.previous_run(unfinished) == fama
+    assert store.previous_run(fama) is None
+
+
+def test_run_fingerprints_and_slug_history(store):
+    first = finished_run(store, ["Uno"], [("Uno", 0, make_result("a"))])
+    second = finished_run(store, ["Uno"], [("Uno", 0, make_result("a", fingerprint="nuevo"))])
+    fingerprints = store.run_fingerprints(second)
+    assert list(fingerprints) == [("Uno", "/a")]
+    assert fingerprints[("Uno", "/a")][1] == "nuevo"
+    assert [run_id for run_id, _, _ in store.slug_history("Uno", "/a")] == [second, first]
+
+
+def test_prune_keeps_latest_runs(store):
+    runs = [finished_run(store, ["Uno"], [("Uno", 0, make_result("a"))]) for _ in range(3)]
+    assert store.prune(keep_runs=2) == 1
+    assert store.run_results(runs[0]) == {}
+    assert store.slug_history("Uno", "/a")[-1][0] == runs[1]
+
+
+def test_prune_by_age(store):
+    finished_run(store, ["Uno"])
+    time.sleep(0.01)
+    assert store.prune(max_age_days=0) == 1
+
+
+def test_status_results_by_run_and_across_runs(store):
+    first = finished_run(store, ["Uno", "Dos"], [
+        ("Uno", 0, make_result("a", status=404)),
+        ("Dos", 0, make_result("b", status="ERROR")),
+        ("Uno", 1, make_result("c")),
+    ])
+    second = finished_run(store, ["Uno"], [
+        ("Uno", 1, make_result("c", status=404)),
+        ("Uno", 0, make_result("a", status=404)),
+    ])
+    assert [(run, site, r["name"]) for run, site, r in store.status_results(404, second)] == [
+        (second, "Uno", "a"), (second, "Uno", "c"),
+    ]
+    assert [(run, r["name"]) for run, _, r in store.status_results(404)] == [(second, "a"), (second, "c"), (first, "a")]
+    assert [(run, r["name"]) for run, _, r in store.status_results(404, limit=1)] == [(second, "a")]
+    assert [r["name"] for _, _, r in store.status_results("ERROR", first)] == ["b"]
+    assert store.status_results(500) == []
+
+
+def test_status_queries_use_the_status_index(store):
+    plan = store._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM results WHERE status = ? ORDER BY run_id DESC LIMIT 5", (404,)
+    ).fetchall()
+    assert any("idx_results_status" in row["detail"] for row in plan)
@@ -0,0 +1,108 @@
+import concurrent.futures
+import os
+import time
+
+import shard
+from shard import claim_shard, enqueue, make_shards, new_run_dir, read_records, requeue_stale, run_shard, write_record
+from spill import SpillStore
+
+SITES = {
+    "Uno": {"api_base": "http://uno", "slugs": {f"s{i}": f"/s{i}" for i in range(5)}},
+    "Dos": {"api_base": "http://dos", "slugs": {"Home": "/"}},
+}
+
+
+def test_make_shards_keep_original_positions():
+    shards = make_shards(SITES, shard_size=2, options={"engine": "http"})
+    assert [(s["site"], s["indexes"]) for s in shards] == [
+        ("Uno", [0, 1]), ("Uno", [2, 3]), ("Uno", [4]), ("Dos", [0]),
+    ]
+    assert list(shards[1]["config"]["slugs"]) == ["s2", "s3"]
+    assert shards[1]["config"]["api_base"] == "http://uno"
+    assert shards[3]["options"] == {"engine": "http"}
+
+
+def test_each_shard_is_claimed_once(tmp_path):
+    run_dir = new_run_dir(str(tmp_path))
+    names = enqueue(run_dir, make_shards(SITES, shard_size=2))
+    claimed = []
+    while True:
+        claim = claim_shard(str(tmp_path), f"w{len(claimed) % 2}")
+        if claim is None:
+            break
+        claimed.append(claim)
+    assert [name for _, name, _ in claimed] == names
+    assert all(run == run_dir and os.path.exists(path) for run, _, path in claimed)
+    assert os.listdir(os.path.join(run_dir, shard.JOBS_DIR)) == []
+
+
+def test_stopped_runs_are_not_claimed(tmp_path):
+    run_dir = new_run_dir(str(tmp_path))
+    enqueue(run_dir, make_shards(SITES))
+    open(os.path.join(run_dir, shard.STOP_FILE), "w").close()
+    assert claim_shard(str(tmp_path), "w") is None
+
+
+def test_requeue_stale_claims(tmp_path):
+    run_dir = new_run_dir(str(tmp_path))
+    enqueue(run_dir, make_shards(SITES, shard_size=3))
+    _, stale_name, stale_path = claim_shard(run_dir, "caido")
+    _, live_name, live_path = claim_shard(run_dir, "vivo")
+    old = time.time() - 120
+    os.utime(stale_path, (old, old))
+
+    assert requeue_stale(run_dir, lease=60) == 1
+    assert sorted(os.listdir(os.path.join(run_dir, shard.JOBS_DIR))) == sorted([stale_name, "0003.json"])
+    assert os.path.exists(live_path)
+    # El shard vuelto a encolar lo toma otro trabajador
+    assert claim_shard(run_dir, "otro")[1] == stale_name
+
+
+def test_records_round_trip_module_bytes(tmp_path):
+    path = tmp_path / "0001.results"
+    spill = SpillStore()
+    try:
+        with open(path, "wb") as out:
+            write_record(out, "Uno", 3, {"name": "a", "status": 200, "modules_ref": spill.put(b'[{"t":"a\nb"}]')})
+            write_record(out, "Uno", 4, {"name": "b", "status": 404, "modules_raw": b"[]"})
+            out.write(b'{"site":"Dos","error":"sin conexi\xc3\xb3n"}\n')
+    finally:
+        spill.close()
+    assert list(read_records(str(path))) == [
+        ("Uno", 3, {"name": "a", "status": 200, "modules_raw": b'[{"t":"a\nb"}]'}),
+        ("Uno", 4, {"name": "b", "status": 404, "modules_raw": b"[]"}),
+        ("Dos", None, {"site": "Dos", "error": "sin conexión"}),
+    ]
+
+
+class StuckEngine:
+    #Motor cuyo shard nunca termina; on_start corre al arrancar el shard
+    def __init__(self, on_start):
+        self.on_start = on_start
+        self.future = concurrent.futures.Future()
+
+    def run_sites(self, *args, **kwargs):
+        self.on_start()
+        return self.future
+
+
+def test_lost_shard_is_abandoned(tmp_path, monkeypatch):
+    monkeypatch.setattr(shard, "HEARTBEAT", 0.05)
+    run_dir = new_run_dir(str(tmp_path))
+    enqueue(run_dir, make_shards(SITES, shard_size=8))
+    _, name, claimed = claim_shard(run_dir, "w")
+
+    # El coordinador lo vuelve a encolar mientras el trabajador sigue con él
+    engine = StuckEngine(lambda: os.rename(claimed, os.path.join(run_dir, shard.JOBS_DIR, name)))
+    assert run_shard(engine, run_dir, name, claimed) is False
+    assert engine.future.cancelled()
+    assert sorted(os.listdir(os.path.join(run_dir, shard.RESULTS_DIR))) == []
+    assert name in os.listdir(os.path.join(run_dir, shard.JOBS_DIR))
+
+
+def test_worker_survives_a_bad_shard(tmp_path, capsys):
+    run_dir = new_run_dir(str(tmp_path))
+    with open(os.path.join(run_dir, shard.JOBS_DIR, "0001.json"), "w") as f:
+        f.write("{no es json")
+    shard.worker(run_dir, idle_exit=0.2)
+    assert "0001.json" in capsys.readouterr().err
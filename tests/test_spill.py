@@ -0,0 +1,50 @@
+from spill import SpillStore, load_modules, modules_bytes, modules_json, pack_modules
+
+MODULES = [{"id": 1, "title": "Año"}, {"id": 2, "modules": []}]
+RAW = '[{"id":1,"title":"Año"},{"id":2,"modules":[]}]'.encode("utf-8")
+
+
+def test_store_reads_back_each_slice():
+    store = SpillStore()
+    try:
+        first = store.put(b"[1]")
+        second = store.put(RAW)
+        assert second.read() == RAW
+        assert first.read() == b"[1]"
+        assert store.size == len(RAW) + 3
+    finally:
+        store.close()
+
+
+def test_pack_moves_raw_bytes_to_the_spill():
+    store = SpillStore()
+    try:
+        result = pack_modules({"name": "a", "modules_raw": RAW}, store)
+        assert "modules_raw" not in result and "modules_list" not in result
+        assert modules_bytes(result) == RAW
+        assert load_modules(result) == MODULES
+    finally:
+        store.close()
+
+
+def test_pack_serializes_parsed_modules():
+    store = SpillStore()
+    try:
+        result = pack_modules({"name": "a", "modules_list": MODULES}, store)
+        assert "modules_list" not in result
+        assert load_modules(result) == MODULES
+    finally:
+        store.close()
+
+
+def test_without_spill_modules_stay_as_bytes():
+    result = pack_modules({"name": "a", "modules_raw": RAW, "modules_list": MODULES})
+    assert result["modules_raw"] is RAW
+    assert "modules_list" not in result
+    assert load_modules(result) == MODULES
+    assert modules_json(result) == RAW.decode("utf-8")
+
+
+def test_missing_modules_are_empty():
+    assert load_modules({"name": "a"}) == []
+    assert modules_bytes({"name": "a"}) == b"[]"
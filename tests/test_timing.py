@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from timing import HISTOGRAM_GROWTH, LatencyHistogram, finish_timing, latency_summary, new_timing, percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 100) == 100
+    assert percentile([7], 95) == 7
+    assert percentile([], 50) is None
+    assert latency_summary([]) == {"p50": None, "p95": None, "max": None}
+
+
+def test_finish_timing_adds_parse_to_total():
+    timing = dict(new_timing(), connect_ms=1.5, ttfb_ms=20, download_ms=3)
+    assert finish_timing(timing, 0.0042) == dict(timing, parse_ms=4.2, total_ms=28.7)
+
+
+def test_histogram_percentiles_within_bucket_error():
+    samples = [random.Random(7).lognormvariate(4, 1) for _ in range(20000)]
+    histogram = LatencyHistogram()
+    for value in samples:
+        histogram.record(value)
+    samples.sort()
+    for p in (50, 95, 99):
+        exact = percentile(samples, p)
+        assert exact - 0.05 <= histogram.percentile(p) <= exact * HISTOGRAM_GROWTH + 0.05
+    assert histogram.percentile(100) == round(samples[-1], 1)
+    assert histogram.count == len(samples)
+    assert histogram.mean == pytest.approx(sum(samples) / len(samples), abs=0.1)
+
+
+def test_histogram_merge_equals_recording_everything():
+    first, second, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for value in (0.05, 3, 12.5, 400):
+        first.record(value)
+        both.record(value)
+    for value in (1, 90, 700000):
+        second.record(value)
+        both.record(value)
+    first.merge(second)
+    assert first.counts == both.counts
+    assert (first.count, first.total, first.max) == (both.count, both.total, both.max)
+    # Lo que pasa del límite cae en la última cubeta y se reporta con el máximo visto
+    assert first.percentile(100) == 700000
+
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    assert histogram.mean is None
@@ -0,0 +1,107 @@
+import math
+
+# Tiempos por slug (en milisegundos) y percentiles de una ejecución.
+#
+# result["timing"] = {
+#     "connect_ms":  conexión TCP + TLS (0 si se reutilizó una conexión keep-alive)
+#     "ttfb_ms":     desde que se manda la petición hasta el primer byte de la respuesta
+#     "download_ms": lectura (y descompresión) del cuerpo
+#     "parse_ms":    parseo del JSON y armado del resultado
+#     "total_ms":    la suma de lo anterior, sin la espera por un lugar en el límite por host
+#     "bytes":       tamaño del cuerpo como llegó por la red
+# }
+# Con redirecciones, cada fase suma todos los saltos.
+
+TIMING_FIELDS = ("connect_ms", "ttfb_ms", "download_ms", "parse_ms", "total_ms", "bytes")
+PERCENTILES = (50, 95)
+
+# Histograma de latencias (modo de carga): cubetas logarítmicas de 0.1 ms a 10 min
+HISTOGRAM_MIN_MS = 0.1
+HISTOGRAM_MAX_MS = 10 * 60 * 1000
+HISTOGRAM_GROWTH = 1.05
+HISTOGRAM_BUCKETS = math.ceil(math.log(HISTOGRAM_MAX_MS / HISTOGRAM_MIN_MS, HISTOGRAM_GROWTH)) + 2
+
+
+def new_timing():
+    return dict.fromkeys(TIMING_FIELDS, 0)
+
+
+def ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+def finish_timing(timing, parse_seconds=0.0):
+    #Agrega el parseo y calcula el total
+    timing["parse_ms"] = ms(parse_seconds)
+    timing["total_ms"] = round(
+        timing["connect_ms"] + timing["ttfb_ms"] + timing["download_ms"] + timing["parse_ms"], 1
+    )
+    return timing
+
+
+def percentile(sorted_values, p):
+    #Percentil por rango más cercano de una lista ya ordenada
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(sorted_values):
+    #{"p50": ..., "p95": ..., "max": ...} de una lista ordenada de total_ms
+    summary = {f"p{p}": percentile(sorted_values, p) for p in PERCENTILES}
+    summary["max"] = sorted_values[-1] if sorted_values else None
+    return summary
+
+
+def bucket_index(value):
+    if value <= HISTOGRAM_MIN_MS:
+        return 0
+    index = math.ceil(math.log(value / HISTOGRAM_MIN_MS, HISTOGRAM_GROWTH))
+    return min(index, HISTOGRAM_BUCKETS - 1)
+
+
+def bucket_limit(index):
+    return HISTOGRAM_MIN_MS * HISTOGRAM_GROWTH ** index
+
+
+class LatencyHistogram:
+    #Histograma logarítmico de latencias en ms con memoria constante: cada cubeta cubre
+    #un rango HISTOGRAM_GROWTH veces más ancho que la anterior (error relativo de hasta 5%),
+    #desde HISTOGRAM_MIN_MS hasta HISTOGRAM_MAX_MS. No guarda las muestras.
+    def __init__(self):
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p):
+        #Límite superior de la cubeta donde cae el percentil (sin pasar del máximo visto)
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts[:-1]):
+            seen += count
+            if seen >= rank:
+                return round(min(bucket_limit(index), self.max), 1)
+        # La última cubeta junta todo lo que pasa de HISTOGRAM_MAX_MS: no tiene límite superior
+        return round(self.max, 1)
+
+    @property
+    def mean(self):
+        return round(self.total / self.count, 1) if self.count else None